@@ -1,6 +1,7 @@
 from .base import (
-    CaptionConverter, CaptionNode, Caption, CaptionList, CaptionSet)
-from .dfxp import DFXPWriter, DFXPReader
+    CaptionConverter, CaptionNode, Caption, CaptionList, CaptionSet,
+    CutSegment, InsertSegment)
+from .dfxp import DFXPWriter, DFXPReader, LxmlDFXPReader
 from .sami import SAMIReader, SAMIWriter
 from .srt import SRTReader, SRTWriter
 from .scc import SCCReader, SCCWriter
@@ -10,11 +11,12 @@ from .exceptions import (
 
 
 __all__ = [
-    'CaptionConverter', 'DFXPReader', 'DFXPWriter',
+    'CaptionConverter', 'DFXPReader', 'DFXPWriter', 'LxmlDFXPReader',
     'SAMIReader', 'SAMIWriter', 'SRTReader', 'SRTWriter',
     'SCCReader', 'SCCWriter', 'WebVTTReader', 'WebVTTWriter',
     'CaptionReadError', 'CaptionReadNoCaptions', 'CaptionReadSyntaxError',
-    'detect_format', 'CaptionNode', 'Caption', 'CaptionList', 'CaptionSet'
+    'detect_format', 'CaptionNode', 'Caption', 'CaptionList', 'CaptionSet',
+    'CutSegment', 'InsertSegment'
 ]
 
 SUPPORTED_READERS = (
@@ -1,10 +1,48 @@
-from datetime import timedelta
+import copy_reg
+from array import array
+from copy import copy
 from numbers import Number
+from bisect import bisect_right
+from heapq import heappop, heappush
+from itertools import izip
+from weakref import WeakValueDictionary
 
 from .exceptions import CaptionReadError, CaptionReadTimingError
+from .timestamps import format_timestamp
 
 DEFAULT_LANGUAGE_CODE = u'en-US'
 
+# Style dicts are repeated over and over (e.g. the italics of SCC files), so
+# equal ones are shared. The cache is simply emptied when it gets too big.
+_INTERNED_STYLES = {}
+_INTERNED_STYLES_MAX_SIZE = 1024
+
+# BREAK nodes only differ by their layout, so they are shared too
+_BREAK_NODES = WeakValueDictionary()
+
+# Typecodes of the timing columns (see CaptionTimings). Python 2's array has
+# no 'q', and 'l' is only 64 bits wide on some platforms: the integer times
+# are kept in lists there, rather than losing their precision in floats.
+_INTEGER_TYPECODE = u'l' if array(u'l').itemsize >= 8 else None
+_FLOAT_TYPECODE = u'd'
+
+
+def _time_column(times, integral):
+    """Returns a column (an array, or a list for the integers which don't
+    fit in one) holding the given times
+
+    :type times: list
+    :param integral: Whether all the times are integers
+    """
+    if not integral:
+        return array(_FLOAT_TYPECODE, times)
+    if _INTEGER_TYPECODE is not None:
+        try:
+            return array(_INTEGER_TYPECODE, times)
+        except OverflowError:
+            pass
+    return list(times)
+
 
 def force_byte_string(content):
     try:
@@ -84,6 +122,52 @@ class BaseWriter(object):
                 layout_info = layout_info.fit_to_screen()
         return layout_info
 
+    def _relativize_captions(self, caption_set, langs):
+        """Returns a copy-on-write version of the caption set, in which the
+        captions of the given languages (and their nodes) have their layouts
+        relativized and fit to the screen.
+
+        Only the captions and nodes whose layout actually changes are copied,
+        everything else is shared with the original caption set, which is
+        left untouched.
+
+        :type caption_set: CaptionSet
+        :type langs: list
+        :rtype: CaptionSet
+        """
+        caption_set = caption_set.copy()
+        transformed = {}
+
+        def transform(layout_info):
+            if layout_info is None:
+                return None
+            # The same Layout object is usually shared by many nodes, so
+            # each one only needs to be transformed once
+            try:
+                return transformed[id(layout_info)][1]
+            except KeyError:
+                pass
+            result = self._relativize_and_fit_to_screen(layout_info)
+            transformed[id(layout_info)] = layout_info, result
+            return result
+
+        for lang in langs:
+            captions = caption_set.get_captions(lang)
+            for index, caption in enumerate(captions):
+                nodes = None
+                for node_index, node in enumerate(caption.nodes):
+                    layout_info = transform(node.layout_info)
+                    if layout_info is not node.layout_info:
+                        if nodes is None:
+                            nodes = list(caption.nodes)
+                        nodes[node_index] = node.copy_with(
+                            layout_info=layout_info)
+                layout_info = transform(caption.layout_info)
+                if layout_info is not caption.layout_info or nodes:
+                    captions[index] = caption.copy_with(
+                        layout_info=layout_info, nodes=nodes or caption.nodes)
+        return caption_set
+
     def write(self, content):
         return content
 
@@ -93,6 +177,47 @@ class Style(object):
         pass
 
 
+def copy_dict(dictionary):
+    """Returns a copy of the dict, made by inserting its items one by one
+    like deepcopy does.
+
+    Python 2 dicts are iterated in an order which depends on their history:
+    dict.copy() can give a different order than the deep copy of the same
+    dict. The writers used to work on deep copies of the caption sets, so
+    they copy the dicts they write out with this function to keep writing
+    them in the same order.
+
+    :type dictionary: dict
+    :rtype: dict
+    """
+    copied = {}
+    for key, value in dictionary.iteritems():
+        copied[key] = value
+    return copied
+
+
+def _intern_style(style):
+    """Returns a shared dict equal to the given style dict, if possible.
+
+    Interned styles are shared by many captions and nodes, so they must be
+    replaced, never modified.
+
+    :type style: dict
+    :rtype: dict
+    """
+    try:
+        key = frozenset(style.iteritems())
+        return _INTERNED_STYLES[key]
+    except KeyError:
+        if len(_INTERNED_STYLES) >= _INTERNED_STYLES_MAX_SIZE:
+            _INTERNED_STYLES.clear()
+        _INTERNED_STYLES[key] = style
+        return style
+    except (AttributeError, TypeError):
+        # Not a dict, or it has unhashable values (e.g. lists)
+        return style
+
+
 class CaptionNode(object):
     """
     A single node within a caption, representing either
@@ -103,7 +228,10 @@ class CaptionNode(object):
         The value None means specifically that no positioning information
         should be specified. Each reader is to supply its own default
         values (if necessary) when reading their respective formats.
+        2. Nodes can be shared (all BREAK nodes with the same layout_info
+        are the same object). Use copy_with to change them.
     """
+    __slots__ = ('type_', 'content', 'start', 'layout_info', '__weakref__')
 
     TEXT = 1
     # When and if this is extended, it might be better to turn it into a
@@ -123,6 +251,12 @@ class CaptionNode(object):
         self.start = None
         self.layout_info = layout_info
 
+    def __getstate__(self):
+        return (self.type_, self.content, self.start, self.layout_info)
+
+    def __setstate__(self, state):
+        self.type_, self.content, self.start, self.layout_info = state
+
     def __repr__(self):
         t = self.type_
 
@@ -144,13 +278,39 @@ class CaptionNode(object):
     @staticmethod
     def create_style(start, content, layout_info=None):
         data = CaptionNode(CaptionNode.STYLE, layout_info=layout_info)
-        data.content = content
+        data.content = _intern_style(content)
         data.start = start
         return data
 
     @staticmethod
     def create_break(layout_info=None):
-        return CaptionNode(CaptionNode.BREAK, layout_info=layout_info)
+        # Layout equality ignores the WebVTT positioning
+        key = layout_info, getattr(layout_info, 'webvtt_positioning', None)
+        try:
+            return _BREAK_NODES[key]
+        except KeyError:
+            node = _BREAK_NODES[key] = CaptionNode(
+                CaptionNode.BREAK, layout_info=layout_info)
+            return node
+        except TypeError:
+            # Unhashable layout
+            return CaptionNode(CaptionNode.BREAK, layout_info=layout_info)
+
+    def copy_with(self, **attributes):
+        """Returns a shallow copy of this node, with the given attributes
+        replaced. Writers should use this instead of modifying the nodes of
+        the caption set they were given.
+
+        :rtype: CaptionNode
+        """
+        if self.type_ == CaptionNode.BREAK and (
+                set(attributes) <= set([u'layout_info'])):
+            return CaptionNode.create_break(
+                attributes.get(u'layout_info', self.layout_info))
+        node = copy(self)
+        for name, value in attributes.items():
+            setattr(node, name, value)
+        return node
 
 
 class Caption(object):
@@ -158,6 +318,8 @@ class Caption(object):
     A single caption, including the time and styling information
     for its display.
     """
+    __slots__ = ('start', 'end', 'nodes', 'style', 'layout_info')
+
     def __init__(self, start, end, nodes, style={}, layout_info=None):
         """
         Initialize the Caption object
@@ -184,9 +346,15 @@ class Caption(object):
         self.start = start
         self.end = end
         self.nodes = nodes
-        self.style = style
+        self.style = _intern_style(style)
         self.layout_info = layout_info
 
+    def __getstate__(self):
+        return (self.start, self.end, self.nodes, self.style, self.layout_info)
+
+    def __setstate__(self, state):
+        self.start, self.end, self.nodes, self.style, self.layout_info = state
+
     def is_empty(self):
         return len(self.nodes) == 0
 
@@ -227,21 +395,348 @@ class Caption(object):
         text_nodes = [get_text_for_node(node) for node in self.nodes]
         return u''.join(text_nodes).strip()
 
+    def copy_with(self, **attributes):
+        """Returns a shallow copy of this caption (sharing its nodes and
+        style), with the given attributes replaced. Writers should use this
+        instead of modifying the captions of the caption set they were given.
+
+        :rtype: Caption
+        """
+        caption = copy(self)
+        for name, value in attributes.items():
+            setattr(caption, name, value)
+        return caption
+
     def _format_timestamp(self, value, msec_separator=None):
-        datetime_value = timedelta(milliseconds=(int(value / 1000)))
+        return format_timestamp(value, msec_separator)
+
+
+class CaptionTimings(object):
+    """The start and end times of a list of captions, copied to two columns
+    (one row per caption, in the order of the list) for the operations on the
+    whole timeline: the retiming edits, the overlaps and the interval index.
+    The captions keep their own times: the changes made to the columns are
+    only copied back to them by store.
+
+    Integer times stay integers, and the columns switch to floats as soon as
+    an edit involves a float.
+    """
+    def __init__(self, captions):
+        """
+        :param captions: The captions whose times are copied to the columns
+        :type captions: list
+        """
+        self.captions = list(captions)
+
+        starts = [caption.start for caption in self.captions]
+        ends = [caption.end for caption in self.captions]
+        self.integral = all(
+            isinstance(value, (int, long)) for value in starts + ends)
+        self.starts = _time_column(starts, self.integral)
+        self.ends = _time_column(ends, self.integral)
+
+    def __len__(self):
+        return len(self.captions)
+
+    def store(self):
+        """Copies the times of the columns to the captions
+        """
+        for caption, start, end in izip(self.captions, self.starts, self.ends):
+            _set_start(caption, start)
+            _set_end(caption, end)
+        _IntervalIndex.times_changes += 1
+
+    def _integral_with(self, *operands):
+        """Returns whether the result of an arithmetic operation between the
+        columns and the given operands is integral
+        """
+        return self.integral and all(
+            isinstance(operand, (int, long)) for operand in operands)
+
+    def cut(self, start, end):
+        """Removes the [start, end) segment from the timeline: what comes
+        after it is moved back by its duration.
+
+        :returns: The rows of the captions which were entirely in the segment,
+            and those of the captions which were partially in it (and so got
+            shortened)
+        :rtype: tuple
+        """
+        duration = end - start
+        self.integral = self._integral_with(start, end)
+        old_starts, old_ends = self.starts, self.ends
+        self.starts = _time_column([
+            time if time <= start else (start if time < end else time - duration)
+            for time in old_starts], self.integral)
+        self.ends = _time_column([
+            time if time <= start else (start if time < end else time - duration)
+            for time in old_ends], self.integral)
+
+        dropped = []
+        clipped = []
+        for row, (old_start, old_end) in enumerate(izip(old_starts, old_ends)):
+            if old_start >= start and old_end <= end:
+                dropped.append(row)
+            elif old_start < end and old_end > start:
+                clipped.append(row)
+        return dropped, clipped
+
+    def insert(self, position, duration):
+        """Inserts a segment of the given duration in the timeline: what
+        comes after the position is moved forward by the duration. The
+        captions visible at the position end there, instead of spanning the
+        inserted segment.
+
+        :returns: The rows of the captions which were shortened
+        :rtype: list
+        """
+        self.integral = self._integral_with(position, duration)
+        old_starts = self.starts
+        self.starts = _time_column([
+            time if time < position else time + duration
+            for time in old_starts], self.integral)
+        self.ends = _time_column([
+            end if end <= position else (
+                end + duration if start >= position else position)
+            for start, end in izip(old_starts, self.ends)], self.integral)
+        return [row for row, (start, end) in enumerate(
+                izip(old_starts, self.ends)) if start < position < end]
+
+    def sorted_rows(self):
+        """Returns the rows ordered by start time. Captions starting at the
+        same time keep their order.
+
+        :rtype: list
+        """
+        return sorted(xrange(len(self.starts)), key=self.starts.__getitem__)
+
+    def overlapping_rows(self):
+        """Returns the pairs of rows whose captions overlap in time, i.e.
+        one of them starts before the other one ends. Within each pair, the
+        first row is the one starting first.
+
+        :rtype: list
+        """
+        starts = self.starts
+        ends = self.ends
+        overlaps = []
+        # Rows already started, sorted by end time
+        active = []
+        for row in self.sorted_rows():
+            start = starts[row]
+            while active and active[0][0] <= start:
+                heappop(active)
+            if ends[row] > start:
+                overlaps.extend(
+                    (other_row, row) for _, other_row in sorted(active))
+                heappush(active, (ends[row], row))
+        return overlaps
+
+
+class CutSegment(object):
+    """An edit of the timeline removing the segment from start (inclusive)
+    to end (exclusive). See CaptionSet.retime.
+    """
+    def __init__(self, start, end):
+        """
+        :param start: The start of the segment, in microseconds
+        :param end: The end of the segment, in microseconds
+        """
+        if end < start:
+            raise ValueError(u"The end of the segment is before its start")
+        self.start = start
+        self.end = end
+
+    @property
+    def position(self):
+        return self.start
+
+    def apply(self, timings):
+        """
+        :type timings: CaptionTimings
+        :returns: The rows dropped and the rows clipped
+        :rtype: tuple
+        """
+        return timings.cut(self.start, self.end)
+
+
+class InsertSegment(object):
+    """An edit of the timeline inserting a segment (e.g. an ad break) of the
+    given duration at the given position. See CaptionSet.retime.
+    """
+    def __init__(self, position, duration):
+        """
+        :param position: Where the segment is inserted, in microseconds
+        :param duration: The duration of the segment, in microseconds
+        """
+        if duration < 0:
+            raise ValueError(u"The duration of the segment is negative")
+        self.position = position
+        self.duration = duration
 
-        str_value = unicode(datetime_value)[:11]
-        if not datetime_value.microseconds:
-            str_value += u'.000'
+    def apply(self, timings):
+        """
+        :type timings: CaptionTimings
+        :returns: The rows dropped and the rows clipped
+        :rtype: tuple
+        """
+        return [], timings.insert(self.position, self.duration)
+
+
+class _IntervalIndex(object):
+    """Index of the captions of a CaptionTimings by time interval, answering
+    "which captions are visible at/between ..." in O(log n + k).
+
+    It combines a centered interval tree, for the captions visible at a given
+    time, with the start times sorted, for the captions starting within a
+    range. A caption is visible from its start (inclusive) to its end
+    (exclusive).
 
-        if msec_separator is not None:
-            str_value = str_value.replace(u".", msec_separator)
+    The captions of the index are switched to _IndexedCaption, which counts
+    the changes made to their times: the index is outdated as soon as the
+    count changes.
+    """
+    # Number of changes made to the times of the indexed captions
+    times_changes = 0
+
+    def __init__(self, timings):
+        """
+        :type timings: CaptionTimings
+        """
+        self.timings = timings
+        self._times_changes = _IntervalIndex.times_changes
+        for caption in timings.captions:
+            if type(caption) is Caption:
+                caption.__class__ = _IndexedCaption
+        # Positions of the rows in start order, used to sort the results
+        self._rows_by_start = timings.sorted_rows()
+        self._position = dict(
+            (row, position)
+            for position, row in enumerate(self._rows_by_start))
+        self._sorted_starts = _time_column(
+            [timings.starts[row] for row in self._rows_by_start],
+            timings.integral)
+        # Empty captions can't ever be visible
+        self._tree = self._build_tree([
+            row for row in self._rows_by_start
+            if timings.starts[row] < timings.ends[row]
+        ])
+
+    def is_outdated(self):
+        """Returns whether the times of some indexed captions (not
+        necessarily those of this index) changed since the index was built
+        """
+        return self._times_changes != _IntervalIndex.times_changes
+
+    def _build_tree(self, rows):
+        """Builds the centered interval tree node for the given rows (sorted
+        by start). Each node is a tuple of:
+            - the center time
+            - the starts (ascending) and rows of the captions visible at
+            the center time
+            - the ends (descending) and rows of those same captions
+            - the nodes of the captions ending before/starting after the center
+        """
+        if not rows:
+            return None
+        starts = self.timings.starts
+        ends = self.timings.ends
+        center = starts[rows[len(rows) // 2]]
+        before = []
+        after = []
+        visible = []
+        for row in rows:
+            if ends[row] <= center:
+                before.append(row)
+            elif starts[row] > center:
+                after.append(row)
+            else:
+                visible.append(row)
+        by_end = sorted(visible, key=ends.__getitem__, reverse=True)
+        return (
+            center,
+            [starts[row] for row in visible], visible,
+            [ends[row] for row in by_end], by_end,
+            self._build_tree(before), self._build_tree(after)
+        )
+
+    def _sorted(self, rows):
+        return sorted(rows, key=self._position.__getitem__)
+
+    def _rows_at(self, time):
+        rows = []
+        node = self._tree
+        while node is not None:
+            center, starts, by_start, ends, by_end, before, after = node
+            if time < center:
+                for start, row in izip(starts, by_start):
+                    if start > time:
+                        break
+                    rows.append(row)
+                node = before
+            else:
+                for end, row in izip(ends, by_end):
+                    if end <= time:
+                        break
+                    rows.append(row)
+                node = after if time > center else None
+        return rows
+
+    def rows_at(self, time):
+        """Returns the rows of the captions visible at the given time,
+        ordered by start time
+        """
+        return self._sorted(self._rows_at(time))
+
+    def rows_between(self, start, end):
+        """Returns the rows of the captions visible at some point between
+        start (inclusive) and end (exclusive), ordered by start time
+        """
+        starts = self.timings.starts
+        # Those already visible at the start...
+        rows = [row for row in self._rows_at(start) if starts[row] < end]
+        # ... and those starting afterwards
+        ends = self.timings.ends
+        for position in xrange(bisect_right(self._sorted_starts, start),
+                               len(self._sorted_starts)):
+            row = self._rows_by_start[position]
+            if starts[row] >= end:
+                break
+            if ends[row] > start and ends[row] > starts[row]:
+                rows.append(row)
+        return self._sorted(rows)
+
+
+class _IndexedCaption(Caption):
+    """A caption of an interval index, whose time changes are counted (see
+    _IntervalIndex). Only the indexed captions pay for the counting: the
+    others keep the plain attribute assignment.
+    """
+    __slots__ = ()
 
-        return u'0' + str_value
+    def __setattr__(self, name, value):
+        Caption.__setattr__(self, name, value)
+        if name == u'start' or name == u'end':
+            _IntervalIndex.times_changes += 1
+
+    def __reduce_ex__(self, protocol):
+        # Copies and pickles are plain captions, outside of any index
+        return copy_reg.__newobj__, (Caption,), self.__getstate__()
+
+
+# Assignments of the times skipping the counting of _IndexedCaption, for the
+# methods changing all the captions at once (which count a single change)
+_set_start = Caption.start.__set__
+_set_end = Caption.end.__set__
 
 
 class CaptionList(list):
     """ A list of captions with a layout object attached to it """
+
+    # Interval index of the captions, built on demand and dropped when the
+    # captions change (and rebuilt when their times change)
+    _index = None
+
     def __init__(self, iterable=None, layout_info=None):
         """
         :param iterator: An iterator used to populate the caption list
@@ -251,6 +746,151 @@ class CaptionList(list):
         args = [iterable] if iterable else []
         super(CaptionList, self).__init__(*args)
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop(u'_index', None)
+        return state
+
+    def get_timings(self):
+        """Returns the current times of the captions, copied to columns. The
+        captions aren't changed by the changes made to them, unless they're
+        stored (see CaptionTimings.store).
+
+        :rtype: CaptionTimings
+        """
+        return CaptionTimings(self)
+
+    def _get_index(self):
+        if self._index is None or self._index.is_outdated():
+            self._index = _IntervalIndex(self.get_timings())
+        return self._index
+
+    def captions_at(self, time):
+        """Returns the captions visible at the given time (from their start,
+        inclusive, to their end, exclusive), ordered by start time.
+
+        The captions are looked up in an interval index, built the first time
+        it is needed and rebuilt after the captions or their times change.
+
+        :type time: Number
+        :rtype: CaptionList
+        """
+        index = self._get_index()
+        captions = index.timings.captions
+        return CaptionList(
+            [captions[row] for row in index.rows_at(time)],
+            layout_info=self.layout_info)
+
+    def captions_between(self, start, end):
+        """Returns the captions visible at some point between start
+        (inclusive) and end (exclusive), ordered by start time. See
+        captions_at.
+
+        :type start: Number
+        :type end: Number
+        :rtype: CaptionList
+        """
+        index = self._get_index()
+        captions = index.timings.captions
+        return CaptionList(
+            [captions[row] for row in index.rows_between(start, end)],
+            layout_info=self.layout_info)
+
+    def retime(self, offset=0, rate_skew=1.0, edits=()):
+        """Re-times the captions in place. See CaptionSet.retime.
+
+        :returns: The number of captions dropped and the number of captions
+            clipped
+        :rtype: tuple
+        """
+        if offset != 0 or rate_skew != 1:
+            self.shift_and_scale(offset, rate_skew)
+
+        dropped = set()
+        clipped = set()
+        if edits:
+            timings = self.get_timings()
+            # From the last edit to the first one, so that all of their
+            # positions refer to the same timeline
+            for edit in sorted(edits, key=lambda edit: edit.position,
+                               reverse=True):
+                edit_dropped, edit_clipped = edit.apply(timings)
+                dropped.update(edit_dropped)
+                clipped.update(edit_clipped)
+            timings.store()
+
+        dropped.update(
+            row for row, caption in enumerate(self) if caption.start < 0)
+        if dropped:
+            self[:] = [caption for row, caption in enumerate(self)
+                       if row not in dropped]
+        return len(dropped), len(clipped - dropped)
+
+    def shift_and_scale(self, offset=0, rate_skew=1.0):
+        """Applies rate_skew, then offset, to the times of all the captions
+        (like adjust_caption_timing always did, a caption present more than
+        once in the list is moved each time)
+
+        :type offset: Number
+        :type rate_skew: Number
+        """
+        for caption in self:
+            _set_start(caption, caption.start * rate_skew + offset)
+            _set_end(caption, caption.end * rate_skew + offset)
+        _IntervalIndex.times_changes += 1
+
+    def remove_negative_starts(self):
+        """Removes the captions starting before 0
+
+        :returns: The number of captions removed
+        :rtype: int
+        """
+        captions = [caption for caption in self if caption.start >= 0]
+        removed = len(self) - len(captions)
+        if removed:
+            self[:] = captions
+        return removed
+
+    def sort_by_start(self):
+        """Sorts the captions by start time, in place. Captions starting at
+        the same time keep their order.
+        """
+        self.sort(key=lambda caption: caption.start)
+
+    def find_overlaps(self):
+        """Returns the pairs of captions which overlap in time
+
+        :rtype: list
+        """
+        timings = self.get_timings()
+        captions = timings.captions
+        return [(captions[first], captions[second])
+                for first, second in timings.overlapping_rows()]
+
+    # Any change to the content of the list invalidates the interval index
+    def _invalidating(method):
+        def wrapper(self, *args, **kwargs):
+            self._index = None
+            return method(self, *args, **kwargs)
+        wrapper.__name__ = method.__name__
+        wrapper.__doc__ = method.__doc__
+        return wrapper
+
+    append = _invalidating(list.append)
+    extend = _invalidating(list.extend)
+    insert = _invalidating(list.insert)
+    pop = _invalidating(list.pop)
+    remove = _invalidating(list.remove)
+    reverse = _invalidating(list.reverse)
+    sort = _invalidating(list.sort)
+    __setitem__ = _invalidating(list.__setitem__)
+    __delitem__ = _invalidating(list.__delitem__)
+    __setslice__ = _invalidating(list.__setslice__)
+    __delslice__ = _invalidating(list.__delslice__)
+    __iadd__ = _invalidating(list.__iadd__)
+    __imul__ = _invalidating(list.__imul__)
+    del _invalidating
+
     def __getslice__(self, i, j):
         return CaptionList(
             list.__getslice__(self, i, j), layout_info=self.layout_info)
@@ -329,6 +969,31 @@ class CaptionSet(object):
             [len(captions) == 0 for captions in self._captions.values()]
         )
 
+    def copy(self):
+        """Returns a copy-on-write copy of this caption set.
+
+        The copy has its own language mapping, caption lists, style mapping
+        and style rules, so captions can be added, removed or replaced (see
+        Caption.copy_with), and styles modified, without affecting this set.
+        The Caption, CaptionNode and Layout objects themselves are shared,
+        and must not be modified.
+
+        The dicts are copied like deepcopy copies them (see copy_dict), so
+        the writers iterate over them in the same order as over a deep copy.
+
+        :rtype: CaptionSet
+        """
+        captions = {}
+        for lang, caption_list in self._captions.items():
+            captions[lang] = CaptionList(
+                caption_list,
+                layout_info=getattr(caption_list, 'layout_info', None))
+        styles = {}
+        for selector, rules in self._styles.items():
+            styles[selector] = copy_dict(rules)
+        return CaptionSet(
+            captions, styles=styles, layout_info=self.layout_info)
+
     def set_layout_info(self, lang, layout_info):
         self._captions[lang].layout_info = layout_info
 
@@ -345,44 +1010,128 @@ class CaptionSet(object):
 
         e.g. if skew == 1.1, and offset is 5, a caption originally
         displayed from 10-11 seconds would instead be at 16-17.1
+
+        The captions starting before 0 afterwards are removed. See retime.
+        """
+        self.retime(offset, rate_skew)
+
+    def retime(self, offset=0, rate_skew=1.0, edits=()):
+        """Re-times the captions of all the languages in place (keeping the
+        caption lists and their layout_info). The edits work on the timing
+        columns of the lists (see CaptionList.get_timings).
+
+        The rate_skew is applied first, then the offset, then the edits. The
+        positions of the edits refer to the timeline after skew and offset
+        (and before any edit), so they shouldn't overlap. Then, the captions
+        starting before 0 are removed.
+
+        - A CutSegment removes a segment from the timeline. The captions
+        entirely in it are removed, those partially in it are shortened, and
+        those after it are moved back.
+        - An InsertSegment inserts a segment in the timeline. The captions
+        after it are moved forward, and those visible at its position end
+        there.
+
+        e.g. with offset=5s and edits=[CutSegment(20s, 30s)], a caption
+        originally displayed from 10 to 17 seconds would be shortened to
+        15-20s, and one from 30 to 31 seconds would be displayed from 25 to
+        26 seconds.
+
+        :param offset: In microseconds
+        :param rate_skew: The factor by which times are multiplied
+        :param edits: A list of CutSegment and InsertSegment objects
+        :returns: The number of captions dropped and the number of captions
+            clipped, for all the languages
+        :rtype: tuple
         """
+        total_dropped = total_clipped = 0
         for lang in self.get_languages():
             captions = self.get_captions(lang)
-            out_captions = CaptionList()
-            for caption in captions:
-                caption.start = caption.start * rate_skew + offset
-                caption.end = caption.end * rate_skew + offset
-                if caption.start >= 0:
-                    out_captions.append(caption)
-            self.set_captions(lang, out_captions)
+            if not isinstance(captions, CaptionList):
+                captions = CaptionList(captions)
+                self.set_captions(lang, captions)
+            dropped, clipped = captions.retime(offset, rate_skew, edits)
+            total_dropped += dropped
+            total_clipped += clipped
+        return total_dropped, total_clipped
 
 # Functions
-def merge_concurrent_captions(caption_set):
-    """Merge captions that have the same start and end times"""
+def merge_concurrent_captions(caption_set, tolerance=0):
+    """Merge captions that have the same start and end times, wherever they
+    are in the caption list. The merged captions take the place of the first
+    one of them.
+
+    :param tolerance: The captions whose start and end times are both within
+        this many microseconds of those of an earlier caption are merged
+        into it, too (the times of that first caption are kept)
+    """
     for lang in caption_set.get_languages():
         captions = caption_set.get_captions(lang)
-        last_caption = None
-        concurrent_captions = CaptionList()
-        merged_captions = CaptionList()
-        for caption in captions:
-            if last_caption:
-                last_timespan = last_caption.start, last_caption.end
-                current_timespan = caption.start, caption.end
-                if current_timespan == last_timespan:
-                    concurrent_captions.append(caption)
-                    last_caption = caption
-                    continue
-                else:
-                    merged_captions.append(merge(concurrent_captions))
-            concurrent_captions = [caption]
-            last_caption = caption
-
-        if concurrent_captions:
-            merged_captions.append(merge(concurrent_captions))
-        if merged_captions:
-            caption_set.set_captions(lang, merged_captions)
+        if tolerance:
+            groups = _group_near_concurrent_captions(captions, tolerance)
+        else:
+            groups = _group_concurrent_captions(captions)
+        if groups:
+            caption_set.set_captions(lang, CaptionList(
+                [group[0] if len(group) == 1 else merge(group)
+                 for group in groups],
+                layout_info=getattr(captions, 'layout_info', None)))
     return caption_set
 
+
+def _group_concurrent_captions(captions):
+    """
+    :returns: The lists of captions with the same timespan, in the order of
+        their first caption
+    :rtype: list
+    """
+    groups = []
+    groups_by_timespan = {}
+    for caption in captions:
+        timespan = caption.start, caption.end
+        group = groups_by_timespan.get(timespan)
+        if group is None:
+            group = groups_by_timespan[timespan] = []
+            groups.append(group)
+        group.append(caption)
+    return groups
+
+
+def _group_near_concurrent_captions(captions, tolerance):
+    """Same as _group_concurrent_captions, but the timespans only need to be
+    within the tolerance of that of the first caption of the group. A caption
+    within the tolerance of several groups joins the one created first.
+
+    The groups are hashed by their timespan divided into buckets as wide as
+    the tolerance, so only the neighbouring buckets need to be looked at.
+    """
+    groups = []
+    # The indexes (in groups) of the groups of each bucket, ascending
+    indexes_by_bucket = {}
+    for caption in captions:
+        start, end = caption.start, caption.end
+        start_bucket = start // tolerance
+        end_bucket = end // tolerance
+        group_index = None
+        for bucket in ((start_bucket + i, end_bucket + j)
+                       for i in (0, -1, 1) for j in (0, -1, 1)):
+            for index in indexes_by_bucket.get(bucket, ()):
+                if group_index is not None and index > group_index:
+                    break
+                first = groups[index][0]
+                if (abs(first.start - start) <= tolerance and
+                        abs(first.end - end) <= tolerance):
+                    group_index = index
+                    break
+        if group_index is None:
+            group_index = len(groups)
+            groups.append([])
+            indexes_by_bucket.setdefault(
+                (start_bucket, end_bucket), []).append(group_index)
+        groups[group_index].append(caption)
+    return groups
+
+
 def merge(captions):
     """
     Merge list of captions into one caption. The start/end times from the first
@@ -392,8 +1141,7 @@ def merge(captions):
     for caption in captions:
         if new_nodes:
             new_nodes.append(CaptionNode.create_break())
-        for node in caption.nodes:
-            new_nodes.append(node)
+        new_nodes.extend(caption.nodes)
     caption = Caption(
         captions[0].start, captions[0].end, new_nodes, captions[0].style)
     return caption
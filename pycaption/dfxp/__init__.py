@@ -2,3 +2,4 @@ from __future__ import absolute_import
 
 from .base import *
 from .extras import SinglePositioningDFXPWriter, LegacyDFXPWriter
+from .lxml_parser import LxmlDFXPReader
@@ -1,7 +1,5 @@
 import re
 
-from copy import deepcopy
-
 from bs4 import BeautifulSoup, NavigableString
 from xml.sax.saxutils import escape
 
@@ -12,7 +10,8 @@ from ..exceptions import (
     CaptionReadNoCaptions, CaptionReadSyntaxError, InvalidInputError)
 from ..geometry import (
     Point, Stretch, UnitEnum, Padding, VerticalAlignmentEnum,
-    HorizontalAlignmentEnum, Alignment, Layout)
+    HorizontalAlignmentEnum, Alignment, Layout, intern_layout)
+from ..timestamps import parse_dfxp_time
 from ..utils import is_leaf
 
 __all__ = [
@@ -42,6 +41,13 @@ DFXP_DEFAULT_REGION = Layout(
         HorizontalAlignmentEnum.CENTER, VerticalAlignmentEnum.BOTTOM)
 )
 
+# The attributes the layout of an element can depend on, on the element
+# itself and on its ancestors (lowercased, like _get_object_from_attribute
+# looks them up)
+LAYOUT_ATTRIBUTES = (
+    u'tts:origin', u'tts:extent', u'tts:padding', u'tts:textalign',
+    u'tts:displayalign', u'style')
+
 DFXP_DEFAULT_STYLE_ID = u'default'
 DFXP_DEFAULT_REGION_ID = u'bottom'
 
@@ -124,37 +130,7 @@ class DFXPReader(BaseReader):
         return start, end
 
     def _translate_time(self, stamp):
-        if stamp[-1].isdigit():
-            timesplit = stamp.split(u':')
-            if u'.' not in timesplit[2]:
-                timesplit[2] = timesplit[2] + u'.000'
-            secsplit = timesplit[2].split(u'.')
-            if len(timesplit) > 3:
-                secsplit.append((int(timesplit[3]) / 30) * 100)
-            while len(secsplit[1]) < 3:
-                secsplit[1] += u'0'
-            microseconds = (int(timesplit[0]) * 3600000000 +
-                            int(timesplit[1]) * 60000000 +
-                            int(secsplit[0]) * 1000000 +
-                            int(secsplit[1]) * 1000)
-            return microseconds
-        else:
-            # Must be offset-time
-            m = re.search('^([0-9.]+)([a-z]+)$', stamp)
-            value = float(m.group(1))
-            metric = m.group(2)
-            if metric == u"h":
-                microseconds = value * 60 * 60 * 1000000
-            elif metric == u"m":
-                microseconds = value * 60 * 1000000
-            elif metric == u"s":
-                microseconds = value * 1000000
-            elif metric == u"ms":
-                microseconds = value * 1000
-            else:
-                raise InvalidInputError(u"Unsupported offset-time metric " + metric)
-
-            return int(microseconds)
+        return parse_dfxp_time(stamp)
 
     def _translate_tag(self, tag):
         # convert text
@@ -195,8 +171,6 @@ class DFXPReader(BaseReader):
         if args != u'':
             node = CaptionNode.create_style(
                 True, args, layout_info=tag.layout_info)
-            node.start = True
-            node.content = args
             self.nodes.append(node)
 
             # recursively call function for any children elements
@@ -204,8 +178,6 @@ class DFXPReader(BaseReader):
                 self._translate_tag(a)
             node = CaptionNode.create_style(
                 False, args, layout_info=tag.layout_info)
-            node.start = False
-            node.content = args
             self.nodes.append(node)
         else:
             for a in tag.contents:
@@ -253,9 +225,6 @@ class DFXPWriter(BaseWriter):
     def __init__(self, *args, **kwargs):
         self.write_inline_positioning = kwargs.pop(
             u'write_inline_positioning', False)
-        self.p_style = False
-        self.open_span = False
-        self.region_creator = None
         super(DFXPWriter, self).__init__(*args, **kwargs)
 
     def write(self, caption_set, force=u''):
@@ -266,24 +235,33 @@ class DFXPWriter(BaseWriter):
 
         :rtype: unicode
         """
+        return u''.join(self.write_iter(caption_set, force))
+
+    def write_iter(self, caption_set, force=u''):
+        """Writes the caption set one caption at a time.
+
+        Only the <head> of the document is built with BeautifulSoup (by the
+        RegionCreator and _recreate_styling_tag). The captions are written
+        directly as text, laid out like BeautifulSoup's prettify() does.
+
+        :type caption_set: pycaption.base.CaptionSet
+        :param force: only use this language, if available in the caption_set
+        :rtype: generator
+        :returns: The chunks of the output (joined, they give the same as
+            write())
+        """
         dfxp = BeautifulSoup(DFXP_BASE_MARKUP, u'xml')
-        dfxp.find(u'tt')[u'xml:lang'] = u"en"
+        tt = dfxp.find(u'tt')
+        tt[u'xml:lang'] = u"en"
 
         langs = caption_set.get_languages()
         if force in langs:
             langs = [force]
 
-        caption_set = deepcopy(caption_set)
-
-        # Loop through all captions/nodes and apply transformations to layout
-        # in function of the provided or default settings
-        for lang in langs:
-            for caption in caption_set.get_captions(lang):
-                caption.layout_info = self._relativize_and_fit_to_screen(
-                    caption.layout_info)
-                for node in caption.nodes:
-                    node.layout_info = self._relativize_and_fit_to_screen(
-                        node.layout_info)
+        # Apply transformations to the layout of all captions/nodes in function
+        # of the provided or default settings. The original caption set is
+        # left untouched.
+        caption_set = self._relativize_captions(caption_set, langs)
 
         # Create the styles in the <styling> section, or a default style.
         for style_id, style in caption_set.get_styles():
@@ -293,59 +271,134 @@ class DFXPWriter(BaseWriter):
             dfxp = self._recreate_styling_tag(
                 DFXP_DEFAULT_STYLE_ID, DFXP_DEFAULT_STYLE, dfxp)
 
-        self.region_creator = self._get_region_creator_class()(dfxp, caption_set)
-        self.region_creator.create_document_regions()
-
-        body = dfxp.find(u'body')
+        region_creator = self._get_region_creator_class()(dfxp, caption_set)
+        region_creator.create_document_regions()
+        # The state of the document is kept by this call, so that the
+        # generators of several documents can be used at the same time
+        context = _DFXPWriterContext(dfxp, region_creator)
+        # The unused regions are removed from the <head>, which is written
+        # before the captions, so the regions are assigned beforehand.
+        self._assign_regions(context, caption_set, langs)
+        region_creator.cleanup_regions()
+
+        yield u'<?xml version="1.0" encoding="utf-8"?>\n'
+        yield u'<tt%s>\n' % _format_attributes(tt.attrs)
+        yield dfxp.find(u'head').decode(2, formatter=None).rstrip() + u'\n'
+
+        if not langs:
+            yield u' <body/>\n</tt>'
+            return
 
+        yield u' <body>\n'
         for lang in langs:
-            div = dfxp.new_tag(u'div')
-            div[u'xml:lang'] = unicode(lang)
-            self._assign_positioning_data(div, lang, caption_set)
-
-            for caption in caption_set.get_captions(lang):
-                if caption.style:
-                    caption_style = caption.style
-                else:
-                    caption_style = {u'class': DFXP_DEFAULT_STYLE_ID}
+            div_attributes = {u'xml:lang': unicode(lang)}
+            div_attributes.update(
+                self._get_positioning_attributes(context, lang, caption_set))
+            captions = caption_set.get_captions(lang)
+            if not captions:
+                yield u'  <div%s/>\n' % _format_attributes(div_attributes)
+                continue
+
+            yield u'  <div%s>\n' % _format_attributes(div_attributes)
+            for caption in captions:
+                yield self._write_caption(context, caption, caption_set, lang)
+            yield u'  </div>\n'
+        yield u' </body>\n</tt>'
+
+    def write_to(self, caption_set, fileobj, force=u''):
+        """Writes the caption set to a file object (or anything with a write
+        method taking unicode strings), one caption at a time.
+        """
+        for chunk in self.write_iter(caption_set, force):
+            fileobj.write(chunk)
 
-                p = self._recreate_p_tag(
-                    caption, caption_style, dfxp, caption_set, lang)
-                self._assign_positioning_data(p, lang, caption_set, caption)
-                div.append(p)
+    def _assign_regions(self, context, caption_set, langs):
+        """Assigns the regions of the <div>, <p> and <span> elements which
+        will be written, like _write_caption does
 
-            body.append(div)
-        self.region_creator.cleanup_regions()
-        caption_content = dfxp.prettify(formatter=None)
-        return caption_content
+        :type context: _DFXPWriterContext
+        """
+        get_positioning_info = context.region_creator.get_positioning_info
+        for lang in langs:
+            get_positioning_info(lang, caption_set)
+            for caption in caption_set.get_captions(lang):
+                get_positioning_info(lang, caption_set, caption)
+                for node in caption.nodes:
+                    if (node.type_ == CaptionNode.STYLE and node.start and
+                            node.layout_info):
+                        get_positioning_info(lang, caption_set, caption, node)
 
-    @staticmethod
-    def _get_region_creator_class():
-        """Hook method for providing a custom RegionCreator
+    def _write_caption(self, context, caption, caption_set, lang):
         """
-        return RegionCreator
+        :type context: _DFXPWriterContext
+        :rtype: unicode
+        :returns: the <p> tag of the caption
+        """
+        if caption.style:
+            caption_style = caption.style
+        else:
+            caption_style = {u'class': DFXP_DEFAULT_STYLE_ID}
 
-    def _assign_positioning_data(self, tag, lang, caption_set=None,
-                                 caption=None, caption_node=None):
-        """Modifies the current tag, assigning it the 'region' attribute.
+        attributes = self._get_p_attributes(context, caption, caption_style)
+        attributes.update(self._get_positioning_attributes(
+            context, lang, caption_set, caption))
+        # Like prettify() does, the text is stripped, and on its own line
+        text = self._recreate_text(
+            context, caption, caption_set, lang).strip()
+        if text:
+            text = u'    %s\n' % text
 
-        :param tag: the BeautifulSoup tag to be modified
+        return u'   <p%s>\n%s   </p>\n' % (
+            _format_attributes(attributes), text)
+
+    def _get_p_attributes(self, context, caption, caption_style):
+        """
+        :type context: _DFXPWriterContext
+        :rtype: dict
+        :returns: the attributes of the <p> tag of the caption, except the
+            positioning ones
+        """
+        attributes = {
+            u'begin': caption.format_start(),
+            u'end': caption.format_end(),
+        }
+        if context.p_style:
+            attributes[u'style'] = u'p'
+        attributes.update(
+            _recreate_style(caption_style, context.dfxp, context.style_ids))
+        return attributes
+
+    def _get_positioning_attributes(self, context, lang, caption_set=None,
+                                    caption=None, caption_node=None):
+        """Returns the 'region' attribute of an element (and the inline
+        positioning attributes, if they're written)
+
+        :type context: _DFXPWriterContext
         :type lang: unicode
         :param lang: the caption language
         :type caption_set: CaptionSet
         :param caption_set: The CaptionSet parent
         :type caption: Caption
         :type caption_node: CaptionNode
+        :rtype: dict
         """
-        assigned_id, attribs = self.region_creator.get_positioning_info(
+        assigned_id, attribs = context.region_creator.get_positioning_info(
             lang, caption_set, caption, caption_node)
 
+        attributes = {}
         if assigned_id:
-            tag[u'region'] = assigned_id
+            attributes[u'region'] = assigned_id
 
             # Write non-standard positioning information
             if self.write_inline_positioning:
-                tag.attrs.update(attribs)
+                attributes.update(attribs)
+        return attributes
+
+    @staticmethod
+    def _get_region_creator_class():
+        """Hook method for providing a custom RegionCreator
+        """
+        return RegionCreator
 
     def _recreate_styling_tag(self, style, content, dfxp):
         # TODO - should be drastically simplified: if attributes : append
@@ -362,21 +415,10 @@ class DFXPWriter(BaseWriter):
 
         return dfxp
 
-    def _recreate_p_tag(self, caption, caption_style, dfxp, caption_set=None,
-                        lang=None):
-        start = caption.format_start()
-        end = caption.format_end()
-        p = dfxp.new_tag(u"p", begin=start, end=end)
-        p.string = self._recreate_text(caption, dfxp, caption_set, lang)
-
-        if dfxp.find(u"style", {u"xml:id": u"p"}):
-            p[u'style'] = u'p'
-
-        p.attrs.update(_recreate_style(caption_style, dfxp))
-
-        return p
-
-    def _recreate_text(self, caption, dfxp, caption_set=None, lang=None):
+    def _recreate_text(self, context, caption, caption_set=None, lang=None):
+        """
+        :type context: _DFXPWriterContext
+        """
         line = u''
 
         for node in caption.nodes:
@@ -388,12 +430,12 @@ class DFXPWriter(BaseWriter):
 
             elif node.type_ == CaptionNode.STYLE:
                 line = self._recreate_span(
-                    line, node, dfxp, caption_set, caption, lang)
+                    context, line, node, caption_set, caption, lang)
 
         return line.rstrip()
 
-    def _recreate_span(self, line, node, dfxp, caption_set=None, caption=None,
-                       lang=None):
+    def _recreate_span(self, context, line, node, caption_set=None,
+                       caption=None, lang=None):
         # TODO - This method seriously has to go away!
         # Because of the CaptionNode.STYLE nodes, tree-like structures are
         # are really hard to build, and proper xml elements can't be added.
@@ -402,12 +444,13 @@ class DFXPWriter(BaseWriter):
         if node.start:
             styles = u''
 
-            content_with_style = _recreate_style(node.content, dfxp)
+            content_with_style = _recreate_style(
+                node.content, context.dfxp, context.style_ids)
             for style, value in content_with_style.items():
                 styles += u' %s="%s"' % (style, value)
             if node.layout_info:
                 region_id, region_attribs = (
-                    self.region_creator.get_positioning_info(
+                    context.region_creator.get_positioning_info(
                         lang, caption_set, caption, node
                     ))
                 styles += u' region="{region_id}"'.format(
@@ -421,14 +464,14 @@ class DFXPWriter(BaseWriter):
                     )
 
             if styles:
-                if self.open_span:
+                if context.open_span:
                     line = line.rstrip() + u'</span> '
                 line += u'<span%s>' % styles
-                self.open_span = True
+                context.open_span = True
 
-        elif self.open_span:
+        elif context.open_span:
             line = line.rstrip() + u'</span> '
-            self.open_span = False
+            context.open_span = False
 
         return line
 
@@ -443,9 +486,29 @@ class DFXPWriter(BaseWriter):
         return escape(s)
 
 
-class LayoutAwareDFXPParser(BeautifulSoup):
-    """This makes the xml instance capable of providing layout information
-    for every one of its nodes (it adds a 'layout_info' attribute on each node)
+class _DFXPWriterContext(object):
+    """The state of a document being written by DFXPWriter.write_iter
+    """
+    def __init__(self, dfxp, region_creator):
+        """
+        :param dfxp: The BeautifulSoup document, with the <style> tags
+        :type region_creator: RegionCreator
+        """
+        self.dfxp = dfxp
+        self.region_creator = region_creator
+        # The ids of the <style> tags of the document
+        self.style_ids = frozenset(
+            style.get(u'xml:id') for style in dfxp.find_all(u'style'))
+        self.p_style = u'p' in self.style_ids
+        # Whether the text written last left a <span> open
+        self.open_span = False
+
+
+class DFXPLayoutMixin(object):
+    """Adds a 'layout_info' attribute on every node of the divs of a DFXP
+    document. Mixed into documents with the BeautifulSoup API (find, find_all,
+    parent, contents, get, etc.), which have a `read_invalid_positioning`
+    attribute.
 
     It parses the element tree in pre-order-like fashion as dictated by the
     dfxp specs here:
@@ -460,46 +523,25 @@ class LayoutAwareDFXPParser(BeautifulSoup):
     # to save memory
     NO_POSITIONING_INFO = None
 
-    def __init__(self, markup=u"", features=u"html.parser", builder=None,
-                 parse_only=None, from_encoding=None,
-                 read_invalid_positioning=False, **kwargs):
-        """The `features` param determines the parser to be used. The parsers
-        are usually html parsers, some more forgiving than others, and as such
-        they do stuff very differently especially for xml files. We chose this
-        one because even though the docs say it's slower, it's very forgiving
-        (it allows unescaped `<` characters, for example). It doesn't support
-        the `&apos;` entity, however, since it respects the HTML4 and not HTML5
-        syntax. Since this is valid XML 1.0, as a workaround we have to manually
-        replace the every occurance of this entity in the string before using
-        the parser.
+    read_invalid_positioning = False
 
-        The reason why we haven't used the 'xml' parser is that it destroys
-        characters such as < or & (even the escaped ones).
+    # The DFXPDocumentIndex of the document, built by _add_layout_info
+    document_index = None
 
-        The 'lxml' parser seems to respect the html specification the best, but
-        it's not as forgiving as 'html.parser' and fails when there are
-        unescaped `<` characters in the input, for example.
-
-        An alternative would be using html5lib, but that (1) is an external
-        dependency and (2) BeautifulSoup says it's the slowest option.
-
-        :type read_invalid_positioning: bool
-        :param read_invalid_positioning: if True, will try to also look for
-            layout info on every element itself (even if the docs explicitly
-            call for ignoring attributes, when incorrectly placed)
+    # Most elements share a handful of region/style combinations, so their
+    # layouts are resolved once per combination. These count the elements
+    # whose layout was found in the cache, or had to be resolved.
+    layout_cache_hits = 0
+    layout_cache_misses = 0
 
-
-        Check out the docs below for explanation.
-        http://www.crummy.com/software/BeautifulSoup/bs4/doc/#installing-a-parser
-        """
-
-        # Work around for lack of '&apos;' support in html.parser
-        markup = markup.replace(u"&apos;", "'")
-
-        super(LayoutAwareDFXPParser, self).__init__(
-            markup, features, builder, parse_only, from_encoding, **kwargs)
-
-        self.read_invalid_positioning = read_invalid_positioning
+    def _add_layout_info(self):
+        self.document_index = DFXPDocumentIndex(self)
+        # The layouts by the signature of the elements
+        self._layout_cache = {}
+        # By id() of the tags, see _get_lineage_signature
+        self._lineage_signatures = {}
+        self.layout_cache_hits = 0
+        self.layout_cache_misses = 0
 
         for div in self.find_all(u'div'):
             self._pre_order_visit(div)
@@ -520,9 +562,6 @@ class LayoutAwareDFXPParser(BeautifulSoup):
             element.layout_info = inherit_from
         else:
             region_id = self._determine_region_id(element)
-            # TODO - this looks highly cachable. If it turns out too much
-            # memory is being taken up by the caption set, cache this with a
-            # WeakValueDict
             layout_info = (
                 self._extract_positioning_information(region_id, element))
             element.layout_info = layout_info
@@ -603,15 +642,79 @@ class LayoutAwareDFXPParser(BeautifulSoup):
         :type region_id: unicode
         :param element: BeautifulSoup Tag or NavigableString; this only comes
             into action (at the moment) if the
+        :rtype: Layout
+        """
+        signature = self._get_layout_signature(region_id, element)
+        try:
+            layout_info = self._layout_cache[signature]
+        except KeyError:
+            self.layout_cache_misses += 1
+        else:
+            self.layout_cache_hits += 1
+            return layout_info
+
+        layout_info = self._resolve_positioning_information(region_id, element)
+        if layout_info is not self.NO_POSITIONING_INFO:
+            # Equal layouts are shared
+            layout_info = intern_layout(layout_info)
+        self._layout_cache[signature] = layout_info
+        return layout_info
+
+    def _get_layout_signature(self, region_id, element):
+        """Returns what the layout of the element depends on: its region,
+        and the positioning attributes and the styles of the element and its
+        ancestors, if the element is looked at (see
+        LayoutInfoScraper.scrape_positioning_info).
+
+        :rtype: tuple
+        """
+        is_text_align_source = (
+            getattr(element, u'name', None) in (u'span', u'p'))
+        if not (is_text_align_source or self.read_invalid_positioning):
+            return region_id, False, ()
+
+        return (
+            region_id, is_text_align_source,
+            self._get_lineage_signature(element))
+
+    def _get_lineage_signature(self, tag):
+        """Returns the positioning attributes and the nested styles of the
+        tag, followed by the signature of its parent
+
+        :rtype: tuple
+        """
+        if tag is None:
+            return ()
+        key = id(tag)
+        signature = self._lineage_signatures.get(key)
+        if signature is None:
+            attrs = getattr(tag, u'attrs', None) or {}
+            signature = tuple(map(attrs.get, LAYOUT_ATTRIBUTES))
+            # Nested <style> tags, which LayoutInfoScraper ignores on these
+            if getattr(tag, u'name', None) not in (
+                    None, u'div', u'body', u'tt'):
+                signature += tuple(
+                    tuple(sorted(child.attrs.items()))
+                    for child in tag.contents
+                    if getattr(child, u'name', None) == u'style')
+            signature = (
+                signature, self._get_lineage_signature(tag.parent))
+            self._lineage_signatures[key] = signature
+        return signature
+
+    def _resolve_positioning_information(self, region_id, element):
+        """Computes the Layout returned by _extract_positioning_information,
+        with the LayoutInfoScraper
+
         :rtype: Layout
         """
         region_tag = None
 
         if region_id is not None:
-            region_tag = self.find(u'region', {u'xml:id': region_id})
+            region_tag = self.document_index.find_region(region_id)
 
-        region_scraper = (
-            self._get_layout_info_scraper_class()(self, region_tag))
+        region_scraper = self._get_layout_info_scraper_class()(
+            self, region_tag, index=self.document_index)
 
         layout_info = region_scraper.scrape_positioning_info(
             element, self.read_invalid_positioning
@@ -637,27 +740,130 @@ class LayoutAwareDFXPParser(BeautifulSoup):
         return Layout
 
 
+
+class LayoutAwareDFXPParser(DFXPLayoutMixin, BeautifulSoup):
+    """This makes the xml instance capable of providing layout information
+    for every one of its nodes (it adds a 'layout_info' attribute on each node)
+
+    See DFXPLayoutMixin.
+    """
+    def __init__(self, markup=u"", features=u"html.parser", builder=None,
+                 parse_only=None, from_encoding=None,
+                 read_invalid_positioning=False, **kwargs):
+        """The `features` param determines the parser to be used. The parsers
+        are usually html parsers, some more forgiving than others, and as such
+        they do stuff very differently especially for xml files. We chose this
+        one because even though the docs say it's slower, it's very forgiving
+        (it allows unescaped `<` characters, for example). It doesn't support
+        the `&apos;` entity, however, since it respects the HTML4 and not HTML5
+        syntax. Since this is valid XML 1.0, as a workaround we have to manually
+        replace the every occurance of this entity in the string before using
+        the parser.
+
+        The reason why we haven't used the 'xml' parser is that it destroys
+        characters such as < or & (even the escaped ones).
+
+        The 'lxml' parser seems to respect the html specification the best, but
+        it's not as forgiving as 'html.parser' and fails when there are
+        unescaped `<` characters in the input, for example.
+
+        An alternative would be using html5lib, but that (1) is an external
+        dependency and (2) BeautifulSoup says it's the slowest option.
+
+        :type read_invalid_positioning: bool
+        :param read_invalid_positioning: if True, will try to also look for
+            layout info on every element itself (even if the docs explicitly
+            call for ignoring attributes, when incorrectly placed)
+
+
+        Check out the docs below for explanation.
+        http://www.crummy.com/software/BeautifulSoup/bs4/doc/#installing-a-parser
+        """
+
+        # Work around for lack of '&apos;' support in html.parser
+        markup = markup.replace(u"&apos;", "'")
+
+        super(LayoutAwareDFXPParser, self).__init__(
+            markup, features, builder, parse_only, from_encoding, **kwargs)
+
+        self.read_invalid_positioning = read_invalid_positioning
+
+        self._add_layout_info()
+
+
+class DFXPDocumentIndex(object):
+    """The tags of a DFXP document the layout of every element is looked up
+    in, found once per document instead of searching the whole tree for
+    every element: the root <tt> element, the <styling> section, the regions
+    and the styles by id.
+
+    It also keeps the style reference chains and the style sources computed
+    by LayoutInfoScraper, which are the same for all the elements.
+    """
+    def __init__(self, document):
+        """
+        :param document: the BeautifulSoup document instance
+        """
+        self.root = document.find(u'tt')
+        self.styling_section = document.findChild(u'styling')
+
+        # The first region with a given id, like document.find(...) returns
+        self.regions = {}
+        for region in document.find_all(u'region'):
+            self.regions.setdefault(region.get(u'xml:id'), region)
+
+        # All the styles of the styling section with a given id
+        self.styles = {}
+        if self.styling_section:
+            for style in self.styling_section.find_all(u'style'):
+                self.styles.setdefault(style.get(u'xml:id'), []).append(style)
+
+        # By id() of the style or element tag
+        self.style_reference_chains = {}
+        self.style_sources = {}
+
+    def find_region(self, region_id):
+        """
+        :type region_id: unicode
+        :return: the region tag with the given id, or None
+        """
+        return self.regions.get(region_id)
+
+    def find_styles(self, style_id):
+        """
+        :type style_id: unicode
+        :return: the list of the style tags with the given id, in the
+            styling section
+        """
+        return self.styles.get(style_id, [])
+
+
 class LayoutInfoScraper(object):
     """Encapsulates the methods for determining the layout information about
     an element (with the element's region playing an important role).
     """
-    def __init__(self, document, region=None):
+    def __init__(self, document, region=None, index=None):
         """
         :param document: the BeautifulSoup document instance, of which `region`
             is a descendant
         :param region: the region tag
+        :type index: DFXPDocumentIndex
+        :param index: the index of the document, shared by the scrapers of
+            all its elements. If not given, a new one is built.
         """
+        if index is None:
+            index = DFXPDocumentIndex(document)
+        self.index = index
         self.region = region
-        self._styling_section = document.findChild(u'styling')
+        self._styling_section = index.styling_section
         if region:
             self.region_styles = self._get_style_sources(
                 self._styling_section, region)
         else:
             self.region_styles = []
-        self.root_element = document.find(u'tt')
+        self.root_element = index.root
 
-    @classmethod
-    def _get_style_sources(cls, styling_section, element):
+    def _get_style_sources(self, styling_section, element):
         """Returns a list, containing  tags, in the order they should be
         evaluated, for determining layout information.
 
@@ -680,6 +886,10 @@ class LayoutInfoScraper(object):
         if not hasattr(element, u'findAll'):
             return ()
 
+        sources = self.index.style_sources.get(id(element))
+        if sources is not None:
+            return sources
+
         nested_styles = []
 
         # <div> tags have a huge number of children, with highly unlikely
@@ -692,25 +902,25 @@ class LayoutInfoScraper(object):
             for style in element.contents:
                 if getattr(style, u'name', None) == u'style':
                     nested_styles.extend(
-                        cls._get_style_reference_chain(style, styling_section)
+                        self._get_style_reference_chain(
+                            style, styling_section)
                     )
 
         referenced_style_id = element.get(u'style')
 
         referenced_styles = []
         if referenced_style_id and styling_section:
-            referenced_style = styling_section.findChild(
-                u'style', {u'xml:id': referenced_style_id}
-            )
+            found_styles = self.index.find_styles(referenced_style_id)
 
-            referenced_styles = (
-                cls._get_style_reference_chain(
-                    referenced_style, styling_section)
-            )
-        return nested_styles + referenced_styles
+            if found_styles:
+                referenced_styles = self._get_style_reference_chain(
+                    found_styles[0], styling_section)
 
-    @classmethod
-    def _get_style_reference_chain(cls, style, styling_tag):
+        sources = nested_styles + referenced_styles
+        self.index.style_sources[id(element)] = sources
+        return sources
+
+    def _get_style_reference_chain(self, style, styling_tag):
         """If style s1 references s2, and s3 -> s4 -> s5 -> ... -> sn,
         if called with s1, this returns [s1, s2, ... sn] (supposing all the
         styles are defined in the styling section, or stops at the last found
@@ -728,15 +938,17 @@ class LayoutInfoScraper(object):
         if not styling_tag:
             return result
 
+        chain = self.index.style_reference_chains.get(id(style))
+        if chain is not None:
+            return chain
+
         reference = style.get(u'style')
 
         if reference:
-            referenced_styles = styling_tag.findChildren(
-                u'style', {u'xml:id': reference}
-            )
+            referenced_styles = self.index.find_styles(reference)
 
             if len(referenced_styles) == 1:
-                return result + cls._get_style_reference_chain(
+                result = result + self._get_style_reference_chain(
                     referenced_styles[0], styling_tag
                 )
             elif len(referenced_styles) > 1:
@@ -746,6 +958,7 @@ class LayoutInfoScraper(object):
                     .format(id=reference)
                 )
 
+        self.index.style_reference_chains[id(style)] = result
         return result
 
     def scrape_positioning_info(self, element=None, even_invalid=False):
@@ -1104,11 +1317,42 @@ class RegionCreator(object):
                 region.extract()
 
 
-def _recreate_style(content, dfxp):
+def _format_attributes(attributes):
+    """Formats the attributes of a tag like BeautifulSoup does (sorted by
+    name, and quoted with single quotes if the value has double quotes), but
+    with their values escaped
+
+    :type attributes: dict
+    :rtype: unicode
+    """
+    formatted = []
+    for name, value in sorted(attributes.items()):
+        value = escape(unicode(value))
+        if u'"' not in value:
+            formatted.append(u' %s="%s"' % (name, value))
+        elif u"'" not in value:
+            formatted.append(u" %s='%s'" % (name, value))
+        else:
+            formatted.append(
+                u' %s="%s"' % (name, value.replace(u'"', u'&quot;')))
+    return u''.join(formatted)
+
+
+def _recreate_style(content, dfxp, style_ids=None):
+    """
+    :type content: dict
+    :param content: The style of a caption or a node
+    :param style_ids: The ids of the <style> tags of the document, if known,
+        so that they don't have to be searched for in `dfxp`
+    :rtype: dict
+    """
     dfxp_style = {}
 
     if u'class' in content:
-        if dfxp.find(u"style", {u"xml:id": content[u'class']}):
+        if style_ids is not None:
+            if content[u'class'] in style_ids:
+                dfxp_style[u'style'] = content[u'class']
+        elif dfxp.find(u"style", {u"xml:id": content[u'class']}):
             dfxp_style[u'style'] = content[u'class']
     if u'text-align' in content:
         dfxp_style[u'tts:textAlign'] = content[u'text-align']
@@ -1,10 +1,9 @@
-# We thought about making pycaption.base objects immutable. This would be nice
-# in a lot of cases, but since the transformations on them could be quite
-# complex, the deepcopy method is good enough sometimes.
-from copy import deepcopy
-
+# The writers in here transform the caption set before writing it. They work on
+# copy-on-write versions of it (see CaptionSet.copy), so that the original
+# caption set can still be used by other writers afterwards.
 from .base import DFXPWriter, DFXP_DEFAULT_REGION
-from ..base import BaseWriter, CaptionNode, merge_concurrent_captions
+from ..base import (
+    BaseWriter, CaptionNode, copy_dict, merge_concurrent_captions)
 
 from xml.sax.saxutils import escape
 from bs4 import BeautifulSoup
@@ -65,23 +64,22 @@ class SinglePositioningDFXPWriter(DFXPWriter):
         """
         # If SinglePositioningDFXPWriter would modify the state of the caption
         # set, any writer using the same caption_set thereafter would be
-        # affected. At the moment we know we don't use any other writers, but
-        # this is important and mustn't be neglected
-        caption_set = deepcopy(caption_set)
-        caption_set = merge_concurrent_captions(caption_set)
+        # affected. So the changes are only made to a copy-on-write version
+        # of it, replacing the captions and nodes instead of modifying them.
+        caption_set = merge_concurrent_captions(caption_set.copy())
         caption_set.layout_info = positioning
 
         for lang in caption_set.get_languages():
             caption_set.set_layout_info(lang, positioning)
 
             caption_list = caption_set.get_captions(lang)
-            for caption in caption_list:
-                caption.layout_info = positioning
-
-                for node in caption.nodes:
-                    if hasattr(node, 'layout_info'):
-                        node.layout_info = positioning
+            for index, caption in enumerate(caption_list):
+                nodes = [node.copy_with(layout_info=positioning)
+                         for node in caption.nodes]
+                caption_list[index] = caption.copy_with(
+                    layout_info=positioning, nodes=nodes)
 
+        # The styles belong to the copy of the caption set
         for _, style in caption_set.get_styles():
             if 'text-align' in style:
                 style.pop('text-align')
@@ -95,8 +93,7 @@ class LegacyDFXPWriter(BaseWriter):
         self.open_span = False
 
     def write(self, caption_set, force=u''):
-        caption_set = deepcopy(caption_set)
-        caption_set = merge_concurrent_captions(caption_set)
+        caption_set = merge_concurrent_captions(caption_set.copy())
 
         dfxp = BeautifulSoup(LEGACY_DFXP_BASE_MARKUP, u'xml')
         dfxp.find(u'tt')[u'xml:lang'] = u"en"
@@ -126,7 +123,7 @@ class LegacyDFXPWriter(BaseWriter):
 
             for caption in caption_set.get_captions(lang):
                 if caption.style:
-                    caption_style = caption.style
+                    caption_style = copy_dict(caption.style)
                     caption_style.update({u'region': LEGACY_DFXP_DEFAULT_REGION_ID})
                 else:
                     caption_style = {u'class': LEGACY_DFXP_DEFAULT_STYLE_ID,
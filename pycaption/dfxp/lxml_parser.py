@@ -0,0 +1,277 @@
+"""
+A DFXP reading engine built on lxml.etree instead of BeautifulSoup's
+html.parser, which is a lot slower on big documents.
+
+The lxml tree is wrapped in LxmlTag objects, which provide the small part of
+the BeautifulSoup API the reader and the layout code use (find_all, find,
+get, attrs, parent, contents...), with the names html.parser would have given
+to the tags and attributes (lowercased and prefixed, e.g. u'tts:textalign').
+The texts are BeautifulSoup NavigableStrings, so the same CaptionSet comes
+out of both engines.
+"""
+from bisect import bisect_left, bisect_right
+from htmlentitydefs import name2codepoint
+import re
+
+from bs4 import NavigableString
+from bs4.element import Comment, ProcessingInstruction
+from lxml import etree
+
+from .base import DFXPReader, DFXPLayoutMixin
+from ..exceptions import CaptionReadSyntaxError
+
+__all__ = ['LxmlDFXPParser', 'LxmlDFXPReader']
+
+XML_NAMESPACE = u'http://www.w3.org/XML/1998/namespace'
+ASCII_SPACES = u'\x20\x0a\x09\x0c\x0d'
+
+# XML turns '\r\n' into '\n' in texts, unlike html.parser. The '\r' followed
+# by a text (up to the next tag) are kept by escaping them.
+CARRIAGE_RETURN_IN_TEXT = re.compile(u'\r(?=[^<>]*<)')
+# A '&' not starting an entity reference
+STRAY_AMPERSAND = re.compile(u'&(?!#[0-9]+;|#x[0-9a-fA-F]+;|[A-Za-z][\\w.-]*;)')
+# A '<' which can't start a tag, a comment, a CDATA section, etc.
+STRAY_LESS_THAN = re.compile(u'<(?![A-Za-z_:/!?])')
+# Entities declared in a DTD aren't resolved (html.parser doesn't either)
+XML_PARSER = etree.XMLParser(resolve_entities=False)
+RECOVERING_XML_PARSER = etree.XMLParser(
+    recover=True, resolve_entities=False)
+
+ENTITY_REFERENCE = re.compile(u'&([A-Za-z][\\w.-]*);')
+XML_DECLARATION = re.compile(u'^\\s*<\\?xml[^>]*\\?>')
+
+
+def _replace_entity(match):
+    name = match.group(1)
+    if name in name2codepoint:
+        # lxml's recovery mode drops the XML entities (e.g. &lt;), but not
+        # the character references
+        return u'&#{};'.format(name2codepoint[name])
+    elif name == u'apos':
+        return u'&#39;'
+    else:
+        # Kept as text, like html.parser does
+        return u'&amp;{};'.format(name)
+
+
+def _recover(markup):
+    """Fixes the malformed input html.parser tolerates: HTML entities, and
+    unescaped '&' and '<' characters
+    """
+    markup = STRAY_AMPERSAND.sub(u'&amp;', markup)
+    markup = ENTITY_REFERENCE.sub(_replace_entity, markup)
+    return STRAY_LESS_THAN.sub(u'&lt;', markup)
+
+
+def _parse(markup):
+    """Parses the markup with lxml. If it isn't well-formed XML, it is fixed
+    with _recover, and as a last resort parsed in lxml's recovery mode.
+
+    :rtype: lxml.etree._Element
+    """
+    # lxml refuses unicode strings with an encoding declaration, and
+    # html.parser ignores the declaration anyway
+    markup = XML_DECLARATION.sub(u'', markup, count=1)
+    markup = CARRIAGE_RETURN_IN_TEXT.sub(u'&#13;', markup)
+    try:
+        return etree.fromstring(markup, XML_PARSER)
+    except etree.XMLSyntaxError:
+        pass
+
+    markup = _recover(markup)
+    try:
+        return etree.fromstring(markup, XML_PARSER)
+    except etree.XMLSyntaxError:
+        root = etree.fromstring(markup, RECOVERING_XML_PARSER)
+        if root is None:
+            raise CaptionReadSyntaxError(u"The DFXP document can't be parsed")
+        return root
+
+
+class LxmlTag(object):
+    """Wraps an lxml element with the parts of the BeautifulSoup Tag API the
+    DFXP reader needs.
+
+    The tags of a document are numbered in document order (`index`), and
+    `end` is the number following the last descendant of the tag, so the
+    descendants of a tag are the document's tags in [index + 1, end).
+    """
+    def __init__(self, document, name, attrs, parent, index):
+        self.document = document
+        self.name = name
+        self.attrs = attrs
+        self.parent = parent
+        self.index = index
+        self.end = index + 1
+        self.contents = []
+        self.layout_info = None
+
+    def __nonzero__(self):
+        return True
+
+    def __getitem__(self, key):
+        return self.attrs[key]
+
+    def __repr__(self):
+        return u'<LxmlTag {}>'.format(self.name).encode(u'utf-8')
+
+    def get(self, key, default=None):
+        return self.attrs.get(key, default)
+
+    def has_attr(self, key):
+        return key in self.attrs
+
+    @property
+    def parents(self):
+        parent = self.parent
+        while parent is not None:
+            yield parent
+            parent = parent.parent
+
+    def find_all(self, name=None, attrs={}, recursive=True, limit=None):
+        """
+        :param name: The name of the tags to find, or None for all the tags
+        :param attrs: Attribute values the tags must have
+        :param recursive: If False, only the children of the tag are searched
+        :rtype: list
+        """
+        if not recursive:
+            candidates = [child for child in self.contents
+                          if isinstance(child, LxmlTag) and
+                          (name is None or child.name == name)]
+        elif name is None:
+            candidates = self.document.tags[self.index + 1:self.end]
+        else:
+            candidates = self.document.tags_by_name.get(name, ())
+            indexes = self.document.indexes_by_name.get(name, ())
+            candidates = candidates[
+                bisect_right(indexes, self.index):
+                bisect_left(indexes, self.end)]
+
+        if attrs:
+            candidates = [
+                tag for tag in candidates
+                if all(tag.attrs.get(key) == value
+                       for key, value in attrs.items())]
+        if limit is not None:
+            candidates = candidates[:limit]
+        return candidates
+
+    def find(self, name=None, attrs={}, recursive=True):
+        found = self.find_all(name, attrs, recursive, limit=1)
+        if found:
+            return found[0]
+
+    findAll = findChildren = find_all
+    findChild = find
+
+
+class LxmlDFXPParser(DFXPLayoutMixin, LxmlTag):
+    """The DFXP document, parsed with lxml. Like LayoutAwareDFXPParser, it
+    adds a 'layout_info' attribute on every node of its divs.
+    """
+    def __init__(self, markup=u"", read_invalid_positioning=False):
+        """
+        :type markup: unicode
+        :type read_invalid_positioning: bool
+        :param read_invalid_positioning: if True, will try to also look for
+            layout info on every element itself (even if the docs explicitly
+            call for ignoring attributes, when incorrectly placed)
+        """
+        super(LxmlDFXPParser, self).__init__(
+            self, u'[document]', {}, None, -1)
+        self.read_invalid_positioning = read_invalid_positioning
+        self.tags = []
+        self.tags_by_name = {}
+        self.indexes_by_name = {}
+
+        root = _parse(markup)
+        self._wrap(root, self, {})
+        self.end = len(self.tags)
+
+        self._add_layout_info()
+
+    def _wrap(self, element, parent, parent_nsmap):
+        """Wraps the element and its descendants, appending them to the
+        contents of the parent
+        """
+        if element.tag is etree.Comment:
+            self._append_text(parent, element.text or u'', Comment)
+            return
+        if element.tag is etree.PI:
+            data = element.target
+            if element.text:
+                data += u' ' + element.text
+            self._append_text(parent, data + u'?', ProcessingInstruction)
+            return
+        if not isinstance(element.tag, basestring):
+            # e.g. an entity left unresolved in recovery mode
+            return
+
+        nsmap = element.nsmap
+        # The prefixes of the namespaces, for the attributes (which can't be
+        # in the default namespace)
+        prefixes = {XML_NAMESPACE: u'xml'}
+        for prefix, uri in nsmap.items():
+            if prefix:
+                prefixes[uri] = prefix
+
+        attrs = {}
+        # The namespace declarations are attributes for html.parser
+        for prefix, uri in nsmap.items():
+            if parent_nsmap.get(prefix) != uri:
+                attrs[u'xmlns:' + prefix if prefix else u'xmlns'] = \
+                    unicode(uri)
+        for key, value in element.attrib.items():
+            attrs[self._get_name(key, prefixes)] = unicode(value)
+
+        tag = LxmlTag(
+            self, self._get_name(element.tag, {}, element.prefix), attrs,
+            parent, len(self.tags))
+        self.tags.append(tag)
+        self.tags_by_name.setdefault(tag.name, []).append(tag)
+        self.indexes_by_name.setdefault(tag.name, []).append(tag.index)
+        parent.contents.append(tag)
+
+        if element.text:
+            self._append_text(tag, element.text)
+        for child in element:
+            self._wrap(child, tag, nsmap)
+            if child.tail:
+                self._append_text(tag, child.tail)
+        tag.end = len(self.tags)
+
+    @staticmethod
+    def _append_text(parent, text, text_class=NavigableString):
+        # Like BeautifulSoup does, the texts made of ASCII whitespace only
+        # are replaced by a single newline or space
+        if not text.strip(ASCII_SPACES):
+            text = u'\n' if u'\n' in text else u' '
+        text = text_class(text)
+        text.parent = parent
+        text.layout_info = None
+        parent.contents.append(text)
+
+    @staticmethod
+    def _get_name(qualified_name, prefixes, prefix=None):
+        """Returns the name html.parser would give to a tag or an attribute,
+        i.e. its lowercased qualified name
+
+        :param prefixes: The prefixes of the namespaces (by URI), for when
+            the prefix isn't given
+        """
+        if qualified_name[0] != u'{':
+            return unicode(qualified_name).lower()
+        uri, local_name = qualified_name[1:].split(u'}', 1)
+        prefix = prefix or prefixes.get(uri)
+        if prefix:
+            return u'{}:{}'.format(prefix, local_name).lower()
+        return unicode(local_name).lower()
+
+
+class LxmlDFXPReader(DFXPReader):
+    """A DFXPReader parsing the documents with lxml (see LxmlDFXPParser)
+    """
+    @staticmethod
+    def _get_dfxp_parser_class():
+        return LxmlDFXPParser
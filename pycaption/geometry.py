@@ -8,8 +8,25 @@ CONVENTIONS:
   necessary modifications.
 """
 
+from weakref import WeakValueDictionary
+
 from .exceptions import RelativizationError
 
+# The objects parsed from xml attributes, by (class, attribute). They are
+# value objects, so the same instance can be returned for the same attribute
+# while it's in use.
+_PARSED_ATTRIBUTES = WeakValueDictionary()
+
+# The layouts, by their serialized values. See intern_layout.
+_INTERNED_LAYOUTS = WeakValueDictionary()
+
+# The results of Layout.as_percentage_of and Layout.fit_to_screen, which the
+# writers call for every caption. Cleared when they reach MAX_CACHED_LAYOUTS.
+_RELATIVIZED_LAYOUTS = {}
+_FITTED_LAYOUTS = {}
+MAX_CACHED_LAYOUTS = 1024
+
+
 class Enum(object):
     """Generic class that's not easily instantiable, serving as a base for
     the enumeration classes
@@ -84,7 +101,7 @@ class Alignment(object):
         )
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             other and
             type(self) == type(other) and
             self.horizontal == other.horizontal and
@@ -134,19 +151,24 @@ class TwoDimensionalObject(object):
     """Adds a couple useful methods to its subclasses, nothing fancy.
     """
     @classmethod
-    # TODO - highly cachable. Should use WeakValueDictionary here to return
-    # flyweights, not new objects.
     def from_xml_attribute(cls, attribute):
         """Instantiate the class from a value of the type "4px" or "5%"
         or any number concatenated with a measuring unit (member of UnitEnum)
 
+        Equal attributes give the same (flyweight) instance.
+
         :type attribute: unicode
         """
-        horizontal, vertical = unicode(attribute).split(u' ')
-        horizontal = Size.from_string(horizontal)
-        vertical = Size.from_string(vertical)
+        attribute = unicode(attribute)
+        instance = _PARSED_ATTRIBUTES.get((cls, attribute))
+        if instance is None:
+            horizontal, vertical = attribute.split(u' ')
+            horizontal = Size.from_string(horizontal)
+            vertical = Size.from_string(vertical)
 
-        return cls(horizontal, vertical)
+            instance = cls(horizontal, vertical)
+            _PARSED_ATTRIBUTES[cls, attribute] = instance
+        return instance
 
 
 class Stretch(TwoDimensionalObject):
@@ -191,7 +213,7 @@ class Stretch(TwoDimensionalObject):
         )
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             other and
             type(self) == type(other) and
             self.horizontal == other.horizontal and
@@ -301,7 +323,7 @@ class Region(object):
             return self.origin.add_extent(self.extent)
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             other and
             type(self) == type(other) and
             self.extent == other.extent and
@@ -393,7 +415,7 @@ class Point(TwoDimensionalObject):
         )
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             other and
             type(self) == type(other) and
             self.x == other.x and
@@ -511,16 +533,23 @@ class Size(object):
         return Size(value, unit)
 
     @classmethod
-    # TODO - this also looks highly cachable. Should use a WeakValueDict here
-    # to return flyweights
     def from_string(cls, string):
         """Given a string of the form "46px" or "5%" etc., returns the proper
-        size object
+        size object. Equal strings give the same (flyweight) instance.
 
         :param string: a number concatenated to any of the UnitEnum members.
         :type string: unicode
         :rtype: Size
         """
+        string = unicode(string)
+        instance = _PARSED_ATTRIBUTES.get((cls, string))
+        if instance is None:
+            instance = cls._from_string(string)
+            _PARSED_ATTRIBUTES[cls, string] = instance
+        return instance
+
+    @classmethod
+    def _from_string(cls, string):
         units = [UnitEnum.CELL, UnitEnum.PERCENT, UnitEnum.PIXEL,
                  UnitEnum.EM, UnitEnum.PT]
 
@@ -578,7 +607,7 @@ class Size(object):
         return self.value, self.unit
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             other and
             type(self) == type(other) and
             self.value == other.value and
@@ -634,10 +663,21 @@ class Padding(object):
 
         http://www.w3.org/TR/ttaf1-dfxp/#style-attribute-padding
 
+        Equal attributes give the same (flyweight) instance.
+
         :param attribute: a string like object, representing a dfxp attr. value
         :return: a Padding object
         """
-        values_list = unicode(attribute).split(u' ')
+        attribute = unicode(attribute)
+        instance = _PARSED_ATTRIBUTES.get((cls, attribute))
+        if instance is None:
+            instance = cls._from_xml_attribute(attribute)
+            _PARSED_ATTRIBUTES[cls, attribute] = instance
+        return instance
+
+    @classmethod
+    def _from_xml_attribute(cls, attribute):
+        values_list = attribute.split(u' ')
         sizes = []
 
         for value in values_list:
@@ -678,7 +718,7 @@ class Padding(object):
         )
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             other and
             type(self) == type(other) and
             self.before == other.before and
@@ -815,7 +855,7 @@ class Layout(object):
         )
 
     def __eq__(self, other):
-        return (
+        return self is other or (
             type(self) == type(other) and
             self.origin == other.origin and
             self.extent == other.extent and
@@ -850,6 +890,15 @@ class Layout(object):
         return is_relative
 
     def as_percentage_of(self, video_width, video_height):
+        key = self, video_width, video_height
+        layout = _RELATIVIZED_LAYOUTS.get(key)
+        if layout is None:
+            layout = intern_layout(
+                self._as_percentage_of(video_width, video_height))
+            _cache_layout(_RELATIVIZED_LAYOUTS, key, layout)
+        return layout
+
+    def _as_percentage_of(self, video_width, video_height):
         params = {'alignment': self.alignment}
         # We don't need to preserve webvtt_positioning on Layout
         # transformations because, if it is set, the WebVTT writer
@@ -872,7 +921,18 @@ class Layout(object):
         ATTENTION: This must be called on relativized objects (such as the one
         returned by as_percentage_of). All units are presumed to be percentages.
         """
-
+        # The layout is returned as it is when it has no origin, with its
+        # webvtt_positioning, which Layout.__eq__ ignores
+        key = self, self.webvtt_positioning
+        layout = _FITTED_LAYOUTS.get(key)
+        if layout is None:
+            layout = self._fit_to_screen()
+            if layout is not self:
+                layout = intern_layout(layout)
+            _cache_layout(_FITTED_LAYOUTS, key, layout)
+        return layout
+
+    def _fit_to_screen(self):
         if self.origin:
             # Calculated values to be used if replacement is needed
             diff_horizontal = Size(100 - self.origin.x.value, UnitEnum.PERCENT)
@@ -922,3 +982,23 @@ class Layout(object):
             )
 
         return self
+
+
+def intern_layout(layout):
+    """Returns a Layout equal to the given one (including the
+    webvtt_positioning), which is the same instance for all the equal layouts
+    in use
+
+    :type layout: Layout
+    :rtype: Layout
+    """
+    if layout is None:
+        return None
+    key = type(layout), layout.serialized(), layout.webvtt_positioning
+    return _INTERNED_LAYOUTS.setdefault(key, layout)
+
+
+def _cache_layout(cache, key, layout):
+    if len(cache) >= MAX_CACHED_LAYOUTS:
+        cache.clear()
+    cache[key] = layout
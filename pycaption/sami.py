@@ -37,19 +37,19 @@ OBS:
 """
 import re
 
+from bisect import bisect_left
 from collections import deque
 from htmlentitydefs import name2codepoint
 from HTMLParser import HTMLParser, HTMLParseError
 from logging import FATAL
 from xml.sax.saxutils import escape
-from copy import deepcopy
 
 from cssutils import parseString, log, css as cssutils_css
 from bs4 import BeautifulSoup, NavigableString
 
 from .base import (
     BaseReader, BaseWriter, CaptionSet, CaptionList, Caption, CaptionNode,
-    DEFAULT_LANGUAGE_CODE)
+    DEFAULT_LANGUAGE_CODE, copy_dict)
 from .exceptions import (
     CaptionReadNoCaptions, CaptionReadSyntaxError, InvalidInputError)
 from .geometry import (
@@ -92,7 +92,7 @@ class SAMIReader(BaseReader):
         # Get the global layout that applies to all <p> tags
         global_layout = self._build_layout(doc_styles.get('p', {}))
 
-        caption_dict = {}
+        lang_layouts = {}
         for language in doc_langs:
             lang_layout = None
             for target, styling in doc_styles.items():
@@ -103,11 +103,10 @@ class SAMIReader(BaseReader):
                             inherit_from=global_layout
                         )
                         break
-            lang_layout = lang_layout or global_layout
-            lang_captions = self._translate_lang(
-                language, sami_soup, lang_layout)
+            lang_layouts[language] = lang_layout or global_layout
 
-            caption_dict[language] = lang_captions
+        caption_dict = self._translate_langs(
+            sami_soup, doc_langs, lang_layouts)
 
         caption_set = CaptionSet(
             caption_dict,
@@ -192,41 +191,87 @@ class SAMIReader(BaseReader):
         milliseconds = 0
 
         for p in sami_soup.select(u'p[lang|=%s]' % language):
-            milliseconds = int(float(p.parent[u'start']))
-            start = milliseconds * 1000
-            end = 0
-
-            if captions != [] and captions[-1].end == 0:
-                captions[-1].end = milliseconds * 1000
-
-            if p.get_text().strip():
-                self.first_alignment = None
-                styles = self._translate_attrs(p)
-                layout_info = self._build_layout(styles,
-                                                 inherit_from=parent_layout)
-                self.line = []
-
-                self._translate_tag(p, layout_info)
-                caption_layout = self._get_layout_class()(
+            milliseconds = self._translate_p_tag(p, captions, parent_layout)
+
+        self._end_last_caption(captions, milliseconds)
+        return captions
+
+    def _translate_langs(self, sami_soup, languages, lang_layouts):
+        """
+        Translate the SAMI XML to internal lists of captions, for all the
+        languages at once: the <p> tags are dispatched to the languages
+        their 'lang' attribute matches (like the CSS selector
+        p[lang|=language] does), in a single pass over the document.
+
+        :type languages: set
+        :type lang_layouts: dict
+        :param lang_layouts: The Layout of each language
+        :rtype: dict
+        """
+        caption_dict = {}
+        milliseconds = {}
+        for language in languages:
+            caption_dict[language] = CaptionList(
+                layout_info=lang_layouts[language])
+            milliseconds[language] = 0
+
+        for p in sami_soup.find_all(u'p', lang=True):
+            for language in _get_matching_languages(p[u'lang'], caption_dict):
+                milliseconds[language] = self._translate_p_tag(
+                    p, caption_dict[language], lang_layouts[language])
+
+        for language, captions in caption_dict.items():
+            self._end_last_caption(captions, milliseconds[language])
+        return caption_dict
+
+    def _translate_p_tag(self, p, captions, parent_layout):
+        """
+        Translate a <p> tag to a caption appended to the captions of its
+        language, and end the previous caption if it has no end yet.
+
+        :type captions: CaptionList
+        :rtype: int
+        :returns: The start of the <p> tag's <sync> tag, in milliseconds
+        """
+        milliseconds = int(float(p.parent[u'start']))
+        start = milliseconds * 1000
+        end = 0
+
+        if captions != [] and captions[-1].end == 0:
+            captions[-1].end = milliseconds * 1000
+
+        if p.get_text().strip():
+            self.first_alignment = None
+            styles = self._translate_attrs(p)
+            layout_info = self._build_layout(styles,
+                                             inherit_from=parent_layout)
+            self.line = []
+
+            self._translate_tag(p, layout_info)
+            caption_layout = self._get_layout_class()(
+                alignment=self.first_alignment,
+                inherit_from=layout_info
+            )
+            for index, node in enumerate(self.line):
+                # Nodes can be shared (e.g. BREAK nodes), so they're
+                # replaced instead of being modified
+                self.line[index] = node.copy_with(layout_info=Layout(
                     alignment=self.first_alignment,
-                    inherit_from=layout_info
-                )
-                for node in self.line:
-                    node.layout_info = Layout(
-                        alignment=self.first_alignment,
-                        inherit_from=node.layout_info
-                    )
-                self.first_alignment = None
-
-                caption = Caption(start, end, self.line, styles, caption_layout)
-                captions.append(caption)
+                    inherit_from=node.layout_info
+                ))
+            self.first_alignment = None
+
+            caption = Caption(start, end, self.line, styles, caption_layout)
+            captions.append(caption)
+
+        return milliseconds
 
+    @staticmethod
+    def _end_last_caption(captions, milliseconds):
         if captions and captions[-1].end == 0:
             # Arbitrarily make this last 4 seconds. Not ideal...
             captions[-1].end = (milliseconds + 4000) * 1000
 
-        return captions
-
     def _get_style_name_from_tag(self, tag):
         if tag == u'i':
             return u'italics'
@@ -373,15 +418,36 @@ class SAMIReader(BaseReader):
             )
 
 
+def _get_matching_languages(lang, languages):
+    """Returns the languages matched by a 'lang' attribute, i.e. which are
+    the attribute itself, or the part of it before a hyphen (like the CSS
+    selector [lang|=language] does)
+
+    :type lang: unicode
+    :param languages: a collection of language codes
+    :rtype: list
+    """
+    prefixes = [lang[:index] for index, character in enumerate(lang)
+                if character == u'-']
+    prefixes.append(lang)
+    return [prefix for prefix in prefixes if prefix in languages]
+
+
 class SAMIWriter(BaseWriter):
     def __init__(self, *args, **kwargs):
         super(SAMIWriter, self).__init__(*args, **kwargs)
         self.open_span = False
         self.last_time = None
+        self.sync_index = None
 
     def write(self, caption_set):
-        caption_set = deepcopy(caption_set)
+        # Loop through all captions/nodes and apply transformations to layout
+        # in function of the provided or default settings. The original
+        # caption set is left untouched.
+        caption_set = self._relativize_captions(
+            caption_set, caption_set.get_languages())
         sami = BeautifulSoup(SAMI_BASE_MARKUP, u"xml")
+        self.sync_index = _SyncIndex(sami.body)
 
         caption_set.layout_info = self._relativize_and_fit_to_screen(
             caption_set.layout_info)
@@ -400,13 +466,6 @@ class SAMIWriter(BaseWriter):
             )
 
             for caption in caption_set.get_captions(lang):
-                # Loop through all captions/nodes and apply transformations to
-                # layout in function of the provided or default settings
-                caption.layout_info = self._relativize_and_fit_to_screen(
-                    caption.layout_info)
-                for node in caption.nodes:
-                    node.layout_info = self._relativize_and_fit_to_screen(
-                        node.layout_info)
                 sami = self._recreate_p_tag(
                     caption, sami, lang, primary, caption_set)
 
@@ -443,7 +502,8 @@ class SAMIWriter(BaseWriter):
         p = sami.new_tag(u"p")
 
         p_style = u''
-        for attr, value in self._recreate_style(caption.style).items():
+        for attr, value in self._recreate_style(
+                copy_dict(caption.style)).items():
             p_style += u'%s:%s;' % (attr, value)
         if p_style:
             p[u'p_style'] = p_style
@@ -470,21 +530,29 @@ class SAMIWriter(BaseWriter):
         """
         if lang == primary:
             sync = sami.new_tag(u"sync", start=u"%s" % time)
-            sami.body.append(sync)
+            self.sync_index.append(sync, time)
         else:
-            sync = sami.find(u"sync", start=u"%s" % time)
+            sync = self.sync_index.find(time)
             if sync is None:
                 sami, sync = self._find_closest_sync(sami, time)
 
         return sami, sync
 
     def _find_closest_sync(self, sami, time):
+        """Creates a sync tag for the given timing, and inserts it after the
+        last one starting earlier (or before the first one starting later)
+        """
         sync = sami.new_tag(u"sync", start=u"%s" % time)
 
+        if self.sync_index.is_sorted:
+            self.sync_index.insert(sync, time)
+            return sami, sync
+
         earlier = sami.find_all(u"sync", start=lambda x: int(x) < time)
         if earlier:
             last_sync = earlier[-1]
             last_sync.insert_after(sync)
+            self.sync_index.add(sync, time)
         else:
             def later_syncs(start):
                 return int(start) > time
@@ -492,6 +560,7 @@ class SAMIWriter(BaseWriter):
             if later:
                 last_sync = later[0]
                 last_sync.insert_before(sync)
+                self.sync_index.add(sync, time)
         return sami, sync
 
     def _recreate_blank_tag(self, sami, caption, lang, primary, captions):
@@ -547,6 +616,7 @@ class SAMIWriter(BaseWriter):
         sami_style = u'\n    {} {{\n    '.format(selector)
 
         if layout_info and layout_info.padding:
+            # The rules belong to the copy of the caption set made by write
             rules.update({
                 'margin-top': unicode(layout_info.padding.before),
                 'margin-right': unicode(layout_info.padding.end),
@@ -590,7 +660,7 @@ class SAMIWriter(BaseWriter):
         if u'class' in content:
             klass += u' class="%s"' % content[u'class']
 
-        for attr, value in self._recreate_style(content).items():
+        for attr, value in self._recreate_style(copy_dict(content)).items():
             style += u'%s:%s;' % (attr, value)
 
         if style or klass:
@@ -629,10 +699,70 @@ class SAMIWriter(BaseWriter):
         return escape(s)
 
 
-class SAMIParser(HTMLParser):
+class _SyncIndex(object):
+    """The <sync> tags of the body of a SAMI document being written, by start
+    time.
+
+    As long as the tags are in chronological order in the document (which is
+    the case unless the primary language has overlapping captions), the
+    position of a new tag is found by bisection, instead of searching the
+    document for the closest ones.
+    """
+    def __init__(self, body):
+        """
+        :type body: bs4.element.Tag
+        """
+        self.body = body
+        # The first tag with each 'start' attribute, in document order
+        self.syncs_by_start = {}
+        # The start times of the tags of the body, in document order
+        self.times = []
+        self.is_sorted = True
+
+    def append(self, sync, time):
+        """Appends a tag to the body
+
+        :type time: int
+        """
+        self.body.append(sync)
+        if self.times and time < self.times[-1]:
+            self.is_sorted = False
+        self.times.append(time)
+        self.add(sync, time)
+
+    def insert(self, sync, time):
+        """Inserts a tag after the last one starting earlier, if the body is
+        sorted and not empty (otherwise, the tag isn't added to the body)
+        """
+        if not self.is_sorted or not self.times:
+            return
+        index = bisect_left(self.times, time)
+        self.body.insert(index, sync)
+        self.times.insert(index, time)
+        self.add(sync, time)
+
+    def add(self, sync, time):
+        """Makes a tag inserted in the body available to `find`
+        """
+        self.syncs_by_start.setdefault(u'%s' % time, sync)
+
+    def find(self, time):
+        """
+        :returns: The first tag starting at the given time, or None
+        """
+        return self.syncs_by_start.get(u'%s' % time)
+
+
+class SAMIParser(HTMLParser, object):
+    """Normalizes a SAMI document (closes its tags, resolves its entities,
+    finds the languages of its <p> tags...) so it can be parsed as XML.
+
+    The normalized document is built as a list of chunks (`chunks`), which
+    are only joined when the `sami` property is read.
+    """
     def __init__(self, *args, **kw):
         HTMLParser.__init__(self, *args, **kw)
-        self.sami = u''
+        self.chunks = []
         self.line = u''
         self.styles = {}
         self.queue = deque()
@@ -641,6 +771,18 @@ class SAMIParser(HTMLParser):
         self.name2codepoint = name2codepoint.copy()
         self.name2codepoint[u'apos'] = 0x0027
 
+    @property
+    def sami(self):
+        """The normalized document
+
+        :rtype: unicode
+        """
+        return u''.join(self.chunks)
+
+    @sami.setter
+    def sami(self, value):
+        self.chunks = [value]
+
     def handle_starttag(self, tag, attrs):
         """
         Override the parser's handling of starttags
@@ -664,19 +806,19 @@ class SAMIParser(HTMLParser):
 
         # clean-up line breaks
         if tag == u'br':
-            self.sami += u"<br/>"
+            self.chunks.append(u"<br/>")
         # add tag to queue
         else:
             # if already in queue, first close tags off in LIFO order
             while tag in self.queue:
                 closer = self.queue.pop()
-                self.sami = self.sami + u"</%s>" % closer
+                self.chunks.append(u"</%s>" % closer)
             # open new tag in queue
             self.queue.append(tag)
             # add tag with attributes
             for attr, value in attrs:
                 tag += u' %s="%s"' % (attr.lower(), value)
-            self.sami += u"<%s>" % tag
+            self.chunks.append(u"<%s>" % tag)
 
     # override the parser's handling of endtags
     def handle_endtag(self, tag):
@@ -691,28 +833,28 @@ class SAMIParser(HTMLParser):
         # close off tags in LIFO order, if matching starting tag in queue
         while tag in self.queue:
             closing_tag = self.queue.pop()
-            self.sami += u"</%s>" % closing_tag
+            self.chunks.append(u"</%s>" % closing_tag)
 
     def handle_entityref(self, name):
         if name in [u'gt', u'lt']:
-            self.sami += u'&%s;' % name
+            self.chunks.append(u'&%s;' % name)
         else:
             try:
-                self.sami += unichr(self.name2codepoint[name])
+                self.chunks.append(unichr(self.name2codepoint[name]))
             except (KeyError, ValueError):
-                self.sami += u'&%s' % name
+                self.chunks.append(u'&%s' % name)
 
         self.last_element = u''
 
     def handle_charref(self, name):
         if name[0] == u'x':
-            self.sami += unichr(int(name[1:], 16))
+            self.chunks.append(unichr(int(name[1:], 16)))
         else:
-            self.sami += unichr(int(name))
+            self.chunks.append(unichr(int(name)))
 
     # override the parser's handling of data
     def handle_data(self, data):
-        self.sami += data
+        self.chunks.append(data)
         self.last_element = u''
 
     # override the parser's feed function
@@ -752,7 +894,7 @@ class SAMIParser(HTMLParser):
         # close any tags that remain in the queue
         while self.queue != deque([]):
             closing_tag = self.queue.pop()
-            self.sami += u"</%s>" % closing_tag
+            self.chunks.append(u"</%s>" % closing_tag)
 
         return self.sami, self.styles, self.langs
 
@@ -79,26 +79,35 @@ http://www.theneitherworld.com/mcpoodle/SCC_TOOLS/DOCS/SCC_FORMAT.HTML
 
 
 import re
-import math
 import string
+import struct
 import textwrap
+from itertools import islice
 
 from pycaption.base import (
     BaseReader, BaseWriter, CaptionSet, CaptionNode,
 )
 from pycaption.exceptions import CaptionReadNoCaptions, InvalidInputError
+from pycaption.timestamps import (
+    format_scc_timecode, parse_scc_timecode, scc_frames_to_microseconds,
+    scc_timecode_to_frames)
 from .constants import (
-    HEADER, COMMANDS, SPECIAL_CHARS, EXTENDED_CHARS, CHARACTERS,
-    MICROSECONDS_PER_CODEWORD, CHARACTER_TO_CODE,
-    SPECIAL_OR_EXTENDED_CHAR_TO_CODE, PAC_BYTES_TO_POSITIONING_MAP,
-    PAC_HIGH_BYTE_BY_ROW, PAC_LOW_BYTE_BY_ROW_RESTRICTED,
+    HEADER, SPECIAL_CHARS, EXTENDED_CHARS, MICROSECONDS_PER_CODEWORD,
+    CHAR_TO_CODE, PAC_HIGH_BYTE_BY_ROW,
+    PAC_LOW_BYTE_BY_ROW_RESTRICTED, WORD_DECODER, PAIR_DECODER, NULL_PAIR,
+    DECODED_COMMAND, DECODED_SPECIAL_CHAR, DECODED_CHARACTERS,
 )
 from .specialized_collections import (
     TimingCorrectingCaptionList, NotifyingDict, CaptionCreator,
     InstructionNodeCreator)
 
 from .state_machines import DefaultProvidingPositionTracker
-from copy import deepcopy
+
+# The timecode of a line, and its words (separated by any whitespace)
+SCC_LINE_PATTERN = re.compile(u'([0-9:;]*)\\s*(.*)')
+
+# How many byte pairs read_byte_pairs unpacks at once
+PAIRS_PER_CHUNK = 4096
 
 
 class NodeCreatorFactory(object):
@@ -147,6 +156,21 @@ def get_corrected_end_time(caption):
     return caption.start + 4 * 1000 * 1000
 
 
+def _tokenize_lines(lines):
+    """Yields the timecode and the (lowercased) words of the lines which
+    aren't blank
+
+    :type lines: iterable of unicode
+    :rtype: iterator of (unicode, list) tuples
+    """
+    match = SCC_LINE_PATTERN.match
+    for line in lines:
+        if not line or line.isspace():
+            continue
+        timecode, words = match(line).groups()
+        yield timecode, words.lower().split()
+
+
 
 class SCCReader(BaseReader):
     """Converts a given unicode string to a CaptionSet.
@@ -220,9 +244,81 @@ class SCCReader(BaseReader):
         lines = content.splitlines()
 
         # loop through each line except the first
-        for line in lines[1:]:
-            self._translate_line(line)
+        for timecode, words in _tokenize_lines(islice(lines, 1, None)):
+            self._translate_line(timecode, words)
+
+        return self._get_caption_set(lang)
+
+    def read_byte_pairs(self, data, start_frame=0, lang=u'en-US',
+                        simulate_roll_up=False, offset=0):
+        """Converts CEA-608 byte pairs (of the first field, with their parity
+        bits) into a CaptionSet, without going through their hex words.
+
+        There is a pair for every frame, starting with the frame number
+        `start_frame` (see pycaption.timestamps.scc_timecode_to_frames for
+        the number of a timecode). The null pairs (80 80) are read like
+        their 8080 words, and the unknown pairs are ignored.
+
+        :param data: The byte pairs, one after another, in any object
+            supporting the buffer protocol (str, bytearray, memoryview,
+            mmap...). It isn't copied.
+
+        :type start_frame: int
+        :param start_frame: The frame of the first pair
+
+        :param lang: see read
+        :param simulate_roll_up: see read
+        :param offset: see read
+
+        :rtype: CaptionSet
+        """
+        # unicode strings support the buffer protocol too, but their bytes
+        # aren't byte pairs
+        if isinstance(data, unicode):
+            raise InvalidInputError(u'The data is a unicode string.')
+        try:
+            struct.unpack_from('', data)
+        except (TypeError, struct.error):
+            raise InvalidInputError(
+                u'The data does not support the buffer protocol.')
+
+        pair_count, odd_byte = divmod(len(data), 2)
+        if odd_byte:
+            raise InvalidInputError(u'The data has an odd number of bytes.')
+
+        self.simulate_roll_up = simulate_roll_up
+        self.time_translator.offset = offset * 1000000
+
+        # Like for the words of a line, the time of a pair is counted after
+        # its frame. A null pair is translated like its word: it ends a
+        # pending line break or repositioning. Right after another null pair
+        # it doesn't change anything, and as most pairs of a stream are null,
+        # these aren't translated.
+        start_at_frame = self.time_translator.start_at_frame
+        get_decoded = PAIR_DECODER.get
+        last_pair = None
+        for first_pair in xrange(0, pair_count, PAIRS_PER_CHUNK):
+            chunk_size = min(PAIRS_PER_CHUNK, pair_count - first_pair)
+            pairs = struct.unpack_from(
+                '>%dH' % chunk_size, data, first_pair * 2)
+            for frame, pair in enumerate(
+                    pairs, start_frame + first_pair + 1):
+                if pair == NULL_PAIR and last_pair == NULL_PAIR:
+                    continue
+                decoded = get_decoded(pair)
+                if decoded is not None:
+                    start_at_frame(frame)
+                    self._translate_decoded_word(*decoded)
+                    last_pair = pair
+        start_at_frame(start_frame + pair_count)
+
+        return self._get_caption_set(lang)
+
+    def _get_caption_set(self, lang):
+        """Returns the captions read, once all the words are translated
 
+        :rtype: CaptionSet
+        """
         self._flush_implicit_buffers()
 
         captions = CaptionSet({lang: self.caption_stash.get_all()})
@@ -280,47 +376,41 @@ class SCCReader(BaseReader):
                 self.caption_stash.create_and_store(
                     self.buffer_dict[u'paint'], self.time)
 
-    def _translate_line(self, line):
-        # ignore blank lines
-        if line.strip() == u'':
-            return
-
-        # split line in timestamp and words
-        r = re.compile(r"([0-9:;]*)([\s\t]*)((.)*)")
-        parts = r.findall(line.lower())
-
+    def _translate_line(self, timecode, words):
         # XXX!!!!!! THESE 2 LINES ARE A HACK
-        if parts[0][2].strip() == u'942f':
-            self._fix_last_timing(timing=parts[0][0])
+        if words == [u'942f']:
+            self._fix_last_timing(timing=timecode)
 
-        self.time_translator.start_at(parts[0][0])
+        self.time_translator.start_at(timecode)
 
-        # loop through each word
-        for word in parts[0][2].split(u' '):
-            # ignore empty results
-            if word.strip() != u'':
-                self._translate_word(word)
+        for word in words:
+            self._translate_word(word)
 
     def _translate_word(self, word):
         # count frames for timing
         self.time_translator.increment_frames()
 
-        # first check if word is a command
-        # TODO - check that all the positioning commands are here, or use
-        # some other strategy to determine if the word is a command.
-        if word in COMMANDS or _is_pac_command(word):
-            self._translate_command(word)
+        # The words which aren't commands nor characters are ignored
+        # TODO - check that all the positioning commands are in COMMANDS or
+        # PAC_BYTES_TO_POSITIONING_MAP, or use some other strategy to
+        # determine if the word is a command.
+        decoded = WORD_DECODER.get(word)
+        if decoded is not None:
+            self._translate_decoded_word(word, *decoded)
 
-        # second, check if word is a special character
-        elif word in SPECIAL_CHARS:
+    def _translate_decoded_word(self, word, kind, payload):
+        """
+        :param kind: The kind of the word, from WORD_DECODER
+        :param payload: The payload of the word, from WORD_DECODER
+        """
+        if kind == DECODED_CHARACTERS:
+            self.buffer.add_chars(*payload)
+        elif kind == DECODED_COMMAND:
+            self._translate_command(word)
+        elif kind == DECODED_SPECIAL_CHAR:
             self._translate_special_char(word)
-
-        elif word in EXTENDED_CHARS:
-            self._translate_extended_char(word)
-
-        # third, try to convert word into 2 characters
         else:
-            self._translate_characters(word)
+            self._translate_extended_char(word)
 
     def _handle_double_command(self, word):
         # ensure we don't accidentally use the same command twice
@@ -429,17 +519,6 @@ class SCCReader(BaseReader):
         else:
             self.buffer.interpret_command(word)
 
-    def _translate_characters(self, word):
-        # split word into the 2 bytes
-        byte1 = word[:2]
-        byte2 = word[2:]
-
-        # check to see if the the bytes are recognized characters
-        if byte1 not in CHARACTERS or byte2 not in CHARACTERS:
-            return
-
-        self.buffer.add_chars(CHARACTERS[byte1], CHARACTERS[byte2])
-
     @property
     def buffer(self):
         """Returns the currently active buffer
@@ -480,6 +559,41 @@ class SCCReader(BaseReader):
         self.caption_stash.correct_last_timing(self.time, force=True)
 
 
+class _SccCodeEmitter(object):
+    """Accumulates the words (4 hex digits) of the code of a caption. The
+    basic characters take a byte (2 hex digits), so a word can be half
+    written.
+    """
+    def __init__(self):
+        self.words = []
+        self._half_word = None
+
+    def add_byte(self, byte):
+        """
+        :type byte: unicode
+        """
+        if self._half_word is None:
+            self._half_word = byte
+        else:
+            self.words.append(self._half_word + byte)
+            self._half_word = None
+
+    def add_word(self, word):
+        """Adds the word after finishing the current one, if any
+
+        :type word: unicode
+        """
+        self.align()
+        self.words.append(word)
+
+    def align(self):
+        """Finishes a half-word with a no-op so we can move to a full word
+        """
+        if self._half_word is not None:
+            self.words.append(self._half_word + u'80')
+            self._half_word = None
+
+
 class SCCWriter(BaseWriter):
 
     def __init__(self, *args, **kw):
@@ -491,8 +605,6 @@ class SCCWriter(BaseWriter):
         if caption_set.is_empty():
             return output
 
-        caption_set = deepcopy(caption_set)
-
         # Only support one language.
         lang = caption_set.get_languages()[0]
         captions = caption_set.get_captions(lang)
@@ -505,7 +617,7 @@ class SCCWriter(BaseWriter):
         # Advance start times so as to have time to write to the pop-on
         # buffer; possibly remove the previous clear-screen command
         for index, (code, start, end) in enumerate(codes):
-            code_words = len(code) / 5 + 8
+            code_words = len(code) + 8
             code_time_microseconds = code_words * MICROSECONDS_PER_CODEWORD
             code_start = start - code_time_microseconds
             if index == 0:
@@ -517,15 +629,18 @@ class SCCWriter(BaseWriter):
 
         # PASS 3:
         # Write captions.
+        chunks = [output]
         for (code, start, end) in codes:
-            output += (u'%s\t' % self._format_timestamp(start))
-            output += u'94ae 94ae 9420 9420 '
-            output += code
-            output += u'942c 942c 942f 942f\n\n'
+            chunks.append(u'%s\t94ae 94ae 9420 9420 ' %
+                          self._format_timestamp(start))
+            for word in code:
+                chunks.append(word + u' ')
+            chunks.append(u'942c 942c 942f 942f\n\n')
             if end is not None:
-                output += u'%s\t942c 942c\n\n' % self._format_timestamp(end)
+                chunks.append(
+                    u'%s\t942c 942c\n\n' % self._format_timestamp(end))
 
-        return output
+        return u''.join(chunks)
 
     # Wrap lines at 32 chars
     @staticmethod
@@ -541,76 +656,45 @@ class SCCWriter(BaseWriter):
         inner_lines_laid_out = [textwrap.fill(x, 32) for x in inner_lines]
         return u'\n'.join(inner_lines_laid_out)
 
-    @staticmethod
-    def _maybe_align(code):
-        # Finish a half-word with a no-op so we can move to a full word
-        if len(code) % 5 == 2:
-            code += u'80 '
-        return code
-
-    @staticmethod
-    def _maybe_space(code):
-        if len(code) % 5 == 4:
-            code += u' '
-        return code
-
-    def _print_character(self, code, char):
-        try:
-            char_code = CHARACTER_TO_CODE[char]
-        except KeyError:
-            try:
-                char_code = SPECIAL_OR_EXTENDED_CHAR_TO_CODE[char]
-            except KeyError:
-                char_code = u'91b6'  # Use £ as "unknown character" symbol
-
-        if len(char_code) == 2:
-            return code + char_code
-        elif len(char_code) == 4:
-            return self._maybe_align(code) + char_code
-        else:
-            # This should not happen!
-            return code
-
     def _text_to_code(self, s):
-        code = u''
+        """Returns the words of the code displaying the caption
+
+        :rtype: list
+        """
+        emitter = _SccCodeEmitter()
         lines = string.split(self._layout_line(s), u'\n')
         for row, line in enumerate(lines):
             row += 16 - len(lines)
             # Move cursor to column 0 of the destination row
-            for _ in range(2):
-                code += (u'%s%s ' % (PAC_HIGH_BYTE_BY_ROW[row],
-                                     PAC_LOW_BYTE_BY_ROW_RESTRICTED[row]))
+            pac = (PAC_HIGH_BYTE_BY_ROW[row] +
+                   PAC_LOW_BYTE_BY_ROW_RESTRICTED[row])
+            emitter.add_word(pac)
+            emitter.add_word(pac)
             # Print the line using the SCC encoding
             for char in line:
-                code = self._print_character(code, char)
-                code = self._maybe_space(code)
-            code = self._maybe_align(code)
-        return code
+                # Use £ as "unknown character" symbol
+                char_code = CHAR_TO_CODE.get(char, u'91b6')
+                if len(char_code) == 2:
+                    emitter.add_byte(char_code)
+                else:
+                    emitter.add_word(char_code)
+            emitter.align()
+        return emitter.words
 
     @staticmethod
     def _format_timestamp(microseconds):
-        seconds_float = microseconds / 1000.0 / 1000.0
-        # Convert to non-drop-frame timecode
-        seconds_float *= 1000.0 / 1001.0
-        hours = math.floor(seconds_float / 3600)
-        seconds_float -= hours * 3600
-        minutes = math.floor(seconds_float / 60)
-        seconds_float -= minutes * 60
-        seconds = math.floor(seconds_float)
-        seconds_float -= seconds
-        frames = math.floor(seconds_float * 30)
-        return u'%02d:%02d:%02d:%02d' % (hours, minutes, seconds, frames)
+        return format_scc_timecode(microseconds)
 
 
 class _SccTimeTranslator(object):
     """Converts SCC time to microseconds, keeping track of frames passed
     """
     def __init__(self):
-        self._time = 0
+        # The number of frames from 00:00:00:00, counting the frames passed
+        self._frames = 0
 
         # microseconds. The offset from which we begin the time calculation
         self.offset = 0
-        self._frames = 0
 
     def get_time(self):
         """Returns the time, in microseconds. Takes into account the number of
@@ -618,10 +702,8 @@ class _SccTimeTranslator(object):
 
         :rtype: int
         """
-        return self._translate_time(
-            self._time[:-2] + unicode(int(self._time[-2:]) + self._frames),
-            self.offset
-        )
+        value = scc_frames_to_microseconds(self._frames) - self.offset
+        return value if value > 0 else 0
 
     @staticmethod
     def _translate_time(stamp, offset):
@@ -632,59 +714,23 @@ class _SccTimeTranslator(object):
             Helpful for when the captions are off by some time interval.
         :rtype: int
         """
-        if u';' in stamp:
-            # Drop-frame timebase runs at the same rate as wall clock
-            seconds_per_timestamp_second = 1.0
-        else:
-            # Non-drop-frame timebase runs "slow"
-            # 1 second of timecode is longer than an actual second (1.001s)
-            seconds_per_timestamp_second = 1001.0 / 1000.0
-
-        time_split = stamp.replace(u';', u':').split(u':')
-
-        timestamp_seconds = (int(time_split[0]) * 3600 +
-                             int(time_split[1]) * 60 +
-                             int(time_split[2]) +
-                             int(time_split[3]) / 30.0)
-
-        seconds = timestamp_seconds * seconds_per_timestamp_second
-        microseconds = seconds * 1000 * 1000 - offset
-
-        if microseconds < 0:
-            microseconds = 0
-
-        return microseconds
+        return parse_scc_timecode(stamp, offset)
 
     def start_at(self, timespec):
         """Reset the counter to the given time
 
         :type timespec: unicode
         """
-        self._time = timespec
-        self._frames = 0
+        self._frames = scc_timecode_to_frames(timespec)
+
+    def start_at_frame(self, frames):
+        """Reset the counter to the given frame number
+
+        :type frames: int
+        """
+        self._frames = frames
 
     def increment_frames(self):
         """After a command was processed, we'd increment the number of frames
         """
         self._frames += 1
-
-
-def _is_pac_command(word):
-    """Checks whether the given word is a Preamble Address Code [PAC] command
-
-    :type word: unicode
-    :param word: 4 letter unicode command
-
-    :rtype: bool
-    """
-    if not word or len(word) != 4:
-        return False
-
-    byte1, byte2 = word[:2], word[2:]
-
-    try:
-        PAC_BYTES_TO_POSITIONING_MAP[byte1][byte2]
-    except KeyError:
-        return False
-    else:
-        return True
@@ -976,6 +976,67 @@ SPECIAL_OR_EXTENDED_CHAR_TO_CODE.update(
     {character: code for code, character in SPECIAL_CHARS.iteritems()}
 )
 
+# The code written for each character: a byte (2 hex digits) for the basic
+# characters, or a word (4 hex digits) for the special and extended ones
+CHAR_TO_CODE = dict(SPECIAL_OR_EXTENDED_CHAR_TO_CODE)
+CHAR_TO_CODE.update(CHARACTER_TO_CODE)
+
+# The kinds of words decoded by WORD_DECODER
+DECODED_COMMAND = 0
+DECODED_SPECIAL_CHAR = 1
+DECODED_EXTENDED_CHAR = 2
+DECODED_CHARACTERS = 3
+
+
+def _create_word_decoder():
+    """Decodes all the words the reader recognizes, with the same priority:
+    commands (including PACs) over special characters over extended
+    characters over pairs of characters. The words missing from it are
+    ignored.
+
+    :rtype: dict
+    :returns: The (kind, payload) tuple of each word. The payload is the
+        word for the commands, the character for the special and extended
+        characters, and the tuple of the 2 characters for the pairs.
+    """
+    decoder = {}
+    for (byte1, char1), (byte2, char2) in product(
+            CHARACTERS.items(), repeat=2):
+        decoder[byte1 + byte2] = (DECODED_CHARACTERS, (char1, char2))
+    for word, char in EXTENDED_CHARS.items():
+        decoder[word] = (DECODED_EXTENDED_CHAR, char)
+    for word, char in SPECIAL_CHARS.items():
+        decoder[word] = (DECODED_SPECIAL_CHAR, char)
+    for byte1, low_bytes in PAC_BYTES_TO_POSITIONING_MAP.items():
+        for byte2 in low_bytes:
+            decoder[byte1 + byte2] = (DECODED_COMMAND, byte1 + byte2)
+    for word in COMMANDS:
+        decoder[word] = (DECODED_COMMAND, word)
+    return decoder
+
+WORD_DECODER = _create_word_decoder()
+
+# The null byte pair (00 00 with the parity bits), which pads the frames
+# without captioning data
+NULL_PAIR = 0x8080
+
+
+def _create_pair_decoder():
+    """Decodes the byte pairs like WORD_DECODER decodes their words, the pairs
+    being integers (the first byte being the high one).
+
+    :rtype: dict
+    :returns: The (word, kind, payload) tuple of each pair, the kind and the
+        payload being the ones of WORD_DECODER
+    """
+    decoder = {}
+    for word, (kind, payload) in WORD_DECODER.items():
+        if len(word) == 4:
+            decoder[int(word, 16)] = (word, kind, payload)
+    return decoder
+
+PAIR_DECODER = _create_pair_decoder()
+
 # Time to transmit a single codeword = 1 second / 29.97
 MICROSECONDS_PER_CODEWORD = 1000.0 * 1000.0 / (30.0 * 1000.0 / 1001.0)
 
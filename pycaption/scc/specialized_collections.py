@@ -1,6 +1,9 @@
+from itertools import chain
+
 from ..base import CaptionList, Caption, CaptionNode
 from ..geometry import (UnitEnum, Size, Layout, Point, Alignment,
-                        VerticalAlignmentEnum, HorizontalAlignmentEnum)
+                        VerticalAlignmentEnum, HorizontalAlignmentEnum,
+                        intern_layout)
 
 from .constants import PAC_BYTES_TO_POSITIONING_MAP, COMMANDS
 
@@ -368,7 +371,7 @@ class InstructionNodeCreator(object):
             self._position_tracer.update_positioning(positioning)
 
     def __iter__(self):
-        return iter(_format_italics(self._collection))
+        return _format_italics(self._collection)
 
     @classmethod
     def from_list(cls, stash_list, position_tracker):
@@ -418,10 +421,12 @@ def _get_layout_from_tuple(position_tuple):
 
     horizontal = Size(100 * column / 32.0, UnitEnum.PERCENT)
     vertical = Size(100 * (row - 1) / 15.0, UnitEnum.PERCENT)
-    return Layout(origin=Point(horizontal, vertical),
-                  alignment=Alignment(HorizontalAlignmentEnum.LEFT,
-                                      VerticalAlignmentEnum.TOP)
-                  )
+    # The captions at the same position share their layout
+    return intern_layout(
+        Layout(origin=Point(horizontal, vertical),
+               alignment=Alignment(HorizontalAlignmentEnum.LEFT,
+                                   VerticalAlignmentEnum.TOP)
+               ))
 
 
 class _InstructionNode(object):
@@ -577,246 +582,100 @@ class _InstructionNode(object):
 
 
 def _format_italics(collection):
-    """Given a raw list of _InstructionNodes, returns a new equivalent list
-    where all the italics nodes properly close and open.
+    """Given a raw list of _InstructionNodes, yields an equivalent sequence
+    of nodes where all the italics nodes properly close and open.
 
-    The list is equivalent in the sense that the SCC commands that would have
-    generated the output list, would have had the exact same visual effect
-    as the ones that generated the output, as far as italics are concerned.
+    The sequence is equivalent in the sense that the SCC commands that would
+    have generated it, would have had the exact same visual effect as the
+    ones that generated the raw list, as far as italics are concerned.
 
     This is useful because the raw commands read from the SCC can't be used
     the way they are by the writers for the other formats. Those other writers
     require the list of CaptionNodes to be formatted in a certain way.
 
-    Note: Using state machines to manage the italics didn't work well because
-    we're using state machines already to track the position, and their
-    interactions got crazy.
-
-    :type collection: list[_InstructionNode]
-    :rtype: list[_InstructionNode]
-    """
-    new_collection = _skip_initial_italics_off_nodes(collection)
-
-    new_collection = _skip_empty_text_nodes(new_collection)
-
-    # after this step we're guaranteed a proper ordering of the nodes
-    new_collection = _skip_redundant_italics_nodes(new_collection)
-
-    # after this, we're guaranteed that the italics are properly contained
-    # within their context
-    new_collection = _close_italics_before_repositioning(new_collection)
-
-    # all nodes will be closed after this step
-    new_collection = _ensure_final_italics_node_closes(new_collection)
-
-    # removes pairs of italics nodes that don't do anything noticeable
-    new_collection = _remove_noop_italics(new_collection)
-
-    return new_collection
-
-
-def _remove_noop_on_off_italics(collection):
-    """Return an equivalent list to `collection`. It removes the italics node
-     pairs that don't surround text nodes, if those nodes are in the order:
-     on, off
+    It's done in a single pass over the nodes. Compared to the raw list:
+        - the empty text nodes are skipped
+        - the italics nodes which don't change the italics (including the
+        initial <Italics OFF> ones) are skipped
+        - the italics are closed before each repositioning node, and opened
+        again after it
+        - the italics are closed at the end
+        - the pairs of <Italics ON> and <Italics OFF> nodes (in any order)
+        that don't surround any other node are skipped
 
     :type collection: list[_InstructionNode]
-    :rtype: list[_InstructionNode]
+    :rtype: generator
     """
-    new_collection = []
-    to_commit = None
-
-    for node in collection:
-        if node.is_italics_node() and node.sets_italics_on():
-            to_commit = node
-            continue
-
-        elif node.is_italics_node() and node.sets_italics_off():
-            if to_commit:
-                to_commit = None
-                continue
-        else:
-            if to_commit:
-                new_collection.append(to_commit)
-                to_commit = None
-
-        new_collection.append(node)
-
-    return new_collection
-
-
-def _remove_noon_off_on_italics(collection):
-    """Removes pairs of off-on italics nodes, that don't surround any other
-    node
-
-    :type collection: list[_InstructionNode]
-    :return: list[_InstructionNode]
-    """
-    new_collection = []
-    to_commit = None
-
-    for node in collection:
-        if node.is_italics_node() and node.sets_italics_off():
-            to_commit = node
-            continue
-
-        elif node.is_italics_node() and node.sets_italics_on():
-            if to_commit:
-                to_commit = None
-                continue
-        else:
-            if to_commit:
-                new_collection.append(to_commit)
-                to_commit = None
-
-        new_collection.append(node)
-
-    if to_commit:
-        new_collection.append(to_commit)
-
-    return new_collection
-
-
-def _remove_noop_italics(collection):
-    """Return an equivalent list to `collection`. It removes the italics node
-     pairs that don't surround text nodes
-
-    :type collection: list[_InstructionNode]
-    :rtype: list[_InstructionNode]
-    """
-    new_collection = _remove_noop_on_off_italics(collection)
-
-    new_collection = _remove_noon_off_on_italics(new_collection)
-
-    return new_collection
-
-
-def _skip_initial_italics_off_nodes(collection):
-    """Return a collection like the one given, but without the
-    initial <Italics OFF> nodes
-
-    :type collection: list[_InstructionNode]
-    :rtype: list[_InstructionNode]
-    """
-    new_collection = []
-    can_add_italics_off_nodes = False
-
-    for node in collection:
-        if node.is_italics_node():
-            if node.sets_italics_on():
-                can_add_italics_off_nodes = True
-                new_collection.append(node)
-            elif can_add_italics_off_nodes:
-                new_collection.append(node)
-        else:
-            new_collection.append(node)
+    TEXT = _InstructionNode.TEXT
+    ITALICS_ON = _InstructionNode.ITALICS_ON
+    ITALICS_OFF = _InstructionNode.ITALICS_OFF
+    CHANGE_POSITION = _InstructionNode.CHANGE_POSITION
 
-    return new_collection
-
-
-def _skip_empty_text_nodes(collection):
-    """Return an iterable containing all the nodes in the previous
-    collection except for the empty text nodes
-
-    :type collection: list[_InstructionNode]
-    :rtype: list[_InstructionNode]
-    """
-    return [node for node in collection
-            if not (node.is_text_node() and node.is_empty())]
-
-
-def _skip_redundant_italics_nodes(collection):
-    """Return a list where the <Italics On> nodes only appear after
-    <Italics OFF>, and vice versa. This ignores the other node types, and
-    only removes redundant italic nodes
-
-    :type collection: list[_InstructionNode]
-    :rtype: list[_InstructionNode]
-    """
-    new_collection = []
-    state = None
-
-    for node in collection:
-        if node.is_italics_node():
-            if state is None:
-                state = node.sets_italics_on()
-                new_collection.append(node)
+    italics_on = False
+    # The position of the last <Italics ON> node of the collection, and of
+    # the last one created to reopen the italics after a repositioning
+    last_on_position = last_reopened_position = None
+    # An <Italics ON> node not yet followed by anything but an <Italics OFF>
+    # one, and the other way around
+    pending_on = pending_off = None
+
+    for node in chain(collection, (None,)):
+        if node is None:
+            # The end of the collection
+            if not italics_on:
+                nodes = ()
+            else:
+                nodes = (_InstructionNode.create_italics_style(
+                    position=last_reopened_position, turn_on=False),)
+        elif node._type == TEXT:
+            if not node.text:
                 continue
-            # skip the nodes that are like the previous
-            if node.sets_italics_on() is state:
+            nodes = (node,)
+        elif node._type == ITALICS_ON:
+            if italics_on:
                 continue
-            else:
-                state = node.sets_italics_on()
-        new_collection.append(node)
-
-    return new_collection
-
-
-def _close_italics_before_repositioning(collection):
-    """Make sure that for every opened italic node, there's a corresponding
-     closing node.
-
-     Will insert a closing italic node, before each repositioning node
-
-     :type collection: list[_InstructionNode]
-     :rtype: list[_InstructionNode]
-    """
-    new_collection = []
-
-    italics_on = False
-    last_italics_on_node = None
-
-    for idx, node in enumerate(collection):
-        if node.is_italics_node() and node.sets_italics_on():
             italics_on = True
-            last_italics_on_node = node
-        if node.is_italics_node() and node.sets_italics_off():
+            last_on_position = last_reopened_position = node.position
+            nodes = (node,)
+        elif node._type == ITALICS_OFF:
+            if not italics_on:
+                continue
             italics_on = False
-        if node.requires_repositioning() and italics_on:
-            # Append an italics closing node before the position change
-            new_collection.append(
-                _InstructionNode.create_italics_style(
-                    # The position info of this new node should be the same
-                    position=last_italics_on_node.position,
-                    turn_on=False
-                )
-            )
-            new_collection.append(node)
-            # Append an italics opening node after the positioning change
-            new_collection.append(
+            nodes = (node,)
+        elif node._type == CHANGE_POSITION and italics_on:
+            last_reopened_position = node.position
+            nodes = (
                 _InstructionNode.create_italics_style(
-                    position=node.position
-                )
+                    position=last_on_position, turn_on=False),
+                node,
+                _InstructionNode.create_italics_style(position=node.position)
             )
-            continue
-        new_collection.append(node)
-
-    return new_collection
-
-
-def _ensure_final_italics_node_closes(collection):
-    """The final italics command needs to be closed
-
-    :type collection: list[_InstructionNode]
-    :rtype: list[_InstructionNode]
-    """
-    new_collection = list(collection)
-
-    italics_on = False
-    last_italics_on_node = None
+        else:
+            nodes = (node,)
 
-    for node in collection:
-        if node.is_italics_node() and node.sets_italics_on():
-            italics_on = True
-            last_italics_on_node = node
-        if node.is_italics_node() and node.sets_italics_off():
-            italics_on = False
+        for node in nodes:
+            # Skips the <Italics ON> nodes followed by <Italics OFF> ones
+            if node._type == ITALICS_ON:
+                pending_on = node
+                continue
+            if pending_on is not None:
+                on_node, pending_on = pending_on, None
+                if node._type == ITALICS_OFF:
+                    continue
+                # Then skips the <Italics OFF> nodes followed by
+                # <Italics ON> ones
+                if pending_off is not None:
+                    pending_off = None
+                else:
+                    yield on_node
+
+            if node._type == ITALICS_OFF:
+                pending_off = node
+            else:
+                if pending_off is not None:
+                    yield pending_off
+                    pending_off = None
+                yield node
 
-    if italics_on:
-        new_collection.append(
-            _InstructionNode.create_italics_style(
-                position=last_italics_on_node.position,
-                turn_on=False
-            )
-        )
-    return new_collection
+    if pending_off is not None:
+        yield pending_off
@@ -1,8 +1,12 @@
-from copy import deepcopy
+import re
 
 from .base import (
     BaseReader, BaseWriter, CaptionSet, CaptionList, Caption, CaptionNode)
-from .exceptions import CaptionReadNoCaptions, InvalidInputError
+from .exceptions import (
+    CaptionReadNoCaptions, CaptionReadSyntaxError, InvalidInputError)
+from .timestamps import parse_srt_timestamp
+
+MULTIPLE_LINE_BREAKS = re.compile(u'\n{2,}')
 
 
 class SRTReader(BaseReader):
@@ -17,36 +21,7 @@ class SRTReader(BaseReader):
         if type(content) != unicode:
             raise InvalidInputError('The content is not a unicode string.')
 
-        lines = content.splitlines()
-        start_line = 0
-        captions = CaptionList()
-
-        while start_line < len(lines):
-            if not lines[start_line].isdigit():
-                break
-
-            end_line = self._find_text_line(start_line, lines)
-
-            timing = lines[start_line + 1].split(u'-->')
-            start = self._srttomicro(timing[0].strip(u' \r\n'))
-            end = self._srttomicro(timing[1].strip(u' \r\n'))
-
-            nodes = []
-
-            for line in lines[start_line + 2:end_line - 1]:
-                # skip extra blank lines
-                if not nodes or line != u'':
-                    nodes.append(CaptionNode.create_text(line))
-                    nodes.append(CaptionNode.create_break())
-
-            if len(nodes):
-                # remove last line break from end of caption list
-                nodes.pop()
-                caption = Caption(start, end, nodes)
-                captions.append(caption)
-
-            start_line = end_line
-
+        captions = CaptionList(self._parse_lines(content.splitlines()))
         caption_set = CaptionSet({lang: captions})
 
         if caption_set.is_empty():
@@ -54,78 +29,140 @@ class SRTReader(BaseReader):
 
         return caption_set
 
-    def _srttomicro(self, stamp):
-        timesplit = stamp.split(u':')
-        if u',' not in timesplit[2]:
-            timesplit[2] = timesplit[2] + u',000'
-        secsplit = timesplit[2].split(u',')
-        microseconds = (int(timesplit[0]) * 3600000000 +
-                        int(timesplit[1]) * 60000000 +
-                        int(secsplit[0]) * 1000000 +
-                        int(secsplit[1]) * 1000)
-
-        return microseconds
-
-    def _find_text_line(self, start_line, lines):
-        end_line = start_line
+    def iter_captions(self, fileobj):
+        """Reads the captions from a file object (or any iterable of unicode
+        lines), one line at a time, so that only the caption being read is
+        kept in memory.
+
+        :param fileobj: e.g. a file opened with io.open
+        :rtype: generator
+        :returns: The captions, as they are read
+        """
+        return self._parse_lines(self._split_lines(fileobj))
+
+    @staticmethod
+    def _split_lines(fileobj):
+        for chunk in fileobj:
+            if type(chunk) != unicode:
+                raise InvalidInputError(
+                    'The content is not a unicode string.')
+            # The lines are split the same way as read() does, e.g. on '\r'.
+            # An empty chunk is a blank line without its line break.
+            for line in chunk.splitlines() or [u'']:
+                yield line
+
+    def _parse_lines(self, lines):
+        """Turns the lines into captions.
+
+        A caption is an index line, a timing line, and the text lines up to
+        the first blank line. If there are several blank lines after the
+        text, all but the last one are part of the caption too. The reading
+        stops at the first block not starting with an index.
+
+        :type lines: iterator
+        :rtype: generator
+        """
+        lines = iter(lines)
+        line = next(lines, None)
+        while line is not None and line.isdigit():
+            timing_line = next(lines, None)
+            if timing_line is None:
+                raise CaptionReadSyntaxError(
+                    u'Missing timing line after index {}'.format(line))
+            timing = timing_line.split(u'-->')
+            start = self._srttomicro(timing[0].strip(u' \r\n'))
+            end = self._srttomicro(timing[1].strip(u' \r\n'))
 
-        found = False
-        while end_line < len(lines):
-            if lines[end_line].strip() == u"":
-                found = True
-            elif found is True:
-                end_line -= 1
-                break
-            end_line += 1
+            text_lines = []
+            blank_lines = []
+            line = None
+            for text_line in lines:
+                if text_line.strip() == u"":
+                    blank_lines.append(text_line)
+                elif blank_lines:
+                    # The first line after the blank lines starts the next
+                    # caption, and the last blank line separates them
+                    line = text_line
+                    blank_lines.pop()
+                    break
+                else:
+                    text_lines.append(text_line)
+            text_lines.extend(blank_lines)
+
+            caption = self._create_caption(start, end, text_lines)
+            if caption is not None:
+                yield caption
+
+    @staticmethod
+    def _create_caption(start, end, text_lines):
+        nodes = []
+
+        for line in text_lines:
+            # skip extra blank lines
+            if not nodes or line != u'':
+                nodes.append(CaptionNode.create_text(line))
+                nodes.append(CaptionNode.create_break())
+
+        if len(nodes):
+            # remove last line break from end of caption list
+            nodes.pop()
+            return Caption(start, end, nodes)
 
-        return end_line + 1
+    def _srttomicro(self, stamp):
+        return parse_srt_timestamp(stamp)
 
 
 class SRTWriter(BaseWriter):
     def write(self, caption_set):
-        caption_set = deepcopy(caption_set)
-
-        srt_captions = []
-
-        for lang in caption_set.get_languages():
-            srt_captions.append(
-                self._recreate_lang(caption_set.get_captions(lang))
-            )
-
-        caption_content = u'MULTI-LANGUAGE SRT\n'.join(srt_captions)
-        return caption_content
+        return u''.join(self.write_iter(caption_set))
+
+    def write_iter(self, caption_set):
+        """Writes the caption set one caption at a time.
+
+        :rtype: generator
+        :returns: The chunks of the output (joined, they give the same as
+            write())
+        """
+        for index, lang in enumerate(caption_set.get_languages()):
+            if index:
+                yield u'MULTI-LANGUAGE SRT\n'
+            for chunk in self._recreate_lang(caption_set.get_captions(lang)):
+                yield chunk
+
+    def write_to(self, caption_set, fileobj):
+        """Writes the caption set to a file object (or anything with a write
+        method taking unicode strings), one caption at a time.
+        """
+        for chunk in self.write_iter(caption_set):
+            fileobj.write(chunk)
 
     def _recreate_lang(self, captions):
-        srt = u''
-        count = 1
-
-        for caption in captions:
-            srt += u'%s\n' % count
-
+        """
+        :rtype: generator
+        :returns: A chunk for each caption
+        """
+        for count, caption in enumerate(captions, 1):
             start = caption.format_start(msec_separator=u',')
             end = caption.format_end(msec_separator=u',')
             timestamp = u'%s --> %s\n' % (start[:12], end[:12])
 
-            srt += timestamp.replace(u'.', u',')
-
-            new_content = u''
-            for node in caption.nodes:
-                new_content = self._recreate_line(new_content, node)
+            new_content = u''.join(
+                [self._recreate_line(node) for node in caption.nodes])
 
             # Eliminate excessive line breaks
-            new_content = new_content.strip()
-            while u'\n\n' in new_content:
-                new_content = new_content.replace(u'\n\n', u'\n')
-
-            srt += u"%s%s" % (new_content, u'\n\n')
-            count += 1
+            new_content = MULTIPLE_LINE_BREAKS.sub(
+                u'\n', new_content.strip())
 
-        return srt[:-1]  # remove unwanted newline at end of file
+            # The captions are separated by a blank line (there's none after
+            # the last one)
+            yield u'%s%s\n%s%s\n' % (
+                u'\n' if count > 1 else u'', count,
+                timestamp.replace(u'.', u','), new_content)
 
-    def _recreate_line(self, srt, line):
+    def _recreate_line(self, line):
         if line.type_ == CaptionNode.TEXT:
-            return srt + u'%s ' % line.content
+            return u'%s ' % line.content
         elif line.type_ == CaptionNode.BREAK:
-            return srt + u'\n'
+            return u'\n'
         else:
-            return srt
+            return u''
@@ -0,0 +1,201 @@
+"""
+Conversion of the timestamps of all the supported formats to and from
+microseconds (the unit of Caption.start and Caption.end), shared by the
+readers and the writers.
+
+The formatters work on integers (divmod) instead of going through
+datetime.timedelta.
+
+The SCC timecodes are converted to frame counts, from which the microseconds
+are computed exactly, in both the drop-frame and non-drop-frame timebases.
+"""
+import re
+
+from .exceptions import CaptionReadSyntaxError, InvalidInputError
+
+WEBVTT_TIMESTAMP_PATTERN = re.compile(u'^(\d+):(\d{2})(:\d{2})?\.(\d{3})')
+DFXP_OFFSET_TIME_PATTERN = re.compile(u'^([0-9.]+)([a-z]+)$')
+
+MICROSECONDS_PER_OFFSET_TIME_METRIC = {
+    u'h': 60 * 60 * 1000000,
+    u'm': 60 * 1000000,
+    u's': 1000000,
+    u'ms': 1000,
+}
+
+
+def microseconds(h, m, s, f):
+    """
+    Returns an integer representing a number of microseconds
+    :rtype: int
+    """
+    return (int(h) * 3600 + int(m) * 60 + int(s)) * 1000000 + int(f) * 1000
+
+
+def format_timestamp(value, msec_separator=None):
+    """Formats the microseconds as HH:MM:SS.mmm (truncated to the
+    millisecond), as used by SRT and DFXP
+
+    :param msec_separator: What to use instead of '.' before the milliseconds
+    :rtype: unicode
+    """
+    milliseconds = int(value // 1000)
+    return u'%02d:%02d:%02d%s%03d' % (
+        milliseconds // 3600000, milliseconds // 60000 % 60,
+        milliseconds // 1000 % 60, msec_separator or u'.',
+        milliseconds % 1000)
+
+
+def format_webvtt_timestamp(value):
+    """Formats the microseconds as [HH:]MM:SS.mmm (rounded to the nearest
+    millisecond). The hours are left out when there are none.
+
+    :rtype: unicode
+    """
+    milliseconds = int(round(value / 1000.0))
+    hours = milliseconds // 3600000
+    if hours:
+        return u'%02d:%02d:%02d.%03d' % (
+            hours, milliseconds // 60000 % 60, milliseconds // 1000 % 60,
+            milliseconds % 1000)
+    else:
+        return u'%02d:%02d.%03d' % (
+            milliseconds // 60000, milliseconds // 1000 % 60,
+            milliseconds % 1000)
+
+
+def parse_srt_timestamp(stamp):
+    """Parses an SRT timestamp (HH:MM:SS,mmm, the milliseconds being
+    optional)
+
+    :rtype: int
+    """
+    timesplit = stamp.split(u':')
+    seconds, _, milliseconds = timesplit[2].partition(u',')
+    return (int(timesplit[0]) * 3600000000 +
+            int(timesplit[1]) * 60000000 +
+            int(seconds) * 1000000 +
+            int(milliseconds or 0) * 1000)
+
+
+def parse_webvtt_timestamp(timestamp):
+    """Parses a WebVTT timestamp ([HH:]MM:SS.mmm)
+
+    :rtype: int
+    """
+    m = WEBVTT_TIMESTAMP_PATTERN.search(timestamp)
+    if not m:
+        raise CaptionReadSyntaxError(
+            u'Invalid timing format.')
+
+    m = m.groups()
+
+    if m[2]:
+        # Timestamp takes the form of [hours]:[minutes]:[seconds].[milliseconds]
+        return microseconds(m[0], m[1], m[2].replace(u":", u""), m[3])
+    else:
+        # Timestamp takes the form of [minutes]:[seconds].[milliseconds]
+        return microseconds(0, m[0], m[1], m[3])
+
+
+def parse_dfxp_time(stamp):
+    """Parses a DFXP time expression: either a clock-time (HH:MM:SS.fraction,
+    any frames after the seconds being ignored) or an offset-time (a number
+    followed by one of the metrics h, m, s or ms)
+
+    :rtype: int
+    """
+    if stamp[-1].isdigit():
+        timesplit = stamp.split(u':')
+        seconds, _, fraction = timesplit[2].partition(u'.')
+        # Only the milliseconds are kept
+        milliseconds = fraction[:3].ljust(3, u'0')
+        return (int(timesplit[0]) * 3600000000 +
+                int(timesplit[1]) * 60000000 +
+                int(seconds) * 1000000 +
+                int(milliseconds) * 1000)
+    else:
+        # Must be offset-time
+        m = DFXP_OFFSET_TIME_PATTERN.search(stamp)
+        if not m:
+            raise InvalidInputError(u"Invalid offset-time " + stamp)
+        metric = m.group(2)
+        try:
+            factor = MICROSECONDS_PER_OFFSET_TIME_METRIC[metric]
+        except KeyError:
+            raise InvalidInputError(
+                u"Unsupported offset-time metric " + metric)
+        return int(float(m.group(1)) * factor)
+
+
+def scc_timecode_to_frames(stamp):
+    """Parses an SCC timecode (HH:MM:SS:FF, or HH:MM:SS;FF for drop-frame)
+    into the number of frames from 00:00:00:00.
+
+    Both timebases count 30 frames per timecode second, at 29.97 frames per
+    second. To stay in step with the wall clock, the drop-frame timecodes
+    skip the frame numbers 00 and 01 of every minute, except every tenth
+    minute.
+
+    :rtype: int
+    """
+    time_split = stamp.replace(u';', u':').split(u':')
+    minutes = int(time_split[0]) * 60 + int(time_split[1])
+    frames = (minutes * 60 + int(time_split[2])) * 30 + int(time_split[3])
+    if u';' in stamp:
+        frames -= 2 * (minutes - minutes // 10)
+    return frames
+
+
+def scc_frames_to_microseconds(frames):
+    """Returns the time of the frame, rounded to the microsecond (a frame
+    lasts 1001 / 30 milliseconds)
+
+    :rtype: int
+    """
+    return (frames * 100100 + 1) // 3
+
+
+def microseconds_to_scc_frames(microseconds):
+    """Returns the number of the frame showing at the given time. The
+    microseconds scc_frames_to_microseconds returns for a frame are in the
+    frame, despite being rounded.
+
+    :rtype: int
+    """
+    return int((microseconds * 3 + 2) // 100100)
+
+
+def parse_scc_timecode(stamp, offset=0):
+    """Parses an SCC timecode (HH:MM:SS:FF, or HH:MM:SS;FF for drop-frame)
+
+    :type offset: int
+    :param offset: Subtract this many microseconds from the calculated time
+        Helpful for when the captions are off by some time interval.
+    :rtype: int
+    """
+    value = scc_frames_to_microseconds(scc_timecode_to_frames(stamp)) - offset
+    return value if value > 0 else 0
+
+
+def format_scc_timecode(microseconds, drop_frame=False):
+    """Formats the microseconds as an SCC timecode: HH:MM:SS:FF, or
+    HH:MM:SS;FF for drop-frame
+
+    :type drop_frame: bool
+    :rtype: unicode
+    """
+    frames = microseconds_to_scc_frames(microseconds)
+    separator = u':'
+    if drop_frame:
+        # Skip the frame numbers dropped since 00:00:00;00: 18 in every ten
+        # minutes (17982 frames), then 2 per minute (1798 frames) after the
+        # first minute (1800 frames) of the ten.
+        ten_minutes, frames_in_ten_minutes = divmod(frames, 17982)
+        frames += 18 * ten_minutes
+        if frames_in_ten_minutes >= 2:
+            frames += 2 * ((frames_in_ten_minutes - 2) // 1798)
+        separator = u';'
+    seconds, frames = divmod(frames, 30)
+    return u'%02d:%02d:%02d%s%02d' % (
+        seconds // 3600, seconds // 60 % 60, seconds % 60, separator, frames)
@@ -1,12 +1,15 @@
 import sys
 import re
-from copy import deepcopy
 
 from .base import (
     BaseReader, BaseWriter, CaptionSet, CaptionList, Caption, CaptionNode
 )
 
 from .geometry import Layout
+from .timestamps import (
+    WEBVTT_TIMESTAMP_PATTERN as TIMESTAMP_PATTERN, microseconds,
+    parse_webvtt_timestamp, format_webvtt_timestamp
+)
 
 from .exceptions import (
     CaptionReadError, CaptionReadSyntaxError, CaptionReadNoCaptions,
@@ -17,7 +20,6 @@ from .exceptions import (
 # (referred to as 'cue settings' in the documentation)
 # The following pattern captures [start], [end] and [cue settings] if existent
 TIMING_LINE_PATTERN = re.compile(u'^(\S+)\s+-->\s+(\S+)(?:\s+(.*?))?\s*$')
-TIMESTAMP_PATTERN = re.compile(u'^(\d+):(\d{2})(:\d{2})?\.(\d{3})')
 VOICE_SPAN_PATTERN = re.compile(u'<v(\\.\\w+)* ([^>]*)>')
 OTHER_SPAN_PATTERN = (
     re.compile(
@@ -35,13 +37,8 @@ WEBVTT_VERSION_OF = {
 
 DEFAULT_ALIGNMENT = u'middle'
 
-
-def microseconds(h, m, s, f):
-    """
-    Returns an integer representing a number of microseconds
-    :rtype: int
-    """
-    return (int(h) * 3600 + int(m) * 60 + int(s)) * 1000000 + int(f) * 1000
+# How many resolved styles WebVTTWriter keeps at most while writing
+MAX_RESOLVED_STYLES = 1024
 
 
 class WebVTTReader(BaseReader):
@@ -50,6 +47,7 @@ class WebVTTReader(BaseReader):
         :param ignore_timing_errors: Whether to ignore timing checks
         """
         self.ignore_timing_errors = ignore_timing_errors
+        self._stream = None
 
     def detect(self, content):
         return u'WEBVTT' in content
@@ -65,51 +63,47 @@ class WebVTTReader(BaseReader):
 
         return caption_set
 
+    def feed(self, text):
+        """Parses a chunk of a WebVTT stream (e.g. a live HLS segment). The
+        chunks don't need to end on a line boundary: the partial line at the
+        end of a chunk is kept until the next one.
+
+        :type text: unicode
+        :returns: The captions completed by this chunk (i.e. whose blank line
+            terminator arrived)
+        :rtype: CaptionList
+        """
+        if type(text) != unicode:
+            raise InvalidInputError('The content is not a unicode string.')
+
+        if self._stream is None:
+            self._stream = _CueParser(self)
+        return self._stream.feed(text)
+
+    def close(self):
+        """Ends the stream fed through feed(). The reader can then be used
+        for another stream.
+
+        :returns: The last caption, if it wasn't terminated by a blank line
+        :rtype: CaptionList
+        """
+        stream, self._stream = self._stream, None
+        if stream is None:
+            return CaptionList()
+        return stream.close()
+
     def _parse(self, lines):
+        parser = _CueParser(self)
         captions = CaptionList()
-        start = None
-        end = None
-        nodes = []
-        layout_info = None
-        found_timing = False
-
-        for i, line in enumerate(lines):
-
-            if u'-->' in line:
-                found_timing = True
-                timing_line = i
-                last_start_time = captions[-1].start if captions else 0
-                try:
-                    start, end, layout_info = self._parse_timing_line(
-                        line, last_start_time)
-                except CaptionReadError as e:
-                    new_message = u'%s (line %d)' % (e.args[0], timing_line)
-                    raise type(e), new_message, sys.exc_info()[2]
-
-            elif u'' == line:
-                if found_timing:
-                    if not nodes:
-                        raise CaptionReadSyntaxError(
-                            u'Cue without content. (line %d)' % timing_line)
-                    else:
-                        found_timing = False
-                        caption = Caption(
-                            start, end, nodes, layout_info=layout_info)
-                        captions.append(caption)
-                        nodes = []
-            else:
-                if found_timing:
-                    if nodes:
-                        nodes.append(CaptionNode.create_break())
-                    nodes.append(CaptionNode.create_text(
-                        self._decode(line)))
-                else:
-                    # it's a comment or some metadata; ignore it
-                    pass
+
+        for line in lines:
+            caption = parser.parse_line(line)
+            if caption is not None:
+                captions.append(caption)
 
         # Add a last caption if there are remaining nodes
-        if nodes:
-            caption = Caption(start, end, nodes, layout_info=layout_info)
+        caption = parser.finish()
+        if caption is not None:
             captions.append(caption)
 
         return captions
@@ -159,19 +153,7 @@ class WebVTTReader(BaseReader):
         """Returns an integer representing a number of microseconds
         :rtype: int
         """
-        m = TIMESTAMP_PATTERN.search(timestamp)
-        if not m:
-            raise CaptionReadSyntaxError(
-                u'Invalid timing format.')
-
-        m = m.groups()
-
-        if m[2]:
-            # Timestamp takes the form of [hours]:[minutes]:[seconds].[milliseconds]
-            return microseconds(m[0], m[1], m[2].replace(u":", u""), m[3])
-        else:
-            # Timestamp takes the form of [minutes]:[seconds].[milliseconds]
-            return microseconds(0, m[0], m[1], m[3])
+        return parse_webvtt_timestamp(timestamp)
 
     def _decode(self, s):
         """
@@ -195,9 +177,112 @@ class WebVTTReader(BaseReader):
         return s
 
 
+class _CueParser(object):
+    """Turns the lines of a WebVTT file into captions, one line at a time,
+    for WebVTTReader.
+    """
+    def __init__(self, reader):
+        """
+        :type reader: WebVTTReader
+        """
+        self.reader = reader
+        self.line_number = -1
+        self.last_start_time = 0
+        self.start = None
+        self.end = None
+        self.nodes = []
+        self.layout_info = None
+        self.found_timing = False
+        self.timing_line = None
+        # The unterminated line at the end of the last chunk
+        self.partial_line = u''
+
+    def parse_line(self, line):
+        """
+        :returns: The caption completed by this line, if any
+        :rtype: Caption
+        """
+        self.line_number += 1
+
+        if u'-->' in line:
+            self.found_timing = True
+            self.timing_line = self.line_number
+            try:
+                self.start, self.end, self.layout_info = \
+                    self.reader._parse_timing_line(line, self.last_start_time)
+            except CaptionReadError as e:
+                new_message = u'%s (line %d)' % (e.args[0], self.timing_line)
+                raise type(e), new_message, sys.exc_info()[2]
+
+        elif u'' == line:
+            if self.found_timing:
+                if not self.nodes:
+                    raise CaptionReadSyntaxError(
+                        u'Cue without content. (line %d)' % self.timing_line)
+                else:
+                    self.found_timing = False
+                    return self._create_caption()
+        else:
+            if self.found_timing:
+                if self.nodes:
+                    self.nodes.append(CaptionNode.create_break())
+                self.nodes.append(CaptionNode.create_text(
+                    self.reader._decode(line)))
+            else:
+                # it's a comment or some metadata; ignore it
+                pass
+
+    def finish(self):
+        """
+        :returns: The last caption, if there are remaining nodes
+        :rtype: Caption
+        """
+        if self.nodes:
+            return self._create_caption()
+
+    def feed(self, text):
+        """
+        :rtype: CaptionList
+        """
+        lines = (self.partial_line + text).splitlines(True)
+        self.partial_line = u''
+        # The last line is kept for later if it isn't terminated, or if it
+        # ends with a '\r' which could be the first half of a '\r\n'
+        if lines and (lines[-1].splitlines()[0] == lines[-1] or
+                      lines[-1][-1] == u'\r'):
+            self.partial_line = lines.pop()
+
+        captions = CaptionList()
+        for line in lines:
+            caption = self.parse_line(line.splitlines()[0])
+            if caption is not None:
+                captions.append(caption)
+        return captions
+
+    def close(self):
+        """
+        :rtype: CaptionList
+        """
+        captions = CaptionList()
+        for line in self.partial_line.splitlines():
+            caption = self.parse_line(line)
+            if caption is not None:
+                captions.append(caption)
+        caption = self.finish()
+        if caption is not None:
+            captions.append(caption)
+        return captions
+
+    def _create_caption(self):
+        caption = Caption(
+            self.start, self.end, self.nodes, layout_info=self.layout_info)
+        self.last_start_time = self.start
+        self.nodes = []
+        return caption
+
+
 class WebVTTWriter(BaseWriter):
     HEADER = u'WEBVTT\n\n'
-    global_layout = None
     video_width = None
     video_height = None
 
@@ -205,12 +290,29 @@ class WebVTTWriter(BaseWriter):
         """
         :type caption_set: CaptionSet
         """
-        output = self.HEADER
+        return u''.join(self.write_iter(caption_set))
 
-        if caption_set.is_empty():
-            return output
+    def write_to(self, caption_set, fileobj):
+        """Writes the caption set to a file object (or anything with a write
+        method taking unicode strings), one cue at a time.
 
-        caption_set = deepcopy(caption_set)
+        :type caption_set: CaptionSet
+        """
+        for chunk in self.write_iter(caption_set):
+            fileobj.write(chunk)
+
+    def write_iter(self, caption_set):
+        """Writes the header, then the caption set one caption at a time.
+
+        :type caption_set: CaptionSet
+        :rtype: generator
+        :returns: The chunks of the output (joined, they give the same as
+            write())
+        """
+        yield self.HEADER
+
+        if caption_set.is_empty():
+            return
 
         # TODO: styles. These go into a separate CSS file, which doesn't really
         # fit the API here. Figure that out.  Though some style stuff can be
@@ -220,22 +322,22 @@ class WebVTTWriter(BaseWriter):
         # support a single one for now.
         lang = caption_set.get_languages()[0]
 
-        self.global_layout = caption_set.get_layout_info(lang)
+        # The layout and the cache of _resolve_style belong to this call, so
+        # that the generators of several caption sets can be used at the same
+        # time
+        global_layout = caption_set.get_layout_info(lang)
+        resolved_styles = {}
 
         captions = caption_set.get_captions(lang)
-
-        return output + u'\n'.join(
-            [self._write_caption(caption_set, caption) for caption in captions])
+        for index, caption in enumerate(captions):
+            # The cues of the captions are separated by a blank line
+            if index:
+                yield u'\n'
+            yield self._write_caption(
+                caption_set, caption, global_layout, resolved_styles)
 
     def _timestamp(self, ts):
-        ts = float(ts) / 1000000
-        hours = int(ts) / 60 / 60
-        minutes = int(ts) / 60 - hours * 60
-        seconds = ts - hours * 60 * 60 - minutes * 60
-        if hours:
-            return u"%02d:%02d:%06.3f" % (hours, minutes, seconds)
-        else:
-            return u"%02d:%06.3f" % (minutes, seconds)
+        return format_webvtt_timestamp(ts)
 
     def _tags_for_style(self, style):
         if style == u'italics':
@@ -247,6 +349,34 @@ class WebVTTWriter(BaseWriter):
         else:
             return [u'', u'']
 
+    def _resolve_style(self, style, caption_set, resolved_styles=None):
+        """Returns the result of _calculate_resulting_style, which is cached
+        per style object (the style dicts are mostly shared, see
+        CaptionNode.create_style) while writing a caption set. The result
+        must not be modified.
+
+        :type resolved_styles: dict
+        :param resolved_styles: The cache of the caption set being written,
+            if any
+
+        :rtype: dict
+        """
+        if resolved_styles is None:
+            return self._calculate_resulting_style(style, caption_set)
+
+        try:
+            cached_style, resulting_style = resolved_styles[id(style)]
+            if cached_style is style:
+                return resulting_style
+        except KeyError:
+            if len(resolved_styles) >= MAX_RESOLVED_STYLES:
+                resolved_styles.clear()
+
+        resulting_style = self._calculate_resulting_style(style, caption_set)
+        # The style is kept with the result, so that its id can't be reused
+        resolved_styles[id(style)] = style, resulting_style
+        return resulting_style
+
     def _calculate_resulting_style(self, style, caption_set):
         resulting_style = {}
 
@@ -265,36 +395,42 @@ class WebVTTWriter(BaseWriter):
 
         return resulting_style
 
-    def _write_caption(self, caption_set, caption):
+    def _write_caption(self, caption_set, caption, global_layout=None,
+                       resolved_styles=None):
         """
         :type caption: Caption
+        :type global_layout: Layout
+        :param global_layout: The layout of the captions without one
+        :param resolved_styles: see _resolve_style
         """
-        layout_groups = self._layout_groups(caption.nodes, caption_set)
+        layout_groups = self._layout_groups(
+            caption.nodes, caption_set, resolved_styles)
 
         start = self._timestamp(caption.start)
         end = self._timestamp(caption.end)
         timespan = u"{} --> {}".format(start, end)
 
-        output = u''
+        output = []
 
         cue_style_tags = [u'', u'']
 
-        style = self._calculate_resulting_style(caption.style, caption_set)
+        style = self._resolve_style(
+            caption.style, caption_set, resolved_styles)
         for key, value in style.items():
             if value:
                 tags = self._tags_for_style(key)
-#                    print "tags: " + str(tags) + "\n"
                 cue_style_tags[0] += tags[0]
-                cue_style_tags[1]  = tags[1] + cue_style_tags[1]
+                cue_style_tags[1] = tags[1] + cue_style_tags[1]
 
         for cue_text, layout in layout_groups:
             if not layout:
-                layout = caption.layout_info or self.global_layout
+                layout = caption.layout_info or global_layout
             cue_settings = self._cue_settings_from(layout)
-            output += timespan + cue_settings + u'\n'
-            output += cue_style_tags[0] + cue_text + cue_style_tags[1] + u'\n'
+            output.extend([
+                timespan, cue_settings, u'\n',
+                cue_style_tags[0], cue_text, cue_style_tags[1], u'\n'])
 
-        return output
+        return u''.join(output)
 
     def _cue_settings_from(self, layout):
         """
@@ -385,10 +521,12 @@ class WebVTTWriter(BaseWriter):
 
         return cue_settings
 
-    def _layout_groups(self, nodes, caption_set):
+    def _layout_groups(self, nodes, caption_set, resolved_styles=None):
         """
         Convert a Caption's nodes to WebVTT cue or cues (depending on
         whether they have the same positioning or not).
+
+        :param resolved_styles: see _resolve_style
         """
         if not nodes:
             return []
@@ -414,7 +552,8 @@ class WebVTTWriter(BaseWriter):
                 s += self._encode(node.content) or u'&nbsp;'
                 current_layout = node.layout_info
             elif node.type_ == CaptionNode.STYLE:
-                resulting_style = self._calculate_resulting_style(node.content, caption_set)
+                resulting_style = self._resolve_style(
+                    node.content, caption_set, resolved_styles)
 
                 styles = [u'italics', u'underline', u'bold']
                 if not node.start:
@@ -0,0 +1,7 @@
+"""Benchmarks for pycaption.
+
+These are not part of the test suite. Each module can be run on its own from
+the root of the repository, e.g.:
+
+    python -m tests.benchmarks.bench_memory
+"""
@@ -0,0 +1,62 @@
+"""Measures how long the DFXP readers take on documents of growing sizes.
+
+The documents repeat the paragraphs of some tests/samples/dfxp.py fixtures
+until they have the given number of <p> tags, with increasing timings. The
+figures are in milliseconds for the whole document.
+"""
+import re
+import timeit
+
+from pycaption import DFXPReader, LxmlDFXPReader
+
+from tests.samples.dfxp import (
+    SAMPLE_DFXP, SAMPLE_DFXP_WITH_POSITIONING, SAMPLE_DFXP_MULTIPLE_REGIONS_INPUT)
+
+SIZES = [1000, 10000]
+
+FIXTURES = [
+    (u'sample', SAMPLE_DFXP),
+    (u'positioning', SAMPLE_DFXP_WITH_POSITIONING),
+    (u'regions', SAMPLE_DFXP_MULTIPLE_REGIONS_INPUT),
+]
+
+READERS = [
+    (u'html.parser', DFXPReader()),
+    (u'lxml', LxmlDFXPReader()),
+]
+
+PARAGRAPH = re.compile(u'<p .*?</p>', re.DOTALL)
+TIMING = re.compile(u'begin="[^"]*" end="[^"]*"')
+
+
+def scale_document(document, size):
+    """Returns the document with its paragraphs repeated to have `size` of
+    them, in the first div
+    """
+    paragraphs = PARAGRAPH.findall(document)
+    first, last = PARAGRAPH.search(document).start(), 0
+    for match in PARAGRAPH.finditer(document):
+        last = match.end()
+
+    scaled = []
+    for index in xrange(size):
+        timing = u'begin="%.3fs" end="%.3fs"' % (index * 2.0, index * 2.0 + 1.5)
+        paragraph = paragraphs[index % len(paragraphs)]
+        scaled.append(TIMING.sub(timing, paragraph, count=1))
+    return document[:first] + u'\n   '.join(scaled) + document[last:]
+
+
+def main():
+    print u'%-12s %-12s %6s %10s' % (u'fixture', u'reader', u'<p>', u'ms')
+    for fixture_name, fixture in FIXTURES:
+        for size in SIZES:
+            document = scale_document(fixture, size)
+            for reader_name, reader in READERS:
+                best = min(timeit.repeat(
+                    lambda: reader.read(document), number=1, repeat=3))
+                print u'%-12s %-12s %6d %10.1f' % (
+                    fixture_name, reader_name, size, best * 1000)
+
+
+if __name__ == u'__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Measures how the DFXP readers scale with the number of <p> tags.
+
+The layout of every element is resolved against the regions and the styles
+of the document, so these must not be searched in the whole tree for every
+element. The "ms/1000 <p>" column stays flat when reading is linear.
+
+The "unresolved" fixture has neither a <styling> section nor the region its
+paragraphs refer to, which are the lookups that scan the whole document when
+they fail.
+"""
+import timeit
+
+from pycaption import DFXPReader, LxmlDFXPReader
+
+from tests.benchmarks.bench_dfxp_reader import scale_document
+from tests.samples.dfxp import (
+    SAMPLE_DFXP, SAMPLE_DFXP_WITHOUT_REGION_AND_STYLE)
+
+SIZES = [1000, 2000, 4000, 8000]
+
+FIXTURES = [
+    (u'sample', SAMPLE_DFXP),
+    (u'unresolved', SAMPLE_DFXP_WITHOUT_REGION_AND_STYLE),
+]
+
+READERS = [
+    (u'html.parser', DFXPReader()),
+    (u'lxml', LxmlDFXPReader()),
+]
+
+
+def main():
+    print u'%-12s %-12s %6s %10s %14s' % (
+        u'fixture', u'reader', u'<p>', u'ms', u'ms/1000 <p>')
+    for fixture_name, fixture in FIXTURES:
+        for reader_name, reader in READERS:
+            for size in SIZES:
+                document = scale_document(fixture, size)
+                best = min(timeit.repeat(
+                    lambda: reader.read(document), number=1, repeat=3))
+                print u'%-12s %-12s %6d %10.1f %14.1f' % (
+                    fixture_name, reader_name, size, best * 1000,
+                    best * 1000000 / size)
+
+
+if __name__ == u'__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Measures the geometry objects made for region-heavy caption files.
+
+The layouts of COUNT captions are parsed from a few attribute values (as the
+DFXP reader does), then relativized and fit to the screen (as the writers
+do), then looked up in a map of unique regions (as the DFXP writer does).
+The times are in milliseconds. The last rows count the distinct objects
+which are kept alive by the layouts.
+"""
+import timeit
+
+from pycaption.base import BaseWriter
+from pycaption.geometry import Layout, Point, Stretch, Padding
+
+COUNT = 20000
+ORIGINS = [u'%dpx %dpx' % (x * 32, y * 24) for x in range(4) for y in range(5)]
+EXTENTS = [u'%d%% 10%%' % width for width in (40, 60, 80)]
+PADDINGS = [u'1px 2px', u'2c']
+
+
+def parse_layouts():
+    layouts = []
+    for index in xrange(COUNT):
+        layouts.append(Layout(
+            origin=Point.from_xml_attribute(ORIGINS[index % len(ORIGINS)]),
+            extent=Stretch.from_xml_attribute(EXTENTS[index % len(EXTENTS)]),
+            padding=Padding.from_xml_attribute(
+                PADDINGS[index % len(PADDINGS)])))
+    return layouts
+
+
+def _time(function):
+    return min(timeit.repeat(function, number=1, repeat=5)) * 1000
+
+
+def main():
+    writer = BaseWriter(video_width=640, video_height=360)
+    layouts = parse_layouts()
+    relativized = [writer._relativize_and_fit_to_screen(layout)
+                   for layout in layouts]
+    region_map = dict((layout, index)
+                      for index, layout in enumerate(set(relativized)))
+
+    def relativize():
+        for layout in layouts:
+            writer._relativize_and_fit_to_screen(layout)
+
+    def look_up_regions():
+        for layout in relativized:
+            region_map[layout]
+
+    print u'%-28s %10s' % (u'operation', u'ms')
+    print u'%-28s %10.1f' % (u'parse attributes', _time(parse_layouts))
+    print u'%-28s %10.1f' % (u'relativize and fit', _time(relativize))
+    print u'%-28s %10.1f' % (u'look up regions', _time(look_up_regions))
+
+    sizes = set()
+    for layout in layouts + relativized:
+        sizes.update(id(size) for size in (
+            layout.origin.x, layout.origin.y, layout.extent.horizontal,
+            layout.extent.vertical, layout.padding.before,
+            layout.padding.after, layout.padding.start, layout.padding.end))
+    print u'%-28s %10d' % (u'distinct Size objects', len(sizes))
+    print u'%-28s %10d' % (
+        u'distinct relativized Layouts', len(set(map(id, relativized))))
+
+
+if __name__ == u'__main__':
+    main()
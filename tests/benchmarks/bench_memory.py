@@ -0,0 +1,71 @@
+"""Measures how much memory the captions read from the sample files take.
+
+The size of every object reachable from the captions of a CaptionSet
+(captions, node lists, nodes, style dicts, texts, layouts) is added up,
+counting shared objects only once, and divided by the number of captions.
+"""
+import sys
+
+from pycaption import SRTReader, WebVTTReader, DFXPReader, SAMIReader, SCCReader
+
+from ..samples.dfxp import SAMPLE_DFXP, SAMPLE_DFXP_WITH_POSITIONING
+from ..samples.sami import SAMPLE_SAMI
+from ..samples.scc import SAMPLE_SCC_POP_ON, SAMPLE_SCC_ROLL_UP_RU2
+from ..samples.srt import SAMPLE_SRT
+from ..samples.webvtt import SAMPLE_WEBVTT
+
+SAMPLES = [
+    (u'SRT', SRTReader(), SAMPLE_SRT, {}),
+    (u'WebVTT', WebVTTReader(), SAMPLE_WEBVTT, {}),
+    (u'DFXP', DFXPReader(), SAMPLE_DFXP, {}),
+    (u'DFXP positioning', DFXPReader(), SAMPLE_DFXP_WITH_POSITIONING, {}),
+    (u'SAMI', SAMIReader(), SAMPLE_SAMI, {}),
+    (u'SCC pop-on', SCCReader(), SAMPLE_SCC_POP_ON, {}),
+    (u'SCC roll-up', SCCReader(), SAMPLE_SCC_ROLL_UP_RU2,
+     {u'simulate_roll_up': True}),
+]
+
+
+def deep_size(obj, seen):
+    """Returns the size of obj and everything reachable from it which wasn't
+    already in `seen`
+    """
+    if id(obj) in seen or obj is None or isinstance(obj, (bool, type)):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, dict):
+        for key, value in obj.iteritems():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_size(item, seen)
+    elif not isinstance(obj, (basestring, int, long, float)):
+        if hasattr(obj, u'__dict__'):
+            size += deep_size(obj.__dict__, seen)
+        for cls in type(obj).__mro__:
+            for slot in cls.__dict__.get(u'__slots__', ()):
+                if slot not in (u'__dict__', u'__weakref__'):
+                    size += deep_size(getattr(obj, slot, None), seen)
+    return size
+
+
+def main():
+    print u'%-18s %9s %16s' % (u'sample', u'captions', u'bytes/caption')
+    for name, reader, content, kwargs in SAMPLES:
+        caption_set = reader.read(content, **kwargs)
+        seen = set()
+        total_size = 0
+        total_captions = 0
+        for lang in caption_set.get_languages():
+            captions = caption_set.get_captions(lang)
+            total_captions += len(captions)
+            for caption in captions:
+                total_size += deep_size(caption, seen)
+        print u'%-18s %9d %16.1f' % (
+            name, total_captions, float(total_size) / total_captions)
+
+
+if __name__ == u'__main__':
+    main()
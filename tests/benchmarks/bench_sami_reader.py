@@ -0,0 +1,48 @@
+"""Measures how long SAMIReader takes on documents with more and more
+languages.
+
+The documents have SIZE <SYNC> tags, with a <P> tag for each of their
+languages. The figures are in milliseconds for the whole document. The last
+column divides them by the number of <P> tags, so it stays flat when the
+captions of all the languages are read in a single pass.
+"""
+import timeit
+
+from pycaption import SAMIReader
+
+SIZES = [1000, 4000]
+LANGUAGES = [(u'ENUSCC', u'en-US'), (u'FRFRCC', u'fr-FR'),
+             (u'ESESCC', u'es-ES'), (u'DEDECC', u'de-DE'),
+             (u'ITITCC', u'it-IT'), (u'PTBRCC', u'pt-BR'),
+             (u'NLNLCC', u'nl-NL'), (u'SVSECC', u'sv-SE')]
+
+
+def make_document(size, languages):
+    styles = u''.join(
+        u'.%s { lang: %s; }\n' % (name, lang) for name, lang in languages)
+    syncs = []
+    for index in xrange(size):
+        paragraphs = u''.join(
+            u'<P Class=%s>Caption %d<br/>in %s\n' % (name, index, lang)
+            for name, lang in languages)
+        syncs.append(u'<SYNC Start=%d>\n%s' % (index * 2000, paragraphs))
+    return (u'<SAMI>\n<HEAD>\n<STYLE TYPE="text/css">\n<!--\n%s-->\n'
+            u'</STYLE>\n</HEAD>\n<BODY>\n%s</BODY>\n</SAMI>\n' % (
+                styles, u''.join(syncs)))
+
+
+def main():
+    reader = SAMIReader()
+    print u'%-10s %6s %10s %12s' % (
+        u'languages', u'<SYNC>', u'ms', u'ms/1000 <P>')
+    for count in (1, 2, 4, 8):
+        for size in SIZES:
+            document = make_document(size, LANGUAGES[:count])
+            best = min(timeit.repeat(
+                lambda: reader.read(document), number=1, repeat=3))
+            print u'%-10d %6d %10.1f %12.1f' % (
+                count, size, best * 1000, best * 1000000 / (size * count))
+
+
+if __name__ == u'__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Measures how long the SAMI writer takes on multi-language caption sets.
+
+The captions of the other languages are placed in the <sync> tags of the
+first one (when they start at the same time), or in new <sync> tags inserted
+among them (when they don't). Half the captions of each language are shifted
+so both cases are measured. The figures are in milliseconds for the whole
+caption set.
+"""
+import timeit
+
+from pycaption import (
+    Caption, CaptionNode, CaptionList, CaptionSet, SAMIWriter)
+
+SIZES = [1000, 5000]
+LANGUAGES = [u'en-US', u'es-ES', u'fr-FR']
+
+
+def make_caption_set(size, languages):
+    captions = {}
+    for offset, lang in enumerate(languages):
+        caption_list = CaptionList()
+        for index in xrange(size):
+            start = index * 2000000
+            if index % 2:
+                start += offset * 100000
+            caption_list.append(Caption(start, start + 1500000, [
+                CaptionNode.create_text(u'%s caption %d' % (lang, index))]))
+        captions[lang] = caption_list
+    return CaptionSet(captions)
+
+
+def main():
+    writer = SAMIWriter()
+    print u'%-10s %9s %10s' % (u'languages', u'captions', u'ms')
+    for count in (2, 3):
+        for size in SIZES:
+            caption_set = make_caption_set(size, LANGUAGES[:count])
+            best = min(timeit.repeat(
+                lambda: writer.write(caption_set), number=1, repeat=3))
+            print u'%-10d %9d %10.1f' % (count, size, best * 1000)
+
+
+if __name__ == u'__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Measures how long the italics of the SCC buffers take to be formatted.
+
+The collections alternate texts, breaks, repositioning commands and
+(sometimes redundant) italics commands, like a heavily styled pop-on buffer
+does, until they have the given number of nodes. The figures are in
+milliseconds for formatting the whole collection.
+"""
+import timeit
+
+from pycaption.scc.specialized_collections import (
+    _InstructionNode, _format_italics)
+
+SIZES = [1000, 10000, 100000]
+
+
+def make_collection(size):
+    collection = []
+    for index in xrange(size):
+        position = (index // 8 % 15 + 1, 0)
+        kind = index % 8
+        if kind in (0, 3):
+            collection.append(
+                _InstructionNode.create_italics_style(position))
+        elif kind == 5:
+            collection.append(_InstructionNode.create_italics_style(
+                position, turn_on=False))
+        elif kind == 6:
+            collection.append(
+                _InstructionNode.create_repositioning_command(position))
+        elif kind == 7:
+            collection.append(_InstructionNode.create_break(position))
+        else:
+            collection.append(_InstructionNode.create_text(position, u'text'))
+    return collection
+
+
+def main():
+    print u'%-8s %10s' % (u'nodes', u'ms')
+    for size in SIZES:
+        collection = make_collection(size)
+        best = min(timeit.repeat(
+            lambda: list(_format_italics(collection)), number=1, repeat=5))
+        print u'%-8d %10.1f' % (size, best * 1000)
+
+
+if __name__ == u'__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Measures how fast SCCReader reads long roll-up files, in words (the
+4-hex-digit codes) per second.
+
+The files repeat the lines of SAMPLE_SCC_ROLL_UP_RU2 every 2 seconds until
+they have the given number of lines. The "decode" rows only translate the
+words of the file (without splitting the lines and parsing the timecodes).
+The "pairs" rows read the same words as CEA-608 byte pairs, a pair per frame
+(padded with null pairs), with SCCReader.read_byte_pairs.
+"""
+import struct
+import timeit
+
+from pycaption import SCCReader
+from pycaption.scc.constants import NULL_PAIR
+from pycaption.timestamps import scc_timecode_to_frames
+
+from tests.samples.scc import SAMPLE_SCC_ROLL_UP_RU2
+
+SIZES = [1000, 10000]
+
+
+def make_lines(size):
+    lines = [line.split(None, 1)[1]
+             for line in SAMPLE_SCC_ROLL_UP_RU2.splitlines()[1:]
+             if line.strip()]
+    scaled = []
+    for index in xrange(size):
+        seconds = index * 2
+        scaled.append(u'%02d:%02d:%02d;00\t%s' % (
+            seconds // 3600, seconds // 60 % 60, seconds % 60,
+            lines[index % len(lines)]))
+    return scaled
+
+
+def make_byte_pairs(lines):
+    """Returns the words of the lines as byte pairs, from the frame 0
+    """
+    pairs = []
+    for line in lines:
+        timecode, words = line.split(None, 1)
+        frame = scc_timecode_to_frames(timecode)
+        pairs.extend([NULL_PAIR] * (frame - len(pairs)))
+        pairs.extend(int(word, 16) for word in words.split())
+    return struct.pack('>%dH' % len(pairs), *pairs)
+
+
+def main():
+    print u'%-8s %6s %8s %10s %12s' % (
+        u'', u'lines', u'words', u'ms', u'words/s')
+    for size in SIZES:
+        lines = make_lines(size)
+        document = u'Scenarist_SCC V1.0\n\n' + u'\n\n'.join(lines)
+        words = [word for line in lines for word in line.split()[1:]]
+        pairs = memoryview(make_byte_pairs(lines))
+
+        def decode():
+            reader = SCCReader()
+            reader.time_translator.start_at(u'00:00:00;00')
+            for word in words:
+                reader._translate_word(word)
+
+        for name, function in [
+                (u'read', lambda: SCCReader().read(document)),
+                (u'decode', decode),
+                (u'pairs', lambda: SCCReader().read_byte_pairs(pairs))]:
+            best = min(timeit.repeat(function, number=1, repeat=3))
+            print u'%-8s %6d %8d %10.1f %12.0f' % (
+                name, size, len(words), best * 1000, len(words) / best)
+
+
+if __name__ == u'__main__':
+    main()
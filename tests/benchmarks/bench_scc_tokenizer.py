@@ -0,0 +1,32 @@
+"""Measures how long the lines of a 3-hour SCC roll-up file take to be split
+into their timecodes and words.
+
+The file repeats the lines of SAMPLE_SCC_ROLL_UP_RU2 every 2 seconds, as in
+bench_scc_reader. The "read" row is the whole SCCReader.read call, for
+comparison. The figures are in milliseconds.
+"""
+import timeit
+
+from pycaption import SCCReader
+from pycaption.scc import _tokenize_lines
+
+from tests.benchmarks.bench_scc_reader import make_lines
+
+HOURS = 3
+
+
+def main():
+    lines = make_lines(HOURS * 3600 // 2)
+    document = u'Scenarist_SCC V1.0\n\n' + u'\n\n'.join(lines)
+    document_lines = document.splitlines()[1:]
+
+    print u'%-10s %6s %10s' % (u'', u'lines', u'ms')
+    for name, function in [
+            (u'tokenize', lambda: list(_tokenize_lines(document_lines))),
+            (u'read', lambda: SCCReader().read(document))]:
+        best = min(timeit.repeat(function, number=1, repeat=5))
+        print u'%-10s %6d %10.1f' % (name, len(lines), best * 1000)
+
+
+if __name__ == u'__main__':
+    main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Measures how long SCCWriter takes on caption sets of long captions.
+
+Each caption has 4 lines of text, with some special characters (which take
+a whole word), so the writer emits about 70 words per caption. The figures
+are in milliseconds for the whole caption set.
+"""
+import timeit
+
+from pycaption import (
+    Caption, CaptionNode, CaptionList, CaptionSet, SCCWriter)
+
+SIZES = [1000, 10000, 20000]
+
+LINES = [
+    u'The caption number %d, which is',
+    u'long enough to be wrapped by the',
+    u'writer \xbd way through, with caf\xe9s',
+    u'and \xae or ♪ special characters',
+]
+
+
+def make_caption_set(size):
+    captions = []
+    for index in xrange(size):
+        start = index * 4000000
+        nodes = []
+        for line in LINES:
+            if nodes:
+                nodes.append(CaptionNode.create_break())
+            nodes.append(CaptionNode.create_text(
+                line % index if u'%d' in line else line))
+        captions.append(Caption(start, start + 3000000, nodes))
+    return CaptionSet({u'en-US': CaptionList(captions)})
+
+
+def main():
+    writer = SCCWriter()
+    print u'%9s %10s' % (u'captions', u'ms')
+    for size in SIZES:
+        caption_set = make_caption_set(size)
+        best = min(timeit.repeat(
+            lambda: writer.write(caption_set), number=1, repeat=3))
+        print u'%9d %10.1f' % (size, best * 1000)
+
+
+if __name__ == u'__main__':
+    main()
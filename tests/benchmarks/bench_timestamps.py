@@ -0,0 +1,51 @@
+"""Measures how long formatting and parsing timestamps takes, through the
+methods the readers and writers call for every caption.
+
+The timestamps go up by 1.5 seconds, and each end time is the start of the
+next caption (as in most caption files). The figures are in microseconds per
+call.
+"""
+import timeit
+
+from pycaption import (
+    Caption, CaptionNode, SRTReader, WebVTTReader, WebVTTWriter, DFXPReader)
+from pycaption.scc import SCCWriter, _SccTimeTranslator
+
+COUNT = 20000
+TIMES = [index * 1500000 + 1000 for index in xrange(COUNT)]
+CAPTION = Caption(0, 1000, [CaptionNode.create_text(u'Text')])
+SRT_STAMPS = [CAPTION._format_timestamp(time, u',') for time in TIMES]
+DFXP_STAMPS = [stamp.replace(u',', u'.') for stamp in SRT_STAMPS]
+REPEATED_SRT_STAMPS = [stamp for stamp in SRT_STAMPS for _ in (0, 1)]
+SCC_STAMPS = [SCCWriter._format_timestamp(time) for time in TIMES]
+
+
+def _run(name, function, arguments):
+    def loop():
+        for argument in arguments:
+            function(argument)
+    best = min(timeit.repeat(loop, number=1, repeat=15))
+    print u'%-28s %8.3f' % (name, best * 1000000 / len(arguments))
+
+
+def main():
+    webvtt_reader = WebVTTReader()
+    webvtt_writer = WebVTTWriter()
+    srt_reader = SRTReader()
+    dfxp_reader = DFXPReader()
+
+    print u'%-28s %8s' % (u'operation', u'us/call')
+    _run(u'format (SRT, DFXP)', CAPTION._format_timestamp, TIMES)
+    _run(u'format (WebVTT)', webvtt_writer._timestamp, TIMES)
+    _run(u'format (SCC)', SCCWriter._format_timestamp, TIMES)
+    _run(u'parse (SRT)', srt_reader._srttomicro, SRT_STAMPS)
+    _run(u'parse (SRT) twice', srt_reader._srttomicro, REPEATED_SRT_STAMPS)
+    _run(u'parse (WebVTT)', webvtt_reader._parse_timestamp, DFXP_STAMPS)
+    _run(u'parse (DFXP)', dfxp_reader._translate_time, DFXP_STAMPS)
+    _run(u'parse (SCC)',
+         lambda stamp: _SccTimeTranslator._translate_time(stamp, 0),
+         SCC_STAMPS)
+
+
+if __name__ == u'__main__':
+    main()
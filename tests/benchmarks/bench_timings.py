@@ -0,0 +1,55 @@
+"""Measures the time operations on the captions of a caption set: reading
+their times, CaptionSet.adjust_caption_timing, and (where available) the
+retiming edits and the interval index.
+
+The caption set has a single language, with captions of 1.5 seconds one
+after another. The figures are in milliseconds for the whole caption set.
+"""
+import timeit
+
+from pycaption import Caption, CaptionList, CaptionNode, CaptionSet
+
+COUNT = 100000
+
+
+def make_caption_set(count=COUNT):
+    node = CaptionNode.create_text(u'Text')
+    return CaptionSet({u'en-US': CaptionList([
+        Caption(index * 1500000, index * 1500000 + 1400000, [node])
+        for index in xrange(count)])})
+
+
+def _run(name, function):
+    best = min(timeit.repeat(function, number=1, repeat=10))
+    print u'%-28s %10.1f' % (name, best * 1000)
+
+
+def main():
+    caption_set = make_caption_set()
+    captions = caption_set.get_captions(u'en-US')
+
+    def read_times():
+        for caption in captions:
+            caption.start
+            caption.end
+
+    print u'%-28s %10s' % (u'operation', u'ms')
+    _run(u'read start/end', read_times)
+    _run(u'adjust_caption_timing',
+         lambda: caption_set.adjust_caption_timing(offset=1000))
+    _run(u'adjust_caption_timing skew',
+         lambda: caption_set.adjust_caption_timing(rate_skew=1.0001))
+
+    if hasattr(caption_set, u'retime'):
+        from pycaption.base import CutSegment, InsertSegment
+        _run(u'retime with edits', lambda: make_caption_set().retime(
+            edits=[CutSegment(60000000, 90000000),
+                   InsertSegment(120000000, 30000000)]))
+        _run(u'make_caption_set (setup)', make_caption_set)
+        _run(u'captions_between x1000', lambda: [
+            captions.captions_between(time, time + 5000000)
+            for time in xrange(0, 1000 * 1500000, 1500000)])
+
+
+if __name__ == u'__main__':
+    main()
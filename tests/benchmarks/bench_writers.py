@@ -0,0 +1,50 @@
+"""Measures how long the writers take on caption sets of growing sizes.
+
+The captions have two lines of text each. The figures are in milliseconds
+for the whole caption set, so a linear writer takes 10 times longer for 10
+times more captions.
+"""
+import timeit
+
+from pycaption import (
+    Caption, CaptionNode, CaptionList, CaptionSet, DFXPWriter, SRTWriter,
+    WebVTTWriter)
+
+SIZES = [1000, 10000, 50000]
+
+WRITERS = [
+    (u'SRT', SRTWriter()),
+    (u'WebVTT', WebVTTWriter()),
+    (u'DFXP', DFXPWriter()),
+]
+
+
+def make_caption_set(size):
+    captions = []
+    for index in xrange(size):
+        start = index * 2000000
+        captions.append(Caption(start, start + 1500000, [
+            CaptionNode.create_text(u'Caption number %d' % index),
+            CaptionNode.create_break(),
+            CaptionNode.create_style(True, {u'class': u'italic'}),
+            CaptionNode.create_text(u'with a second line of text'),
+            CaptionNode.create_style(False, {u'class': u'italic'}),
+        ], style={u'class': u'speaker'}))
+    return CaptionSet({u'en-US': CaptionList(captions)}, styles={
+        u'italic': {u'italics': True},
+        u'speaker': {u'class': u'italic', u'color': u'#ffffff'},
+    })
+
+
+def main():
+    caption_sets = [(size, make_caption_set(size)) for size in SIZES]
+    print u'%-8s %9s %10s' % (u'writer', u'captions', u'ms')
+    for name, writer in WRITERS:
+        for size, caption_set in caption_sets:
+            best = min(timeit.repeat(
+                lambda: writer.write(caption_set), number=1, repeat=3))
+            print u'%-8s %9d %10.1f' % (name, size, best * 1000)
+
+
+if __name__ == u'__main__':
+    main()
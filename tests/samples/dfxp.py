@@ -861,21 +861,21 @@ SAMPLE_DFXP_FROM_SCC_OUTPUT = """<?xml version="1.0" encoding="utf-8"?>
    <p begin="00:00:09.743" end="00:00:11.745" region="r6" style="default">
     qrqr
    </p>
-   <p begin="00:00:11.745" end="00:00:20.100" region="r7" style="default">
+   <p begin="00:00:11.745" end="00:00:20.120" region="r7" style="default">
     stst<br/>
     uvuv<br/>
     wxwx
    </p>
-   <p begin="00:00:20.100" end="00:00:22.100" region="r8" style="default">
+   <p begin="00:00:20.120" end="00:00:22.122" region="r8" style="default">
     yzyz
    </p>
-   <p begin="00:00:20.100" end="00:00:22.100" region="r9" style="default">
+   <p begin="00:00:20.120" end="00:00:22.122" region="r9" style="default">
     0101
    </p>
-   <p begin="00:00:20.100" end="00:00:22.100" region="r10" style="default">
+   <p begin="00:00:20.120" end="00:00:22.122" region="r10" style="default">
     2323
    </p>
-   <p begin="00:00:22.100" end="00:00:36.202" region="r11" style="default">
+   <p begin="00:00:22.122" end="00:00:36.202" region="r11" style="default">
     4545<br/>
     6767<br/>
     8989
@@ -902,31 +902,31 @@ SAMPLE_DFXP_WITH_PROPERLY_CLOSING_SPANS_OUTPUT = """\
  </head>
  <body>
   <div region="bottom" xml:lang="en-US">
-   <p begin="00:01:31.400" end="00:01:35.666" region="r0" style="default">
+   <p begin="00:01:31.424" end="00:01:35.695" region="r0" style="default">
     cccccc<br/>
     c!c!
    </p>
-   <p begin="00:01:35.666" end="00:01:40.866" region="r1" style="default">
+   <p begin="00:01:35.695" end="00:01:40.900" region="r1" style="default">
     bbbb
    </p>
-   <p begin="00:01:35.666" end="00:01:40.866" region="r2" style="default">
+   <p begin="00:01:35.695" end="00:01:40.900" region="r2" style="default">
     <span tts:fontStyle="italic" region="r2">cccc<br/>
     bbaa</span>
    </p>
-   <p begin="00:01:55.800" end="00:01:59.533" region="r0" style="default">
+   <p begin="00:01:55.849" end="00:01:59.586" region="r0" style="default">
     aa
    </p>
-   <p begin="00:01:55.800" end="00:01:59.533" region="r3" style="default">
+   <p begin="00:01:55.849" end="00:01:59.586" region="r3" style="default">
     <span tts:fontStyle="italic" region="r3">bb<br/>
     cc</span>
    </p>
-   <p begin="00:01:59.533" end="00:01:59.533" region="r3" style="default">
+   <p begin="00:01:59.586" end="00:01:59.586" region="r3" style="default">
     abcd
    </p>
-   <p begin="00:01:59.533" end="00:01:59.533" region="r4" style="default">
+   <p begin="00:01:59.586" end="00:01:59.586" region="r4" style="default">
     abcd
    </p>
-   <p begin="00:01:59.533" end="00:01:59.700" region="r4" style="default">
+   <p begin="00:01:59.586" end="00:01:59.752" region="r4" style="default">
     dddd
    </p>
   </div>
@@ -1124,3 +1124,25 @@ DFXP_WITH_ALTERNATIVE_TIMING_FORMATS = u"""\
     </div>
 </body>
 </tt>"""
+
+SAMPLE_DFXP_FROM_WEBVTT_WITH_INLINE_POSITIONING = """<?xml version="1.0" encoding="utf-8"?>
+<tt xml:lang="en" xmlns="http://www.w3.org/ns/ttml" xmlns:tts="http://www.w3.org/ns/ttml#styling">
+ <head>
+  <styling>
+   <style tts:color="white" tts:fontFamily="monospace" tts:fontSize="1c" xml:id="default"/>
+  </styling>
+  <layout>
+   <region tts:displayAlign="after" tts:textAlign="center" xml:id="bottom"/>
+  </layout>
+ </head>
+ <body>
+  <div region="bottom" tts:displayAlign="bottom" tts:textAlign="center" xml:lang="en-US">
+   <p begin="00:00:01.000" end="00:00:06.000" region="bottom" style="default" tts:displayAlign="bottom" tts:textAlign="center">
+    37% 74% - NARRATOR:
+   </p>
+   <p begin="00:00:01.000" end="00:00:06.000" region="bottom" style="default" tts:displayAlign="bottom" tts:textAlign="center">
+    They built the largest,
+   </p>
+  </div>
+ </body>
+</tt>"""
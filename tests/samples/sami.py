@@ -425,3 +425,100 @@ SAMPLE_SAMI_WITH_LANG = u"""
 </body>
 </sami>
 """
+
+SAMPLE_SAMI_WITH_CSS_ID_STYLE_NOT_RELATIVIZED = u"""<sami>
+ <head>
+  <style type="text/css">
+   <!--
+    .styleitalic {
+     margin-top: 2pt;
+     margin-right: 1pt;
+     font-style: italic;
+     margin-bottom: 2pt;
+     margin-left: 1pt;
+    }
+
+    .encc {
+     lang: en-US;
+     name: English;
+     margin-left: 1pt;
+     margin-bottom: 2pt;
+     margin-top: 2pt;
+     margin-right: 1pt;
+     sami_type: CC;
+    }
+
+    .styleunderline {
+     margin-top: 2pt;
+     margin-left: 1pt;
+     margin-bottom: 2pt;
+     text-decoration: underline;
+     margin-right: 1pt;
+    }
+
+    p {
+     font-size: 10pt;
+     font-weight: normal;
+     color: #ffeedd;
+     margin-left: 1pt;
+     margin-bottom: 2pt;
+     margin-top: 2pt;
+     margin-right: 1pt;
+     font-family: Arial;
+     font-style: normal;
+     text-align: center;
+    }
+
+    .stylebold {
+     margin-top: 2pt;
+     font-weight: bold;
+     margin-left: 1pt;
+     margin-bottom: 2pt;
+     margin-right: 1pt;
+    }
+
+    .styleitalicboldunderline {
+     margin-bottom: 2pt;
+     margin-left: 1pt;
+     text-decoration: underline;
+     margin-top: 2pt;
+     margin-right: 1pt;
+     font-weight: bold;
+     font-style: italic;
+    }
+   -->
+  </style>
+ </head>
+ <body>
+  <sync start="9209">
+   <p class="en-US" p_style="class:styleitalic;">
+    This is in italics.
+   </p>
+  </sync>
+  <sync start="12312">
+   <p class="en-US">
+    &nbsp;
+   </p>
+  </sync>
+  <sync start="14848">
+   <p class="en-US" p_style="class:styleunderline;">
+    This is underlined.
+   </p>
+  </sync>
+  <sync start="17000">
+   <p class="en-US" p_style="class:stylebold;">
+    This is bold.
+   </p>
+  </sync>
+  <sync start="18752">
+   <p class="en-US">
+    &nbsp;
+   </p>
+  </sync>
+  <sync start="20887">
+   <p class="en-US" p_style="class:styleitalicboldunderline;">
+    This is everything together.
+   </p>
+  </sync>
+ </body>
+</sami>"""
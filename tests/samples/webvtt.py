@@ -236,7 +236,7 @@ They built the largest,
 SAMPLE_WEBVTT_FROM_SCC_PROPERLY_WRITES_NEWLINES_OUTPUT = u"""\
 WEBVTT
 
-21:30.033 --> 21:34.033 align:left position:12.5%,start line:86.67% size:87.5%
+21:30.055 --> 21:34.055 align:left position:12.5%,start line:86.67% size:87.5%
 aa
 bb
 """
@@ -1,6 +1,11 @@
+import pickle
 import unittest
+from copy import deepcopy
+from random import Random
 
-from pycaption.base import CaptionList
+from pycaption import base
+from pycaption.base import (
+    CaptionList, CaptionSet, Caption, CaptionNode, CutSegment, InsertSegment)
 
 
 class CaptionListTestCase(unittest.TestCase):
@@ -40,3 +45,260 @@ class CaptionListTestCase(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             newcaps = self.caps + CaptionList([4], layout_info="Other Layout")
+
+
+class CaptionSetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.caption = Caption(
+            1000, 2000, [CaptionNode.create_text(u'Hello')],
+            style={u'class': u'p'}, layout_info=u'Caption Layout')
+        self.caption_set = CaptionSet(
+            {u'en': CaptionList([self.caption], layout_info=u'My Layout')},
+            styles={u'p': {u'text-align': u'center'}})
+
+    def test_copy_shares_the_captions(self):
+        copied = self.caption_set.copy()
+        captions = copied.get_captions(u'en')
+        self.assertIsNot(captions, self.caption_set.get_captions(u'en'))
+        self.assertIs(captions[0], self.caption)
+        self.assertEqual(copied.get_layout_info(u'en'), u'My Layout')
+        self.assertEqual(copied.get_style(u'p'), {u'text-align': u'center'})
+
+    def test_changing_the_copy_leaves_the_original_untouched(self):
+        copied = self.caption_set.copy()
+        captions = copied.get_captions(u'en')
+        captions[0] = captions[0].copy_with(start=5000, layout_info=None)
+        captions.append(self.caption)
+        copied.set_layout_info(u'en', None)
+        copied.add_style(u'span', {})
+
+        self.assertEqual(len(self.caption_set.get_captions(u'en')), 1)
+        self.assertEqual(self.caption.start, 1000)
+        self.assertEqual(self.caption.layout_info, u'Caption Layout')
+        self.assertEqual(self.caption_set.get_layout_info(u'en'), u'My Layout')
+        self.assertEqual(self.caption_set.get_style(u'span'), {})
+        self.assertEqual(len(self.caption_set.get_styles()), 1)
+
+    def test_copy_with_shares_nodes_and_style(self):
+        caption = self.caption.copy_with(end=3000)
+        self.assertEqual((caption.start, caption.end), (1000, 3000))
+        self.assertIs(caption.nodes, self.caption.nodes)
+        self.assertIs(caption.style, self.caption.style)
+        self.assertEqual(self.caption.end, 2000)
+
+
+class CaptionNodeTestCase(unittest.TestCase):
+
+    def test_break_nodes_are_shared(self):
+        self.assertIs(CaptionNode.create_break(), CaptionNode.create_break())
+        self.assertIs(CaptionNode.create_break(layout_info=u'Layout'),
+                      CaptionNode.create_break(layout_info=u'Layout'))
+        self.assertIsNot(CaptionNode.create_break(),
+                         CaptionNode.create_break(layout_info=u'Layout'))
+
+    def test_copy_with_keeps_break_nodes_shared(self):
+        node = CaptionNode.create_break().copy_with(layout_info=u'Layout')
+        self.assertIs(node, CaptionNode.create_break(layout_info=u'Layout'))
+        self.assertIsNone(CaptionNode.create_break().layout_info)
+
+    def test_equal_styles_are_shared(self):
+        first = CaptionNode.create_style(True, {u'italics': True})
+        second = CaptionNode.create_style(False, {u'italics': True})
+        self.assertIs(first.content, second.content)
+        self.assertEqual((first.start, second.start), (True, False))
+
+    def test_nodes_are_compact(self):
+        node = CaptionNode.create_text(u'Hello')
+        self.assertFalse(hasattr(node, u'__dict__'))
+        with self.assertRaises(AttributeError):
+            node.other = 1
+
+
+class CaptionListTimingsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.captions = CaptionList([
+            Caption(3000, 4000, [CaptionNode.create_text(u'c')]),
+            Caption(-1000, 2500, [CaptionNode.create_text(u'a')]),
+            Caption(2000, 3000, [CaptionNode.create_text(u'b')]),
+        ], layout_info=u'My Layout')
+
+    def _times(self):
+        return [(caption.start, caption.end) for caption in self.captions]
+
+    def test_columns_are_stored_to_the_captions(self):
+        timings = self.captions.get_timings()
+        self.assertEqual(list(timings.starts), [3000, -1000, 2000])
+
+        timings.insert(2500, 100)
+        self.assertEqual(self.captions[0].end, 4000)
+        timings.store()
+        self.assertEqual(self._times(),
+                         [(3100, 4100), (-1000, 2500), (2000, 2500)])
+
+    def test_floats_are_kept(self):
+        timings = self.captions.get_timings()
+        timings.insert(3000, 0.5)
+        timings.store()
+        self.assertEqual(self.captions[0].end, 4000.5)
+        self.assertEqual(self.captions[2].start, 2000)
+
+    def test_integers_are_kept(self):
+        caption = Caption(2 ** 62, 2 ** 62 + 1,
+                          [CaptionNode.create_text(u'far')])
+        self.captions.append(caption)
+        self.captions.retime(edits=[InsertSegment(0, 2 ** 62)])
+        self.assertEqual((caption.start, caption.end), (2 ** 63, 2 ** 63 + 1))
+        self.assertEqual(self.captions[0].end, 2 ** 62 + 4000)
+
+    def test_integers_are_kept_without_64_bit_arrays(self):
+        typecode = base._INTEGER_TYPECODE
+        base._INTEGER_TYPECODE = None
+        try:
+            self.captions.retime(edits=[CutSegment(0, 1000)])
+        finally:
+            base._INTEGER_TYPECODE = typecode
+        self.assertEqual(self._times(), [(2000, 3000), (1000, 2000)])
+        self.assertTrue(isinstance(self.captions[0].start, (int, long)))
+
+    def test_shift_and_scale(self):
+        self.captions.shift_and_scale(offset=500, rate_skew=2)
+        self.assertEqual(
+            self._times(), [(6500, 8500), (-1500, 5500), (4500, 6500)])
+        self.assertTrue(isinstance(self.captions[0].start, (int, long)))
+
+        self.captions.shift_and_scale(rate_skew=0.5)
+        self.assertEqual(
+            self._times(), [(3250, 4250), (-750, 2750), (2250, 3250)])
+        self.assertTrue(isinstance(self.captions[0].start, float))
+
+    def test_removed_captions_are_not_moved(self):
+        caption = self.captions.pop()
+
+        self.captions.shift_and_scale(offset=1000)
+        self.assertEqual(self._times(), [(4000, 5000), (0, 3500)])
+        self.assertEqual((caption.start, caption.end), (2000, 3000))
+
+    def test_remove_negative_starts(self):
+        self.assertEqual(self.captions.remove_negative_starts(), 1)
+        self.assertEqual(self._times(), [(3000, 4000), (2000, 3000)])
+        self.assertEqual(self.captions.layout_info, u'My Layout')
+
+    def test_sort_by_start(self):
+        self.captions.sort_by_start()
+        self.assertEqual(
+            self._times(), [(-1000, 2500), (2000, 3000), (3000, 4000)])
+
+    def test_find_overlaps(self):
+        first, second, third = self.captions
+        self.assertEqual(self.captions.find_overlaps(), [(second, third)])
+
+    def test_caption_present_twice(self):
+        captions = self.captions * 2
+        # Like in adjust_caption_timing, it's moved each time
+        captions.shift_and_scale(offset=1000)
+        self.assertEqual(captions[0].start, 5000)
+        captions[0].start = 0
+        self.assertEqual(captions.remove_negative_starts(), 0)
+        self.assertEqual(captions[3].start, 0)
+
+        # The edits work on the columns, so it's moved once
+        captions.retime(edits=[InsertSegment(0, 1000)])
+        self.assertEqual(captions[0].start, 1000)
+
+    def test_copies_are_independent(self):
+        self.captions.captions_at(3000)
+        copied_captions = deepcopy(self.captions)
+        copied_captions[0].start = 0
+        self.assertEqual(self.captions[0].start, 3000)
+        self.assertEqual(copied_captions.captions_at(500),
+                         [copied_captions[1], copied_captions[0]])
+        self.assertEqual(self.captions.captions_at(500), [self.captions[1]])
+
+    def test_adjust_caption_timing(self):
+        caption_set = CaptionSet({u'en': self.captions})
+        caption_set.adjust_caption_timing(offset=-2000, rate_skew=2.0)
+        self.assertEqual(
+            [(caption.start, caption.end)
+             for caption in caption_set.get_captions(u'en')],
+            [(4000.0, 6000.0), (2000.0, 4000.0)])
+
+    def test_adjust_caption_timing_keeps_the_layout(self):
+        caption_set = CaptionSet({u'en': self.captions})
+        caption_set.adjust_caption_timing(offset=1000)
+        captions = caption_set.get_captions(u'en')
+        self.assertTrue(captions is self.captions)
+        self.assertEqual(captions.layout_info, u'My Layout')
+
+    def test_retime_with_a_cut(self):
+        caption_set = CaptionSet({u'en': self.captions})
+        result = caption_set.retime(
+            offset=1000, edits=[CutSegment(3000, 4000)])
+        self.assertEqual(result, (1, 1))
+        self.assertEqual(self._times(), [(3000, 4000), (0, 3000)])
+
+    def test_retime_with_an_insertion(self):
+        result = self.captions.retime(edits=[InsertSegment(2000, 500)])
+        self.assertEqual(result, (1, 0))
+        self.assertEqual(self._times(), [(3500, 4500), (2500, 3500)])
+
+    def test_retime_edits_refer_to_the_same_timeline(self):
+        self.captions.retime(
+            edits=[CutSegment(0, 1000), InsertSegment(3000, 1000)])
+        self.assertEqual(self._times(), [(3000, 4000), (1000, 2000)])
+
+
+class CaptionListIntervalIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        random = Random(42)
+        self.captions = CaptionList()
+        for _ in range(300):
+            start = random.randint(0, 1000)
+            self.captions.append(Caption(
+                start, start + random.randint(0, 50),
+                [CaptionNode.create_text(u'text')]))
+
+    def test_captions_at(self):
+        for time in range(-10, 1060, 7):
+            expected = [caption for caption in self.captions
+                        if caption.start <= time < caption.end]
+            self.assertEqual(
+                sorted(expected, key=lambda caption: caption.start),
+                self.captions.captions_at(time))
+
+    def test_captions_between(self):
+        for start, end in [(-10, 0), (0, 100), (250, 251), (500, 499),
+                           (990, 2000), (-5, 1500)]:
+            expected = [caption for caption in self.captions
+                        if caption.start < end and caption.end > start and
+                        caption.start < caption.end]
+            self.assertEqual(
+                sorted(expected, key=lambda caption: caption.start),
+                self.captions.captions_between(start, end))
+
+    def test_index_follows_the_changes(self):
+        caption = self.captions[0]
+        self.assertIn(caption, self.captions.captions_at(caption.start))
+        caption.start = caption.end = 5000
+        self.assertNotIn(caption, self.captions.captions_at(caption.start))
+
+        caption.end = 5010
+        self.assertEqual(self.captions.captions_at(5000), [caption])
+
+        self.captions.shift_and_scale(offset=10000)
+        self.assertEqual(len(self.captions.captions_between(0, 5000)), 0)
+
+        new_caption = Caption(0, 10, [CaptionNode.create_text(u'new')])
+        self.captions.append(new_caption)
+        self.assertEqual(self.captions.captions_at(5), [new_caption])
+
+    def test_indexed_captions_are_copied_as_captions(self):
+        self.captions.captions_at(0)
+        caption = self.captions[0]
+        for copied_caption in [caption.copy_with(), deepcopy(caption),
+                               pickle.loads(pickle.dumps(caption))]:
+            self.assertIs(type(copied_caption), Caption)
+            self.assertEqual((copied_caption.start, copied_caption.end),
+                             (caption.start, caption.end))
@@ -1,11 +1,16 @@
 import unittest
 
-from pycaption import DFXPReader, CaptionReadNoCaptions
+from pycaption import (
+    DFXPReader, DFXPWriter, LxmlDFXPReader, CaptionReadNoCaptions)
+from pycaption.dfxp.base import LayoutAwareDFXPParser, LayoutInfoScraper
 from pycaption.exceptions import CaptionReadSyntaxError, InvalidInputError
 
 from .samples.dfxp import (
     SAMPLE_DFXP, SAMPLE_DFXP_EMPTY, SAMPLE_DFXP_SYNTAX_ERROR,
-    DFXP_WITH_ALTERNATIVE_TIMING_FORMATS
+    DFXP_WITH_ALTERNATIVE_TIMING_FORMATS, DFXP_WITH_ESCAPED_APOSTROPHE,
+    SAMPLE_DFXP_WITH_INHERITED_STYLE, SAMPLE_DFXP_WITH_POSITIONING,
+    SAMPLE_DFXP_INVALID_BUT_SUPPORTED_POSITIONING_INPUT,
+    SAMPLE_DFXP_MULTIPLE_REGIONS_INPUT, DFXP_STYLE_REGION_ALIGN_CONFLICT
 )
 
 
@@ -112,6 +117,119 @@ class DFXPReaderTestCase(unittest.TestCase):
         self.assertEqual(caps[1].end, 5200000)
 
 
+class LxmlDFXPReaderTestCase(unittest.TestCase):
+
+    def _assert_same_captions(self, content, read_invalid_positioning=False):
+        expected = DFXPReader(
+            read_invalid_positioning=read_invalid_positioning).read(content)
+        actual = LxmlDFXPReader(
+            read_invalid_positioning=read_invalid_positioning).read(content)
+
+        writer = DFXPWriter(relativize=False, fit_to_screen=False)
+        self.assertEqual(writer.write(expected), writer.write(actual))
+        for lang in expected.get_languages():
+            for expected_caption, caption in zip(
+                    expected.get_captions(lang), actual.get_captions(lang)):
+                self.assertEqual(expected_caption.layout_info,
+                                 caption.layout_info)
+                self.assertEqual(
+                    [node.layout_info for node in expected_caption.nodes],
+                    [node.layout_info for node in caption.nodes])
+
+    def test_same_captions_as_beautifulsoup(self):
+        for content in (SAMPLE_DFXP, SAMPLE_DFXP_WITH_INHERITED_STYLE,
+                        SAMPLE_DFXP_WITH_POSITIONING,
+                        SAMPLE_DFXP_MULTIPLE_REGIONS_INPUT,
+                        DFXP_STYLE_REGION_ALIGN_CONFLICT,
+                        DFXP_WITH_ESCAPED_APOSTROPHE,
+                        DFXP_WITH_ALTERNATIVE_TIMING_FORMATS):
+            self._assert_same_captions(content)
+
+    def test_same_invalid_positioning_as_beautifulsoup(self):
+        self._assert_same_captions(
+            SAMPLE_DFXP_INVALID_BUT_SUPPORTED_POSITIONING_INPUT,
+            read_invalid_positioning=True)
+
+    def test_invalid_markup_is_recovered(self):
+        self._assert_same_captions(SAMPLE_DFXP_SYNTAX_ERROR)
+        captions = LxmlDFXPReader().read(SAMPLE_DFXP_SYNTAX_ERROR)
+        self.assertEquals(
+            u'>>THE GENERAL ASSEMBLY\'S 2014',
+            captions.get_captions(u"en-US")[0].get_text())
+
+    def test_html_entities_are_recovered(self):
+        content = SAMPLE_DFXP.replace(u'MAN:', u'&eacute; &amp; &lt;')
+        self._assert_same_captions(content)
+
+    def test_empty_file(self):
+        self.assertRaises(
+            CaptionReadNoCaptions,
+            LxmlDFXPReader().read, SAMPLE_DFXP_EMPTY)
+
+    def test_unparsable_markup(self):
+        self.assertRaises(
+            CaptionReadSyntaxError, LxmlDFXPReader().read, u'no markup')
+
+
+class DFXPDocumentIndexTestCase(unittest.TestCase):
+
+    def test_regions_and_styles_are_indexed(self):
+        document = LayoutAwareDFXPParser(SAMPLE_DFXP)
+        index = document.document_index
+
+        self.assertIs(index.root, document.find(u'tt'))
+        self.assertIs(index.styling_section, document.find(u'styling'))
+        self.assertIs(index.find_region(u'bottom'), document.find(u'region'))
+        self.assertIsNone(index.find_region(u'top'))
+        self.assertEqual(index.find_styles(u'p'), [document.find(u'style')])
+        self.assertEqual(index.find_styles(u'missing'), [])
+
+    def test_style_reference_chains_are_shared(self):
+        document = LayoutAwareDFXPParser(SAMPLE_DFXP_WITH_DUPLICATE_STYLE_IDS)
+        index = document.document_index
+        scraper = LayoutInfoScraper(document, index=index)
+        style = index.find_styles(u's1')[0]
+
+        chain = scraper._get_style_reference_chain(
+            style, index.styling_section)
+        self.assertEqual(chain, [style, index.find_styles(u's2')[0]])
+        self.assertIs(
+            LayoutInfoScraper(document, index=index)
+            ._get_style_reference_chain(style, index.styling_section),
+            chain)
+
+    def test_layouts_are_cached(self):
+        document = LayoutAwareDFXPParser(SAMPLE_DFXP)
+        paragraphs = document.find_all(u'p')
+
+        # The div, the first paragraph and the span with its own textAlign
+        self.assertEqual(document.layout_cache_misses, 3)
+        self.assertEqual(document.layout_cache_hits, 6)
+        for paragraph in paragraphs[1:]:
+            self.assertIs(paragraph.layout_info, paragraphs[0].layout_info)
+        self.assertEqual(
+            document.find(u'span').layout_info.alignment.serialized(),
+            (u'right', u'bottom'))
+
+    def test_inline_positioning_is_part_of_the_cache_key(self):
+        document = LayoutAwareDFXPParser(
+            SAMPLE_DFXP_INVALID_BUT_SUPPORTED_POSITIONING_INPUT,
+            read_invalid_positioning=True)
+
+        self.assertEqual(
+            [p.layout_info.serialized()[:2] for p in document.find_all(u'p')],
+            [(((17.5, u'%'), (10, u'%')), ((62.5, u'%'), (5.33, u'%'))),
+             (((20, u'%'), (15.67, u'%')), ((30, u'%'), (7.67, u'%'))),
+             (None, ((60, u'%'), (22, u'%'))),
+             (((11, u'%'), (11, u'%')), None)])
+
+    def test_duplicate_style_ids_are_refused(self):
+        self.assertRaises(
+            CaptionReadSyntaxError, DFXPReader().read,
+            SAMPLE_DFXP_WITH_DUPLICATE_STYLE_IDS.replace(
+                u'style="s1"', u'style="s0"'))
+
+
 SAMPLE_DFXP_INVALID_POSITIONING_VALUE_TEMPLATE = u"""\
 <?xml version="1.0" encoding="utf-8"?>
 <tt xml:lang="en" xmlns="http://www.w3.org/ns/ttml" xmlns:tts="http://www.w3.org/ns/ttml#styling">
@@ -155,3 +273,24 @@ SAMPLE_DFXP_MULTIPLE_CAPTIONS_WITH_THE_SAME_TIMING = u"""\
   </div>
  </body>
 </tt>"""
+
+SAMPLE_DFXP_WITH_DUPLICATE_STYLE_IDS = u"""\
+<?xml version="1.0" encoding="utf-8"?>
+<tt xml:lang="en" xmlns="http://www.w3.org/ns/ttml" xmlns:tts="http://www.w3.org/ns/ttml#styling">
+ <head>
+  <styling>
+   <style xml:id="s0" style="s3"/>
+   <style xml:id="s1" style="s2"/>
+   <style xml:id="s2" tts:textAlign="left"/>
+   <style xml:id="s3" tts:textAlign="left"/>
+   <style xml:id="s3" tts:textAlign="right"/>
+  </styling>
+ </head>
+ <body>
+  <div xml:lang="en-US">
+   <p begin="00:00:09.209" end="00:00:12.312" style="s1">
+    Some text here
+   </p>
+  </div>
+ </body>
+</tt>"""
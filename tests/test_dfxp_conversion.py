@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 
+import io
 import unittest
 
 from bs4 import BeautifulSoup
 
 from pycaption import (
-    DFXPReader, DFXPWriter, SRTWriter, SAMIWriter, WebVTTWriter)
+    DFXPReader, DFXPWriter, SRTWriter, SAMIWriter, WebVTTWriter, Caption,
+    CaptionList, CaptionNode, CaptionSet)
 
 from pycaption.dfxp.extras import LegacyDFXPWriter
 
@@ -138,6 +140,26 @@ class DFXPtoDFXPTestCase(unittest.TestCase, DFXPTestingMixIn):
         ).write(caption_set)
         self.assertEqual(result, SAMPLE_DFXP_WITH_RELATIVIZED_POSITIONING)
 
+    def test_relativization_leaves_the_caption_set_untouched(self):
+        caption_set = DFXPReader().read(
+            SAMPLE_DFXP_WITH_POSITIONING.decode('utf-8'))
+        layouts = [
+            (caption.layout_info, [node.layout_info for node in caption.nodes])
+            for caption in caption_set.get_captions(u'en-US')
+        ]
+        DFXPWriter(
+            video_width=VIDEO_WIDTH, video_height=VIDEO_HEIGHT
+        ).write(caption_set)
+
+        self.assertEqual(layouts, [
+            (caption.layout_info, [node.layout_info for node in caption.nodes])
+            for caption in caption_set.get_captions(u'en-US')
+        ])
+        # The same caption set can still be written with other settings
+        result = DFXPWriter(relativize=False, fit_to_screen=False).write(
+            caption_set)
+        self.assertIn(u'px', result)
+
     def test_fit_to_screen(self):
         # Check if caption width and height are is explicitly set and
         # recalculate it if necessary. This prevents long captions from being
@@ -157,6 +179,54 @@ class DFXPtoDFXPTestCase(unittest.TestCase, DFXPTestingMixIn):
             result
         )
 
+    def test_write_iter_gives_the_same_as_write(self):
+        caption_set = DFXPReader().read(SAMPLE_DFXP_MULTIPLE_REGIONS_INPUT)
+        writer = DFXPWriter(relativize=False, fit_to_screen=False)
+        chunks = list(writer.write_iter(caption_set))
+        self.assertTrue(len(chunks) > 3)
+        self.assertEqual(u''.join(chunks), writer.write(caption_set))
+
+    def test_write_iter_generators_can_be_interleaved(self):
+        # The documents have different styles and regions
+        caption_sets = [DFXPReader().read(SAMPLE_DFXP),
+                        DFXPReader().read(SAMPLE_DFXP_MULTIPLE_REGIONS_INPUT)]
+        writer = DFXPWriter(relativize=False, fit_to_screen=False)
+        expected = [writer.write(caption_set) for caption_set in caption_sets]
+
+        generators = [writer.write_iter(caption_set)
+                      for caption_set in caption_sets]
+        chunks = [[], []]
+        while generators[0] or generators[1]:
+            for index, generator in enumerate(generators):
+                if generator:
+                    try:
+                        chunks[index].append(next(generator))
+                    except StopIteration:
+                        generators[index] = None
+
+        self.assertEqual(
+            [u''.join(chunks[0]), u''.join(chunks[1])], expected)
+
+    def test_write_to_file_object(self):
+        caption_set = DFXPReader().read(SAMPLE_DFXP)
+        output = io.StringIO()
+        DFXPWriter().write_to(caption_set, output)
+        self.assertEqual(output.getvalue(), SAMPLE_DFXP_OUTPUT)
+
+    def test_empty_caption_set(self):
+        result = DFXPWriter().write(CaptionSet({}))
+        self.assertTrue(result.endswith(u' <body/>\n</tt>'))
+
+    def test_attribute_values_are_escaped(self):
+        caption_set = CaptionSet({u'en-US': CaptionList([
+            Caption(0, 1000000, [CaptionNode.create_text(u'a & b')],
+                    style={u'font-family': u'Bob\'s "Bar" & <Grill>'})
+        ])})
+        result = DFXPWriter().write(caption_set)
+        self.assertIn(u'tts:fontFamily="Bob\'s &quot;Bar&quot; '
+                      u'&amp; &lt;Grill&gt;"', result)
+        self.assertIn(u'\n    a &amp; b\n', result)
+
 
 class DFXPtoSRTTestCase(unittest.TestCase, SRTTestingMixIn):
 
@@ -1,7 +1,8 @@
 import unittest
 
 from pycaption import DFXPReader
-from pycaption.base import merge_concurrent_captions
+from pycaption.base import (
+    merge_concurrent_captions, CaptionSet, CaptionList, Caption, CaptionNode)
 from .samples.dfxp import DFXP_WITH_CONCURRENT_CAPTIONS
 
 
@@ -15,3 +16,51 @@ class FunctionsTestCase(unittest.TestCase):
         caption_set = merge_concurrent_captions(caption_set)
         captions = caption_set.get_captions('en-US')
         self.assertEqual(len(captions), 3)
+
+    def test_merge_concurrent_captions_which_are_not_adjacent(self):
+        captions = CaptionList([
+            Caption(0, 1000, [CaptionNode.create_text(u'a')]),
+            Caption(1000, 2000, [CaptionNode.create_text(u'b')]),
+            Caption(0, 1000, [CaptionNode.create_text(u'c')]),
+        ], layout_info=u'My Layout')
+        caption_set = merge_concurrent_captions(
+            CaptionSet({u'en': captions}))
+        merged = caption_set.get_captions(u'en')
+
+        self.assertEqual(merged.layout_info, u'My Layout')
+        self.assertEqual(
+            [caption.get_text() for caption in merged], [u'a\nc', u'b'])
+        self.assertTrue(merged[1] is captions[1])
+
+    def test_merge_near_concurrent_captions(self):
+        captions = CaptionList([
+            Caption(0, 1000, [CaptionNode.create_text(u'a')]),
+            Caption(1050, 2000, [CaptionNode.create_text(u'b')]),
+            Caption(90, 960, [CaptionNode.create_text(u'c')]),
+            Caption(1000, 2100, [CaptionNode.create_text(u'd')]),
+        ])
+        caption_set = merge_concurrent_captions(
+            CaptionSet({u'en': captions}), tolerance=100)
+        merged = caption_set.get_captions(u'en')
+
+        self.assertEqual(
+            [(caption.start, caption.end, caption.get_text())
+             for caption in merged],
+            [(0, 1000, u'a\nc'), (1050, 2000, u'b\nd')])
+
+    def test_near_concurrent_caption_joins_the_first_group(self):
+        # c is within the tolerance of both a and b (which isn't within the
+        # tolerance of a), and in the same bucket as b
+        captions = CaptionList([
+            Caption(0, 1000, [CaptionNode.create_text(u'a')]),
+            Caption(199, 1000, [CaptionNode.create_text(u'b')]),
+            Caption(100, 1000, [CaptionNode.create_text(u'c')]),
+        ])
+        caption_set = merge_concurrent_captions(
+            CaptionSet({u'en': captions}), tolerance=100)
+        merged = caption_set.get_captions(u'en')
+
+        self.assertEqual(
+            [(caption.start, caption.end, caption.get_text())
+             for caption in merged],
+            [(0, 1000, u'a\nc'), (199, 1000, u'b')])
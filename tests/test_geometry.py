@@ -1,6 +1,7 @@
 import unittest
 
-from pycaption.geometry import Size, Point, Stretch, Padding, UnitEnum, Layout
+from pycaption.geometry import (
+    Size, Point, Stretch, Padding, UnitEnum, Layout, intern_layout)
 
 class IsValidGeometryObjectTestCase(unittest.TestCase):
 
@@ -122,3 +123,60 @@ class IsRelativeTestCase(unittest.TestCase):
         self.assertFalse(layout_abs.is_relative())
         self.assertFalse(layout_mix.is_relative())
         self.assertTrue(layout_rel.is_relative())
+
+
+class FlyweightTestCase(unittest.TestCase):
+
+    def test_parsed_attributes_are_shared(self):
+        size = Size.from_string(u'5px')
+        point = Point.from_xml_attribute(u'10% 20px')
+        padding = Padding.from_xml_attribute(u'1px 2px')
+
+        self.assertIs(Size.from_string('5px'), size)
+        self.assertIs(Point.from_xml_attribute(u'10% 20px'), point)
+        self.assertIs(Padding.from_xml_attribute(u'1px 2px'), padding)
+        self.assertIs(point.y, Size.from_string(u'20px'))
+        # The class is part of the key
+        self.assertIsInstance(Stretch.from_xml_attribute(u'10% 20px'), Stretch)
+
+    def test_invalid_attributes_still_raise(self):
+        for _ in range(2):
+            self.assertRaises(ValueError, Size.from_string, u'5foo')
+            self.assertRaises(
+                ValueError, Padding.from_xml_attribute, u'1px 2px 3px 4px 5px')
+
+    def test_transformed_layouts_are_shared(self):
+        def make_layout():
+            return Layout(origin=Point.from_xml_attribute(u'64px 36px'),
+                          extent=Stretch.from_xml_attribute(u'50% 95%'))
+        layout = make_layout().as_percentage_of(640, 360)
+
+        self.assertEqual(layout.origin.serialized(),
+                         ((10, u'%'), (10, u'%')))
+        self.assertIs(make_layout().as_percentage_of(640, 360), layout)
+        self.assertIsNot(make_layout().as_percentage_of(1280, 720), layout)
+        self.assertEqual(layout.fit_to_screen().extent.serialized(),
+                         ((50, u'%'), (90, u'%')))
+        self.assertIs(
+            make_layout().as_percentage_of(640, 360).fit_to_screen(),
+            layout.fit_to_screen())
+
+    def test_fit_to_screen_keeps_webvtt_positioning(self):
+        layout = Layout(webvtt_positioning=u'align:start')
+        other = Layout(webvtt_positioning=u'align:end')
+
+        self.assertIs(layout.fit_to_screen(), layout)
+        self.assertIs(other.fit_to_screen(), other)
+
+    def test_intern_layout(self):
+        layout = intern_layout(
+            Layout(origin=Point.from_xml_attribute(u'1% 2%')))
+
+        self.assertIs(
+            intern_layout(Layout(origin=Point.from_xml_attribute(u'1% 2%'))),
+            layout)
+        self.assertIsNot(
+            intern_layout(Layout(origin=Point.from_xml_attribute(u'1% 2%'),
+                                 webvtt_positioning=u'align:start')),
+            layout)
+        self.assertIsNone(intern_layout(None))
@@ -1,6 +1,11 @@
 import unittest
 
-from pycaption import SAMIReader, CaptionReadNoCaptions
+from bs4 import BeautifulSoup
+
+from pycaption import (
+    SAMIReader, SAMIWriter, CaptionReadNoCaptions, Caption, CaptionList,
+    CaptionNode, CaptionSet)
+from pycaption.sami import SAMIParser
 
 from .samples.sami import (
     SAMPLE_SAMI, SAMPLE_SAMI_EMPTY, SAMPLE_SAMI_SYNTAX_ERROR,
@@ -78,3 +83,90 @@ class SAMIReaderTestCase(unittest.TestCase):
         caption_set = SAMIReader().read(SAMPLE_SAMI_WITH_P_AND_SPAN_ALIGN)
         caption = caption_set.get_captions('en-US')[0]
         self.assertEquals(caption.layout_info.alignment.horizontal, u'right')
+
+    def test_p_tags_are_read_for_every_language_they_match(self):
+        caption_set = SAMIReader().read(u'''<SAMI><HEAD><STYLE><!--
+            .ENUSCC { lang: en-US; }
+            --></STYLE></HEAD><BODY>
+            <SYNC Start=0><P Class=ENUSCC>American
+            <SYNC Start=1000><P lang=en-GB>British
+            <SYNC Start=2000><P Class=ENUSCC>&nbsp;
+            </BODY></SAMI>''')
+
+        self.assertEqual(
+            set(caption_set.get_languages()), set([u'en', u'en-US']))
+        self.assertEqual(
+            [caption.get_text() for caption in
+             caption_set.get_captions(u'en')],
+            [u'American', u'British'])
+        self.assertEqual(
+            [(caption.start, caption.end) for caption in
+             caption_set.get_captions(u'en-US')],
+            [(0, 2000000)])
+
+
+class SAMIWriterTestCase(unittest.TestCase):
+
+    def _write_syncs(self, captions):
+        caption_set = CaptionSet(dict(
+            (lang, CaptionList([
+                Caption(start * 1000, end * 1000,
+                        [CaptionNode.create_text(u'%s %d' % (lang, start))])
+                for start, end in timings
+            ]))
+            for lang, timings in captions.items()
+        ))
+        sami = BeautifulSoup(SAMIWriter().write(caption_set), u'html.parser')
+        return [
+            (int(sync[u'start']),
+             [p.get_text().strip() for p in sync.find_all(u'p')])
+            for sync in sami.find_all(u'sync')
+        ]
+
+    def test_syncs_of_other_languages_are_inserted_in_order(self):
+        syncs = self._write_syncs({
+            u'en-US': [(0, 1000), (2000, 3000)],
+            u'fr-FR': [(500, 1500), (2000, 2500)],
+        })
+
+        self.assertEqual(syncs, [
+            (0, [u'en-US 0']),
+            (500, [u'fr-FR 500']),
+            (1000, [u'']),
+            (1500, [u'']),
+            (2000, [u'en-US 2000', u'fr-FR 2000']),
+        ])
+
+    def test_overlapping_captions_of_the_first_language(self):
+        # The syncs of the first language aren't in chronological order, so
+        # the others are inserted after the last one starting earlier
+        syncs = self._write_syncs({
+            u'en-US': [(0, 3000), (1000, 2000)],
+            u'fr-FR': [(2000, 2500)],
+        })
+
+        self.assertEqual(syncs, [
+            (0, [u'en-US 0']),
+            (3000, [u'']),
+            (1000, [u'en-US 1000']),
+            (2000, [u'fr-FR 2000']),
+        ])
+
+
+class SAMIParserTestCase(unittest.TestCase):
+
+    def test_normalized_document(self):
+        parser = SAMIParser()
+        sami, styles, langs = parser.feed(
+            u'<sami><body><sync start=0><p lang=en-US>a &amp; b&#233;<br>c'
+            u'<sync start=10><p lang=en-US>&nbsp;</body></sami>')
+
+        self.assertEqual(
+            sami,
+            u'<sami><body><sync start="0"><p lang="en-US" lang="en">'
+            u'a & b\xe9<br/>c</p></sync><sync start="10">'
+            u'<p lang="en-US" lang="en">\xa0</p></sync></body></sami>')
+        self.assertEqual(styles, {})
+        self.assertEqual(langs, set([u'en']))
+        self.assertEqual(parser.sami, sami)
+        self.assertEqual(u''.join(parser.chunks), sami)
@@ -10,7 +10,8 @@ from .samples.dfxp import (
 )
 from .samples.sami import (
     SAMPLE_SAMI, SAMPLE_SAMI_WITH_STYLE_TAGS, SAMPLE_SAMI_WITH_CSS_INLINE_STYLE,
-    SAMPLE_SAMI_WITH_CSS_ID_STYLE, SAMPLE_SAMI_SYNTAX_ERROR,
+    SAMPLE_SAMI_WITH_CSS_ID_STYLE, SAMPLE_SAMI_WITH_CSS_ID_STYLE_NOT_RELATIVIZED,
+    SAMPLE_SAMI_SYNTAX_ERROR,
     SAMPLE_SAMI_PARTIAL_MARGINS, SAMPLE_SAMI_PARTIAL_MARGINS_RELATIVIZED,
     SAMPLE_SAMI_LANG_MARGIN, SAMPLE_SAMI_WITH_SPAN, SAMPLE_SAMI_WITH_BAD_SPAN_ALIGN,
     SAMPLE_SAMI_WITH_MULTIPLE_SPAN_ALIGNS, SAMPLE_SAMI_NO_LANG,
@@ -46,6 +47,14 @@ class SAMItoSAMITestCase(unittest.TestCase, SAMITestingMixIn):
         ).write(caption_set)
         self.assertEqual(result, SAMPLE_SAMI_PARTIAL_MARGINS_RELATIVIZED)
 
+    def test_css_is_written_in_the_same_order(self):
+        caption_set = SAMIReader().read(SAMPLE_SAMI_WITH_CSS_ID_STYLE)
+
+        result = SAMIWriter(relativize=False,
+                            fit_to_screen=False).write(caption_set)
+
+        self.assertEqual(result, SAMPLE_SAMI_WITH_CSS_ID_STYLE_NOT_RELATIVIZED)
+
 
 class SAMItoSRTTestCase(unittest.TestCase, SRTTestingMixIn):
 
@@ -1,9 +1,16 @@
 # -*- coding: utf-8 -*-
+import struct
 import unittest
 from pycaption.scc.specialized_collections import (InstructionNodeCreator,
                                                    TimingCorrectingCaptionList)
 
-from pycaption import SCCReader, CaptionReadNoCaptions
+from pycaption import (
+    SCCReader, SCCWriter, Caption, CaptionNode, CaptionReadNoCaptions)
+from pycaption.exceptions import InvalidInputError
+from pycaption.scc.constants import (
+    WORD_DECODER, DECODED_COMMAND, DECODED_SPECIAL_CHAR, DECODED_EXTENDED_CHAR,
+    DECODED_CHARACTERS, PAIR_DECODER, NULL_PAIR)
+from pycaption.timestamps import scc_timecode_to_frames
 from pycaption.scc.state_machines import DefaultProvidingPositionTracker
 
 from .samples.scc import (
@@ -72,8 +79,8 @@ class SCCReaderTestCase(unittest.TestCase):
         # captions will have to be reviewed, but until then this is good enough
         caption_set = SCCReader().read(SAMPLE_SCC_PRODUCES_BAD_LAST_END_TIME)
 
-        expected_timings = [(1408266666.6666667, 1469700000.0),
-                            (3208266666.666667, 3269700000.0)]
+        expected_timings = [(1408273533, 1469701567),
+                            (3208271733, 3269699767)]
 
         actual_timings = [
             (c_.start, c_.end) for c_ in caption_set.get_captions(u'en-US')
@@ -143,15 +150,159 @@ class SCCReaderTestCase(unittest.TestCase):
         caption_set = SCCReader().read(
             SAMPLE_SCC_PRODUCES_CAPTIONS_WITH_START_AND_END_TIME_THE_SAME
         )
-        expected_timings = [(u'00:01:35.666', u'00:01:40.866'),
-                            (u'00:01:35.666', u'00:01:40.866'),
-                            (u'00:01:35.666', u'00:01:40.866')]
+        expected_timings = [(u'00:01:35.695', u'00:01:40.900'),
+                            (u'00:01:35.695', u'00:01:40.900'),
+                            (u'00:01:35.695', u'00:01:40.900')]
 
         actual_timings = [(c_.format_start(), c_.format_end()) for c_ in
                           caption_set.get_captions('en-US')]
 
         self.assertEqual(expected_timings, actual_timings)
 
+    def test_word_decoder(self):
+        self.assertEqual(WORD_DECODER[u'9420'], (DECODED_COMMAND, u'9420'))
+        # A PAC
+        self.assertEqual(WORD_DECODER[u'9470'], (DECODED_COMMAND, u'9470'))
+        self.assertEqual(
+            WORD_DECODER[u'91b0'], (DECODED_SPECIAL_CHAR, u'\xae'))
+        self.assertEqual(
+            WORD_DECODER[u'92a1'], (DECODED_EXTENDED_CHAR, u'\xc9'))
+        self.assertEqual(
+            WORD_DECODER[u'c1c2'], (DECODED_CHARACTERS, (u'A', u'B')))
+        self.assertNotIn(u'0000', WORD_DECODER)
+
+    def test_pair_decoder(self):
+        self.assertEqual(
+            PAIR_DECODER[0x9420], (u'9420', DECODED_COMMAND, u'9420'))
+        self.assertEqual(
+            PAIR_DECODER[0xc1c2],
+            (u'c1c2', DECODED_CHARACTERS, (u'A', u'B')))
+        self.assertEqual(
+            PAIR_DECODER[NULL_PAIR], (u'8080', DECODED_CHARACTERS, (u'', u'')))
+        self.assertNotIn(0x0000, PAIR_DECODER)
+
+    def test_unrecognized_words_are_ignored(self):
+        caption_set = SCCReader().read(
+            u'Scenarist_SCC V1.0\n\n'
+            u'00:00:00;00\t94ae 94ae 9420 9420 9470 9470 c1c2 0000 43c4 '
+            u'zz 4580 942f 942f\n\n'
+            u'00:00:02;00\t942c 942c\n')
+
+        captions = caption_set.get_captions(u'en-US')
+        self.assertEqual(len(captions), 1)
+        self.assertEqual(captions[0].get_text(), u'ABCDE')
+
+    def test_words_can_be_separated_by_any_whitespace(self):
+        caption_set = SCCReader().read(
+            u'Scenarist_SCC V1.0\n\n'
+            u'00:00:00;00 \t94AE 94ae\t9420  9420 9470 9470 c1c2\t\t43c4 '
+            u'942f 942f \n\n'
+            u'00:00:02;00\t\t942c  942c\n')
+
+        captions = caption_set.get_captions(u'en-US')
+        self.assertEqual(len(captions), 1)
+        self.assertEqual(captions[0].get_text(), u'ABCD')
+        # One frame is counted per word, from the timecode of the line
+        self.assertEqual(captions[0].start, 300300)
+        self.assertEqual(captions[0].end, 2035367)
+
+
+def _to_byte_pairs(scc):
+    """Returns the pairs of the words of the SCC document, a pair per frame
+    (padded with null pairs), and the frame of the first one
+    """
+    pairs = {}
+    for line in scc.splitlines()[1:]:
+        if line.strip():
+            timecode, words = line.split(None, 1)
+            frame = scc_timecode_to_frames(timecode)
+            for word in words.split():
+                pairs[frame] = int(word, 16)
+                frame += 1
+    first, last = min(pairs), max(pairs)
+    return struct.pack('>%dH' % (last - first + 1), *[
+        pairs.get(frame, NULL_PAIR) for frame in xrange(first, last + 1)
+    ]), first
+
+
+class SCCReaderBytePairsTestCase(unittest.TestCase):
+    def _describe(self, caption_set):
+        return [
+            (caption.start, caption.end,
+             [repr(node) for node in caption.nodes],
+             repr(caption.layout_info))
+            for caption in caption_set.get_captions(u'en-US')]
+
+    def test_byte_pairs_are_read_like_the_words(self):
+        for scc in (SAMPLE_SCC_POP_ON, SAMPLE_SCC_ROLL_UP_RU2,
+                    SAMPLE_SCC_MULTIPLE_POSITIONING):
+            data, start_frame = _to_byte_pairs(scc)
+            for simulate_roll_up in (False, True):
+                self.assertEqual(
+                    self._describe(SCCReader().read_byte_pairs(
+                        memoryview(data), start_frame,
+                        simulate_roll_up=simulate_roll_up)),
+                    self._describe(SCCReader().read(
+                        scc, simulate_roll_up=simulate_roll_up)))
+
+    def test_null_pairs_only_pad_the_frames(self):
+        data = bytearray(
+            b'\x94\xae\x94\xae\x94\x20\x94\x20\x94\x70\x94\x70'
+            b'\xc1\xc2\x80\x80\x43\xc4\x00\x00\x94\x2f\x94\x2f')
+        data += b'\x80\x80' * 50 + b'\x94\x2c\x94\x2c'
+
+        caption_set = SCCReader().read_byte_pairs(data, start_frame=30)
+
+        captions = caption_set.get_captions(u'en-US')
+        self.assertEqual(len(captions), 1)
+        self.assertEqual(captions[0].get_text(), u'ABCD')
+        # The pairs are of consecutive frames, from the frame 30
+        self.assertEqual(captions[0].start, 1368033)
+        self.assertEqual(captions[0].end, 3103100)
+
+    def test_null_pairs_end_the_pending_line_break(self):
+        # The 8080 word is translated as empty characters, which end the
+        # line break of the PAC before the italics. Without it, the break
+        # would come after them.
+        scc = (u'Scenarist_SCC V1.0\n\n'
+               u'00:00:00;00\t9420 9420 94d0 94d0 c1c2 9470 9470 8080 '
+               u'91ae 91ae 43c4 942f 942f\n\n'
+               u'00:00:02;00\t942c 942c\n')
+        data, start_frame = _to_byte_pairs(scc)
+
+        caption_set = SCCReader().read_byte_pairs(data, start_frame)
+
+        self.assertEqual(self._describe(caption_set),
+                         self._describe(SCCReader().read(scc)))
+        nodes = caption_set.get_captions(u'en-US')[0].nodes
+        self.assertEqual(nodes[1].type_, CaptionNode.BREAK)
+        self.assertEqual(nodes[2].type_, CaptionNode.STYLE)
+
+    def test_odd_number_of_bytes(self):
+        self.assertRaises(
+            InvalidInputError, SCCReader().read_byte_pairs, b'\x94\x20\x94')
+
+    def test_data_must_be_a_buffer_of_bytes(self):
+        for data in (u'\x94\x20\x94\x20', [0x9420, 0x9420], None):
+            self.assertRaises(
+                InvalidInputError, SCCReader().read_byte_pairs, data)
+
+
+class SCCWriterTestCase(unittest.TestCase):
+    def test_characters_are_packed_in_words(self):
+        caption = Caption(3000000, 5000000, [
+            CaptionNode.create_text(u'Ab\xaeC'),
+            CaptionNode.create_break(),
+            CaptionNode.create_text(u'\u4e00D')])
+
+        # The basic characters take a byte, the special ones a word (after
+        # finishing the current word with 80), and the unknown ones are
+        # written as the \xa3 special character
+        self.assertEqual(
+            SCCWriter()._text_to_code(caption),
+            [u'94d0', u'94d0', u'c162', u'91b0', u'4380',
+             u'9470', u'9470', u'91b6', u'c480'])
+
 
 class CoverageOnlyTestCase(unittest.TestCase):
     """In order to refactor safely, we need coverage of 95% or more.
@@ -197,22 +348,22 @@ class CoverageOnlyTestCase(unittest.TestCase):
     def test_freeze_semicolon_spec_time(self):
         scc1 = SCCReader().read(SAMPLE_SCC_ROLL_UP_RU2)
         captions = scc1.get_captions(u'en-US')
-        expected_timings = [(766666.6666666667, 2800000.0),
-                            (2800000.0, 4600000.0),
-                            (4600000.0, 6166666.666666667),
-                            (6166666.666666667, 9733333.333333332),
-                            (9733333.333333332, 11266666.666666668),
-                            (11266666.666666668, 12266666.666666668),
-                            (12266666.666666668, 13266666.666666668),
-                            (13266666.666666668, 14266666.666666668),
-                            (14266666.666666668, 17066666.666666668),
-                            (17066666.666666668, 18666666.666666668),
-                            (18666666.666666668, 20233333.333333336),
-                            (20233333.333333336, 21833333.333333332),
-                            (21833333.333333332, 34933333.33333333),
-                            (34933333.33333333, 36433333.33333333),
-                            (36433333.33333333, 44300000.0),
-                            (44300000.0, 44866666.666666664)]
+        expected_timings = [(767433, 2802800),
+                            (2802800, 4604600),
+                            (4604600, 6172833),
+                            (6172833, 9743067),
+                            (9743067, 11277933),
+                            (11277933, 12278933),
+                            (12278933, 13279933),
+                            (13279933, 14280933),
+                            (14280933, 17083733),
+                            (17083733, 18685333),
+                            (18685333, 20253567),
+                            (20253567, 21855167),
+                            (21855167, 34968267),
+                            (34968267, 36469767),
+                            (36469767, 44344300),
+                            (44344300, 44911533)]
 
         actual_timings = [(c_.start, c_.end) for c_ in captions]
         self.assertEqual(expected_timings, actual_timings)
@@ -222,13 +373,13 @@ class CoverageOnlyTestCase(unittest.TestCase):
         # all the timing specs that previously had coverage, will actually
         # remain unchanged.
         scc1 = SCCReader().read(SAMPLE_SCC_POP_ON)
-        expected_timings = [(9776433.333333332, 12312300.0),
-                            (14781433.33333333, 16883533.333333332),
-                            (16950266.666666664, 18618600.000000004),
-                            (18685333.333333332, 20754066.666666664),
-                            (20820800.0, 26626600.0),
-                            (26693333.333333332, 32098733.333333332),
-                            (32165466.66666666, 36202833.33333332)]
+        expected_timings = [(9776433, 12312300),
+                            (14781433, 16883533),
+                            (16950267, 18618600),
+                            (18685333, 20754067),
+                            (20820800, 26626600),
+                            (26693333, 32098733),
+                            (32165467, 36202833)]
 
         actual_timings = [
             (c_.start, c_.end) for c_ in scc1.get_captions(u'en-US')]
@@ -0,0 +1,252 @@
+"""Checks that the italics of the SCC buffers are formatted in a single pass
+like they used to be by a pipeline of list-rebuilding passes, which is kept
+here as the reference.
+"""
+import random
+import unittest
+
+from pycaption.scc.specialized_collections import (
+    _InstructionNode, _format_italics)
+
+
+def format_italics_in_passes(collection):
+    new_collection = _skip_initial_italics_off_nodes(collection)
+
+    new_collection = _skip_empty_text_nodes(new_collection)
+
+    new_collection = _skip_redundant_italics_nodes(new_collection)
+
+    new_collection = _close_italics_before_repositioning(new_collection)
+
+    new_collection = _ensure_final_italics_node_closes(new_collection)
+
+    new_collection = _remove_noop_italics(new_collection)
+
+    return new_collection
+
+
+def _remove_noop_on_off_italics(collection):
+    new_collection = []
+    to_commit = None
+
+    for node in collection:
+        if node.is_italics_node() and node.sets_italics_on():
+            to_commit = node
+            continue
+
+        elif node.is_italics_node() and node.sets_italics_off():
+            if to_commit:
+                to_commit = None
+                continue
+        else:
+            if to_commit:
+                new_collection.append(to_commit)
+                to_commit = None
+
+        new_collection.append(node)
+
+    return new_collection
+
+
+def _remove_noon_off_on_italics(collection):
+    new_collection = []
+    to_commit = None
+
+    for node in collection:
+        if node.is_italics_node() and node.sets_italics_off():
+            to_commit = node
+            continue
+
+        elif node.is_italics_node() and node.sets_italics_on():
+            if to_commit:
+                to_commit = None
+                continue
+        else:
+            if to_commit:
+                new_collection.append(to_commit)
+                to_commit = None
+
+        new_collection.append(node)
+
+    if to_commit:
+        new_collection.append(to_commit)
+
+    return new_collection
+
+
+def _remove_noop_italics(collection):
+    new_collection = _remove_noop_on_off_italics(collection)
+
+    new_collection = _remove_noon_off_on_italics(new_collection)
+
+    return new_collection
+
+
+def _skip_initial_italics_off_nodes(collection):
+    new_collection = []
+    can_add_italics_off_nodes = False
+
+    for node in collection:
+        if node.is_italics_node():
+            if node.sets_italics_on():
+                can_add_italics_off_nodes = True
+                new_collection.append(node)
+            elif can_add_italics_off_nodes:
+                new_collection.append(node)
+        else:
+            new_collection.append(node)
+
+    return new_collection
+
+
+def _skip_empty_text_nodes(collection):
+    return [node for node in collection
+            if not (node.is_text_node() and node.is_empty())]
+
+
+def _skip_redundant_italics_nodes(collection):
+    new_collection = []
+    state = None
+
+    for node in collection:
+        if node.is_italics_node():
+            if state is None:
+                state = node.sets_italics_on()
+                new_collection.append(node)
+                continue
+            # skip the nodes that are like the previous
+            if node.sets_italics_on() is state:
+                continue
+            else:
+                state = node.sets_italics_on()
+        new_collection.append(node)
+
+    return new_collection
+
+
+def _close_italics_before_repositioning(collection):
+    new_collection = []
+
+    italics_on = False
+    last_italics_on_node = None
+
+    for idx, node in enumerate(collection):
+        if node.is_italics_node() and node.sets_italics_on():
+            italics_on = True
+            last_italics_on_node = node
+        if node.is_italics_node() and node.sets_italics_off():
+            italics_on = False
+        if node.requires_repositioning() and italics_on:
+            # Append an italics closing node before the position change
+            new_collection.append(
+                _InstructionNode.create_italics_style(
+                    # The position info of this new node should be the same
+                    position=last_italics_on_node.position,
+                    turn_on=False
+                )
+            )
+            new_collection.append(node)
+            # Append an italics opening node after the positioning change
+            new_collection.append(
+                _InstructionNode.create_italics_style(
+                    position=node.position
+                )
+            )
+            continue
+        new_collection.append(node)
+
+    return new_collection
+
+
+def _ensure_final_italics_node_closes(collection):
+    new_collection = list(collection)
+
+    italics_on = False
+    last_italics_on_node = None
+
+    for node in collection:
+        if node.is_italics_node() and node.sets_italics_on():
+            italics_on = True
+            last_italics_on_node = node
+        if node.is_italics_node() and node.sets_italics_off():
+            italics_on = False
+
+    if italics_on:
+        new_collection.append(
+            _InstructionNode.create_italics_style(
+                position=last_italics_on_node.position,
+                turn_on=False
+            )
+        )
+    return new_collection
+
+
+def _describe(nodes, originals):
+    """The nodes of the given list, as the original nodes themselves, or as
+    (type, position) tuples for the nodes created by the formatting
+    """
+    return [node if any(node is original for original in originals)
+            else (node._type, node.position) for node in nodes]
+
+
+class FormatItalicsTestCase(unittest.TestCase):
+
+    def _assert_formats_like_the_passes(self, nodes):
+        self.assertEqual(
+            _describe(list(_format_italics(nodes)), nodes),
+            _describe(format_italics_in_passes(nodes), nodes))
+
+    def _create_random_node(self, rng):
+        position = (rng.randint(1, 3), rng.choice((0, 4)))
+        kind = rng.randint(0, 6)
+        if kind == 0:
+            return _InstructionNode.create_break(position)
+        elif kind == 1:
+            return _InstructionNode.create_repositioning_command(position)
+        elif kind in (2, 3):
+            return _InstructionNode.create_italics_style(
+                position, turn_on=kind == 2)
+        else:
+            return _InstructionNode(
+                text=rng.choice((None, u'', u'a', u'b')), position=position)
+
+    def test_random_collections(self):
+        rng = random.Random(42)
+        for _ in xrange(3000):
+            self._assert_formats_like_the_passes([
+                self._create_random_node(rng)
+                for _ in xrange(rng.randint(0, 16))])
+
+    def test_italics_heavy_collections(self):
+        rng = random.Random(7)
+        for _ in xrange(1000):
+            nodes = []
+            for _ in xrange(rng.randint(0, 12)):
+                position = (rng.randint(1, 2), 0)
+                if rng.random() < 0.7:
+                    nodes.append(_InstructionNode.create_italics_style(
+                        position, turn_on=rng.random() < 0.5))
+                elif rng.random() < 0.5:
+                    nodes.append(
+                        _InstructionNode.create_repositioning_command(
+                            position))
+                else:
+                    nodes.append(_InstructionNode.create_text(position, u'a'))
+            self._assert_formats_like_the_passes(nodes)
+
+    def test_empty_collection(self):
+        self.assertEqual(list(_format_italics([])), [])
+
+    def test_italics_are_closed_around_repositioning(self):
+        on = _InstructionNode.create_italics_style((1, 0))
+        text = _InstructionNode.create_text((1, 0), u'a')
+        move = _InstructionNode.create_repositioning_command((2, 0))
+        other_text = _InstructionNode.create_text((2, 0), u'b')
+
+        result = list(_format_italics([on, text, move, other_text]))
+
+        self.assertEqual(
+            _describe(result, [on, text, move, other_text]),
+            [on, text, (_InstructionNode.ITALICS_OFF, (1, 0)), move,
+             (_InstructionNode.ITALICS_ON, (2, 0)), other_text,
+             (_InstructionNode.ITALICS_OFF, (2, 0))])
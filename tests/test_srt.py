@@ -1,6 +1,10 @@
 import unittest
+from io import StringIO
+from types import GeneratorType
 
-from pycaption import SRTReader, CaptionReadNoCaptions
+from pycaption import (
+    SRTReader, CaptionReadNoCaptions, CaptionReadSyntaxError)
+from pycaption.exceptions import InvalidInputError
 
 from .samples.srt import (
     SAMPLE_SRT, SAMPLE_SRT_NUMERIC,
@@ -40,3 +44,34 @@ class SRTReaderTestCase(unittest.TestCase):
     def test_extra_trailing_empty_line(self):
         captions = SRTReader().read(SAMPLE_SRT_TRAILING_BLANKS)
         self.assertEquals(2, len(captions.get_captions(u"en-US")))
+
+    def test_iter_captions(self):
+        expected = SRTReader().read(SAMPLE_SRT).get_captions(u"en-US")
+        captions = SRTReader().iter_captions(
+            StringIO(SAMPLE_SRT_BLANK_LINES + u'\n' + SAMPLE_SRT))
+
+        self.assertTrue(isinstance(captions, GeneratorType))
+        captions = list(captions)
+        self.assertEquals(2 + len(expected), len(captions))
+        self.assertEquals(
+            [caption.get_text() for caption in expected],
+            [caption.get_text() for caption in captions[2:]])
+
+    def test_iter_captions_of_unterminated_lines(self):
+        captions = list(SRTReader().iter_captions([
+            u'1', u'00:00:01,000 --> 00:00:02,000', u'Hello', u'',
+            u'2', u'00:00:03,000 --> 00:00:04,000', u'World']))
+
+        self.assertEquals(
+            [(1000000, 2000000, u'Hello'), (3000000, 4000000, u'World')],
+            [(caption.start, caption.end, caption.get_text())
+             for caption in captions])
+
+    def test_iter_captions_of_byte_lines(self):
+        captions = SRTReader().iter_captions([b'1\n'])
+        self.assertRaises(InvalidInputError, list, captions)
+
+    def test_missing_timing_line(self):
+        self.assertRaises(
+            CaptionReadSyntaxError, SRTReader().read, u'1\n00:00:01,000 --> '
+            u'00:00:02,000\nText\n\n2')
@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 
 from pycaption import (
     SRTReader, SRTWriter, SAMIWriter, DFXPWriter, WebVTTWriter)
@@ -20,6 +21,22 @@ class SRTtoSRTTestCase(unittest.TestCase, SRTTestingMixIn):
         self.assertTrue(isinstance(results, unicode))
         self.assertSRTEquals(SAMPLE_SRT, results)
 
+    def test_write_iter_yields_a_chunk_per_caption(self):
+        caption_set = SRTReader().read(SAMPLE_SRT)
+        chunks = list(SRTWriter().write_iter(caption_set))
+        self.assertEqual(
+            len(chunks), len(caption_set.get_captions(u'en-US')))
+        self.assertEqual(u''.join(chunks), SRTWriter().write(caption_set))
+
+    def test_write_to(self):
+        caption_set = SRTReader().read(SAMPLE_SRT)
+        caption_set.set_captions(u'fr', caption_set.get_captions(u'en-US'))
+        fileobj = StringIO()
+        SRTWriter().write_to(caption_set, fileobj)
+        self.assertEqual(
+            fileobj.getvalue(), SRTWriter().write(caption_set))
+        self.assertEqual(fileobj.getvalue().count(u'MULTI-LANGUAGE SRT'), 1)
+
 
 class SRTtoSAMITestCase(unittest.TestCase, SAMITestingMixIn):
 
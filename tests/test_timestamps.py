@@ -0,0 +1,76 @@
+import unittest
+
+from pycaption.exceptions import CaptionReadSyntaxError, InvalidInputError
+from pycaption.timestamps import (
+    format_timestamp, format_webvtt_timestamp, parse_srt_timestamp,
+    parse_webvtt_timestamp, parse_dfxp_time, parse_scc_timecode,
+    format_scc_timecode, scc_timecode_to_frames, scc_frames_to_microseconds,
+    microseconds_to_scc_frames)
+
+
+class TimestampsTestCase(unittest.TestCase):
+
+    def test_format_timestamp(self):
+        self.assertEqual(format_timestamp(0), u'00:00:00.000')
+        self.assertEqual(format_timestamp(3723004999), u'01:02:03.004')
+        self.assertEqual(format_timestamp(1500.5, u','), u'00:00:00,001')
+
+    def test_format_timestamp_of_10_hours_and_more(self):
+        self.assertEqual(format_timestamp(36000000000), u'10:00:00.000')
+        self.assertEqual(
+            format_timestamp(90061001000, u','), u'25:01:01,001')
+
+    def test_format_webvtt_timestamp(self):
+        self.assertEqual(format_webvtt_timestamp(61001000), u'01:01.001')
+        self.assertEqual(format_webvtt_timestamp(59999600), u'01:00.000')
+        self.assertEqual(
+            format_webvtt_timestamp(36000000000), u'10:00:00.000')
+
+    def test_parse_srt_timestamp(self):
+        self.assertEqual(parse_srt_timestamp(u'01:02:03,004'), 3723004000)
+        self.assertEqual(parse_srt_timestamp(u'01:02:03'), 3723000000)
+
+    def test_parse_webvtt_timestamp(self):
+        self.assertEqual(parse_webvtt_timestamp(u'01:02:03.004'), 3723004000)
+        self.assertEqual(parse_webvtt_timestamp(u'02:03.004'), 123004000)
+        self.assertRaises(
+            CaptionReadSyntaxError, parse_webvtt_timestamp, u'02:03,004')
+
+    def test_parse_dfxp_time(self):
+        self.assertEqual(parse_dfxp_time(u'01:02:03.4'), 3723400000)
+        self.assertEqual(parse_dfxp_time(u'00:00:01.5000'), 1500000)
+        self.assertEqual(parse_dfxp_time(u'1.5s'), 1500000)
+        self.assertRaises(InvalidInputError, parse_dfxp_time, u'1.5x')
+
+    def test_scc_timecodes(self):
+        self.assertEqual(parse_scc_timecode(u'00:00:01;00'), 1001000)
+        self.assertEqual(parse_scc_timecode(u'00:00:01:15'), 1501500)
+        self.assertEqual(parse_scc_timecode(u'00:00:01:15', 2000000), 0)
+        self.assertEqual(format_scc_timecode(1501500), u'00:00:01:15')
+        self.assertEqual(format_scc_timecode(1501499.5), u'00:00:01:15')
+
+    def test_scc_drop_frame_timecodes(self):
+        # The frames 00 and 01 of every minute but every tenth are dropped
+        self.assertEqual(scc_timecode_to_frames(u'00:00:59;29'), 1799)
+        self.assertEqual(scc_timecode_to_frames(u'00:01:00;02'), 1800)
+        self.assertEqual(scc_timecode_to_frames(u'00:10:00;00'), 17982)
+        self.assertEqual(scc_timecode_to_frames(u'01:00:00;00'), 107892)
+        self.assertEqual(scc_timecode_to_frames(u'01:00:00:00'), 108000)
+        self.assertEqual(
+            format_scc_timecode(parse_scc_timecode(u'00:01:00;02'), True),
+            u'00:01:00;02')
+        self.assertEqual(
+            format_scc_timecode(parse_scc_timecode(u'00:10:00;00'), True),
+            u'00:10:00;00')
+
+    def test_scc_frames_round_trip(self):
+        for frames in xrange(0, 3000000, 997):
+            microseconds = scc_frames_to_microseconds(frames)
+            self.assertEqual(microseconds_to_scc_frames(microseconds), frames)
+            self.assertEqual(
+                scc_timecode_to_frames(format_scc_timecode(microseconds)),
+                frames)
+            self.assertEqual(
+                scc_timecode_to_frames(
+                    format_scc_timecode(microseconds, drop_frame=True)),
+                frames)
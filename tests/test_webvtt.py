@@ -1,9 +1,12 @@
 import unittest
+from io import StringIO
 
 from pycaption import (
     WebVTTReader, WebVTTWriter, SAMIReader, DFXPReader,
-    CaptionReadNoCaptions, CaptionReadError, CaptionReadSyntaxError
+    CaptionReadNoCaptions, CaptionReadError, CaptionReadSyntaxError,
+    Caption, CaptionList, CaptionNode, CaptionSet
 )
+from pycaption.geometry import Layout
 
 from .samples.dfxp import DFXP_STYLE_REGION_ALIGN_CONFLICT
 from .samples.sami import SAMPLE_SAMI_DOUBLE_BR
@@ -158,6 +161,39 @@ class WebVTTReaderTestCase(unittest.TestCase):
         cue = captions.get_captions(u'en-US')[0]
         self.assertEquals(cue.start, 0)
 
+    def test_feed(self):
+        self.assertEqual(self.reader.feed(u'WEBVTT\r\n\r'), [])
+        self.assertEqual(
+            self.reader.feed(u'\n00:01.000 --> 00:02.000\r\nFir'), [])
+        captions = self.reader.feed(u'st\r\n\r\n00:03.000 --> 00:04.000\r\n')
+        self.assertEqual(
+            [(cue.start, cue.get_text()) for cue in captions],
+            [(1000000, u'First')])
+
+        self.assertEqual(self.reader.feed(u'Second'), [])
+        captions = self.reader.close()
+        self.assertEqual(
+            [(cue.start, cue.get_text()) for cue in captions],
+            [(3000000, u'Second')])
+
+    def test_feed_gives_the_same_captions_as_read(self):
+        expected = self.reader.read(SAMPLE_WEBVTT_2).get_captions(u'en-US')
+        captions = []
+        for index in range(0, len(SAMPLE_WEBVTT_2), 7):
+            captions.extend(self.reader.feed(SAMPLE_WEBVTT_2[index:index + 7]))
+        captions.extend(self.reader.close())
+
+        self.assertEqual(
+            [(cue.start, cue.end, cue.get_text()) for cue in expected],
+            [(cue.start, cue.end, cue.get_text()) for cue in captions])
+
+    def test_feed_reports_the_line_of_errors(self):
+        self.reader.feed(u'WEBVTT\n\n00:01.000 --> 00:02.000\n')
+        with self.assertRaises(CaptionReadSyntaxError) as context:
+            self.reader.feed(u'\n')
+        self.assertEqual(
+            context.exception.args[0], u'Cue without content. (line 2)')
+
 
 class WebVTTWriterTestCase(unittest.TestCase):
 
@@ -174,3 +210,64 @@ class WebVTTWriterTestCase(unittest.TestCase):
         results = WebVTTWriter().write(caption_set)
         self.assertEquals(
             WEBVTT_FROM_DFXP_WITH_CONFLICTING_ALIGN, results)
+
+    def test_write_iter_yields_the_header_then_the_cues(self):
+        caption_set = SAMIReader().read(SAMPLE_SAMI_DOUBLE_BR)
+        chunks = list(self.writer.write_iter(caption_set))
+        self.assertEqual(chunks[0], WebVTTWriter.HEADER)
+        self.assertEqual(u''.join(chunks), SAMPLE_WEBVTT_DOUBLE_BR)
+
+    def test_write_iter_generators_can_be_interleaved(self):
+        # Both caption sets use the same style object, but its class is
+        # defined differently in each of them
+        style = {u'class': u'emphasis'}
+        caption_sets = [
+            CaptionSet(
+                {u'en-US': CaptionList([
+                    Caption(start, start + 1000000,
+                            [CaptionNode.create_text(u'Hello')], style=style)
+                    for start in (1000000, 2000000)])},
+                styles={u'emphasis': {emphasis: True}})
+            for emphasis in (u'italics', u'bold')]
+        expected = [WebVTTWriter().write(caption_set)
+                    for caption_set in caption_sets]
+
+        generators = [self.writer.write_iter(caption_set)
+                      for caption_set in caption_sets]
+        chunks = [[], []]
+        # The header, the first cue, the blank line and the second cue
+        for _ in range(4):
+            for index, generator in enumerate(generators):
+                chunks[index].append(next(generator))
+
+        self.assertEqual(
+            [u''.join(chunks[0]), u''.join(chunks[1])], expected)
+        self.assertIn(u'<b>Hello</b>', expected[1])
+
+    def test_write_iter_generators_keep_their_layout(self):
+        # The layout of the captions is the one of their list
+        caption_sets = [
+            CaptionSet({u'en-US': CaptionList(
+                [Caption(start, start + 1000000,
+                         [CaptionNode.create_text(u'Hello')])
+                 for start in (1000000, 2000000)],
+                layout_info=Layout(webvtt_positioning=positioning))})
+            for positioning in (u'align:start', u'align:end')]
+
+        generators = [self.writer.write_iter(caption_set)
+                      for caption_set in caption_sets]
+        chunks = [[], []]
+        # The header, the first cue, the blank line and the second cue
+        for _ in range(4):
+            for index, generator in enumerate(generators):
+                chunks[index].append(next(generator))
+
+        self.assertEqual(u''.join(chunks[0]).count(u' align:start\n'), 2)
+        self.assertEqual(u''.join(chunks[1]).count(u' align:end\n'), 2)
+
+    def test_write_to(self):
+        caption_set = DFXPReader().read(DFXP_STYLE_REGION_ALIGN_CONFLICT)
+        fileobj = StringIO()
+        self.writer.write_to(caption_set, fileobj)
+        self.assertEqual(
+            fileobj.getvalue(), WEBVTT_FROM_DFXP_WITH_CONFLICTING_ALIGN)
@@ -3,7 +3,8 @@ import unittest
 from pycaption import (
     WebVTTReader, WebVTTWriter, SRTWriter, SAMIWriter, DFXPWriter)
 
-from .samples.dfxp import SAMPLE_DFXP
+from .samples.dfxp import (
+    SAMPLE_DFXP, SAMPLE_DFXP_FROM_WEBVTT_WITH_INLINE_POSITIONING)
 from .samples.sami import SAMPLE_SAMI
 from .samples.srt import SAMPLE_SRT
 from .samples.webvtt import (
@@ -60,6 +61,14 @@ class WebVTTtoDFXPTestCase(unittest.TestCase, DFXPTestingMixIn):
             SAMPLE_DFXP, results, ignore_styling=True, ignore_spans=True
         )
 
+    def test_inline_positioning_is_written_from_the_cue_settings(self):
+        caption_set = WebVTTReader().read(SAMPLE_WEBVTT_WITH_CUE_SETTINGS)
+
+        results = DFXPWriter(write_inline_positioning=True).write(caption_set)
+
+        self.assertEqual(
+            SAMPLE_DFXP_FROM_WEBVTT_WITH_INLINE_POSITIONING, results)
+
 
 class WebVTTtoSRTTestCase(unittest.TestCase, SRTTestingMixIn):
 